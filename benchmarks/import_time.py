@@ -0,0 +1,181 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+"""Measures cold start import time of home app modules.
+
+Each run imports the home app server package and all views in a fresh interpreter
+(as ``config.scan()`` does at app start) using ``python -X importtime``,
+and records self and cumulative import time per module.
+
+Usage::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --output startup.json
+    python benchmarks/import_time.py --baseline startup.json --tolerance 1.5
+
+The benchmark fails (exit code 1) if a rendering module is imported at start up
+or if a target module becomes slower than baseline multiplied by tolerance.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAM_DIR = os.path.join(ROOT_DIR, 'program')
+
+TARGET_MODULES = [
+    'homeapp.server',
+    'homeapp.server.MfpAuthorizer',
+    'homeapp.server.views.error',
+    'homeapp.server.views.print',
+    'homeapp.server.views.webhook',
+]
+"""Modules which are imported at home app start up."""
+
+LAZY_MODULES = [
+    'chardet',
+    'reportlab.pdfgen.canvas',
+    'reportlab.pdfbase.pdfmetrics',
+    'reportlab.pdfbase.ttfonts',
+    'reportlab.pdfbase._glyphlist',
+]
+"""Modules which must be imported on first use, not at start up."""
+
+
+def measure(modules):
+    """Imports modules in a fresh interpreter and parses import time.
+
+    Args:
+        modules (list[str]): Module names.
+    Returns:
+        dict: Module name -> {'self': usec, 'cumulative': usec}.
+    """
+    env = dict(os.environ)
+    paths = [os.path.join(PROGRAM_DIR, 'lib'), PROGRAM_DIR]
+    if env.get('PYTHONPATH'):
+        paths.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(paths)
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+        cwd=PROGRAM_DIR,
+        env=env,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    # Line format: 'import time: {self} | {cumulative} | {indent}{module}'
+    timings = {}
+    errors = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            errors.append(line)
+            continue
+
+        fields = line[len('import time:'):].split('|')
+        if not fields[0].strip().isdigit():
+            continue  # Header line
+
+        timings[fields[2].strip()] = {
+            'self': int(fields[0]),
+            'cumulative': int(fields[1]),
+        }
+
+    if completed.returncode != 0:
+        raise RuntimeError('Modules cannot be imported:\n' + '\n'.join(errors))
+
+    return timings
+
+
+def run(modules, repeat):
+    """Measures import time several times and takes median per module."""
+    samples = [measure(modules) for _ in range(repeat)]
+
+    names = set()
+    for sample in samples:
+        names.update(sample)
+
+    result = {}
+    for name in names:
+        values = [sample[name] for sample in samples if name in sample]
+        result[name] = {
+            key: int(statistics.median(value[key] for value in values))
+            for key in ('self', 'cumulative')
+        }
+
+    return result
+
+
+def report(result, modules, top):
+    """Prints target modules and slowest modules."""
+    print('{:>12} {:>12}  {}'.format('self[us]', 'cumul[us]', 'target module'))
+    for name in modules:
+        timing = result.get(name, {'self': 0, 'cumulative': 0})
+        print('{self:>12} {cumulative:>12}  {0}'.format(name, **timing))
+
+    print()
+    print('{:>12} {:>12}  {}'.format('self[us]', 'cumul[us]', 'slowest module (self)'))
+    ranking = sorted(result.items(), key=lambda item: item[1]['self'], reverse=True)
+    for name, timing in ranking[:top]:
+        print('{self:>12} {cumulative:>12}  {0}'.format(name, **timing))
+
+
+def check(result, modules, baseline=None, tolerance=1.5):
+    """Checks import time regressions.
+
+    Returns:
+        list[str]: Regression messages.
+    """
+    messages = [
+        'Module "{}" is imported at start up.'.format(name)
+        for name in LAZY_MODULES if name in result
+    ]
+
+    if baseline:
+        for name in modules:
+            if name not in baseline or name not in result:
+                continue
+
+            limit = baseline[name]['cumulative'] * tolerance
+            if result[name]['cumulative'] > limit:
+                messages.append('Module "{}" import takes {} us (limit: {} us).'.format(
+                    name, result[name]['cumulative'], int(limit)))
+
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures home app start up import time.')
+    parser.add_argument('modules', nargs='*', default=TARGET_MODULES, help='Target modules.')
+    parser.add_argument('--repeat', type=int, default=5, help='Measurement count.')
+    parser.add_argument('--top', type=int, default=15, help='Count of slowest modules to print.')
+    parser.add_argument('--output', help='JSON file to record import time per module.')
+    parser.add_argument('--baseline', help='JSON file recorded by --output to compare with.')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='Allowed ratio to baseline.')
+    args = parser.parse_args()
+
+    result = run(args.modules, args.repeat)
+    report(result, args.modules, args.top)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2, sort_keys=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    messages = check(result, args.modules, baseline, args.tolerance)
+    for message in messages:
+        print(message, file=sys.stderr)
+
+    return 1 if messages else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
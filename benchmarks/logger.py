@@ -0,0 +1,74 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+"""Measures cost of ``mfplib.debug.Logger`` calls.
+
+Each case calls ``Logger.warn`` from a function (as app code does) and reports time per call
+when no logger is configured, when the level is suppressed and when the log is emitted
+to a logger which discards records. Eager ``str.format`` messages and lazy ``%`` arguments are compared.
+
+Usage::
+
+    python benchmarks/logger.py
+    python benchmarks/logger.py --number 500000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'program', 'lib')]
+
+from mfplib.debug import Logger  # noqa: E402
+
+
+class NullLogger:
+    """Logger object which discards records."""
+
+    def log(self, message, log_level=None, name=None):
+        pass
+
+
+def eager(worker_id):
+    Logger.warn('Task is done by worker {}.'.format(worker_id))
+
+
+def lazy(worker_id):
+    Logger.warn('Task is done by worker %s.', worker_id)
+
+
+def configure(logger_obj, level):
+    """Configures logger as ``set_logger_type`` does."""
+    Logger._logger_obj = logger_obj
+    Logger.set_level(level)
+
+
+CASES = [
+    ('no logger', None, 'debug'),
+    ('suppressed', NullLogger(), 'error'),
+    ('emitted', NullLogger(), 'debug'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures logger call cost.')
+    parser.add_argument('--number', type=int, default=200000, help='Call count per measurement.')
+    args = parser.parse_args()
+
+    print('{:<12} {:>10} {:>10}'.format('case', 'eager[ns]', 'lazy[ns]'))
+    for name, logger_obj, level in CASES:
+        configure(logger_obj, level)
+        results = [
+            timeit.timeit(lambda: function(12), number=args.number) / args.number * 1e9
+            for function in (eager, lazy)
+        ]
+        print('{:<12} {:>10.0f} {:>10.0f}'.format(name, *results))
+
+    configure(None, 'debug')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+"""Measures app communication data size and serialization time.
+
+Typical print and scan task payload requests (as built by ``Dispatcher.dispatch``)
+are serialized by each serializer, and bytes on the wire (JSON body)
+and encode/decode time are reported.
+
+Usage::
+
+    python benchmarks/wire_format.py
+    python benchmarks/wire_format.py --number 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'program', 'lib'), os.path.join(ROOT_DIR, 'program')]
+
+from mfplib.app.comm import CompactSerializer, PickleSerializer  # noqa: E402
+from mfplib.jobs.print.setting import PrintSetting, PaperSize, ColorMode, DuplexMode  # noqa: E402
+from payloads.print import PrintTaskPayload  # noqa: E402
+from payloads.scan import ScanTaskPayload  # noqa: E402
+
+
+def build_requests():
+    """Builds typical task payload requests.
+
+    Returns:
+        dict: Request name -> request message.
+    """
+    def request(task_class, payload):
+        return {
+            'handler_path': 'mfplib.app.background.handlers.task_payload.TaskPayloadHandler',
+            'body': {
+                'task_class': task_class,
+                'dispatched_at': 1600000000.123456,
+                'locale': 'ja_JP',
+                'payload': payload,
+            },
+        }
+
+    setting = PrintSetting(
+        sets=2,
+        paper_size=PaperSize.A4,
+        color_mode=ColorMode.FullColor,
+        duplex_mode=DuplexMode.Simplex,
+    )
+
+    return {
+        'print': request('tasks.print.PrintTask', PrintTaskPayload(setting, 'print.pdf')),
+        'scan': request('tasks.upload.UploadTask', ScanTaskPayload('/home/app/data/scan/20200901123456')),
+    }
+
+
+SERIALIZERS = {
+    'pickle+base64': PickleSerializer(),
+    'compact': CompactSerializer(),
+    'compact (no zlib)': CompactSerializer(compression_threshold=None),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures app communication wire format.')
+    parser.add_argument('--number', type=int, default=10000, help='Iteration count per measurement.')
+    args = parser.parse_args()
+
+    print('{:<8} {:<18} {:>8} {:>12} {:>12}'.format('request', 'serializer', 'bytes', 'encode[us]', 'decode[us]'))
+    for request_name, request in build_requests().items():
+        for serializer_name, serializer in SERIALIZERS.items():
+            text = serializer.dumps(request)
+            size = len(json.dumps({'data': text}).encode('utf-8'))
+
+            encode = timeit.timeit(lambda: serializer.dumps(request), number=args.number)
+            decode = timeit.timeit(lambda: serializer.loads(text), number=args.number)
+
+            print('{:<8} {:<18} {:>8} {:>12.2f} {:>12.2f}'.format(
+                request_name, serializer_name, size,
+                encode / args.number * 1e6, decode / args.number * 1e6))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
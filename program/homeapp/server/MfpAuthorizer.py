@@ -8,6 +8,7 @@ import hashlib
 
 from pyramid.view import view_config
 from hmserver.apps.common.logger import logger_obj
+from mfplib.debug import Logger
 
 
 class MfpAuthorizer(object):
@@ -231,12 +232,16 @@ class MfpInfoGetter(object):
 
     def __get(self, url):
         try:
-            logger_obj.log("get:" + url)
+            startedAt = time.time()
             resp = requests.get(self.__baseUrl + url, headers=self.__headers)
-            logger_obj.log("resp:" + json.dumps(resp.json()))
-            return resp.json()
+            body = resp.json()
+            Logger.record("device_get", max_per_second=1, url=url, status=resp.status_code,
+                          elapsed_ms=int((time.time() - startedAt) * 1000))
+            # 响应全文只在debug级别抽样输出
+            Logger.record("device_get_body", level="debug", sample_every=20, url=url, body=body)
+            return body
         except Exception as err:
-            logger_obj.log("exception:" + str(err))
+            Logger.record("device_get_failed", level="error", url=url, error=str(err))
             return None
 
     def GetMfpdeviceCapability(self):
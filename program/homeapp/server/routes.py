@@ -8,6 +8,7 @@ def configure(config):
     # Set Webhook URL
     webhook_url = '/webhooks'
     webhook.set_url(webhook_url)
+    webhook.start_event_queue()
     config.add_route('webhooks', webhook_url, xhr=False)
 
     # Set service routes (route name, URL)
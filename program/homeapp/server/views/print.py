@@ -1,8 +1,5 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
-from http.client import SWITCHING_PROTOCOLS
-import string
-from unittest import case
 from pyramid.view import view_config
 
 from mfplib.jobs.print import Printer, PaperSize, ColorMode
@@ -19,84 +16,73 @@ from mfplib.jobs.errors import (
     StorageFullError,
 )
 
+from seatcard import CardSize, Imposition, Roster, RowSelection, TextFitter
+
 from .view import View
+from ..errors import BadRequestError, ErrorCode
 
-import csv
-import chardet
-from reportlab.pdfgen import canvas
+# 纸张尺寸模块很轻，直接导入（canvas和字体模块加载较慢，在dealCSV和registerFont中首次使用时才导入）
 from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.units import cm
 
 
 # 正常
-def Normal(canvas, name, company, font_size, font_color, *post):
-    w,h = A4
+def Normal(canvas, name, company, font_size, font_color, *post, size=A4):
+    w,h = size
     if font_color == "blue":
         canvas.setFillColorRGB(0, 0, 255) #蓝色
     elif font_color == "golden":
         canvas.setFillColorRGB(255, 215, 0) #金色
     else:
         canvas.setFillColorRGB(0, 0, 0) #黑色
-    # 设置名字
-    canvas.setFont("simhei", font_size)
-    canvas.drawCentredString(0.5*w,0.28*h,name)
-    # 设置公司
-    canvas.setFont("simhei", 50)
-    canvas.drawString(0.05*w,0.43*h,company)
-    try:
+    fitter = TextFitter.get("simhei")
+    # 设置名字（过长时缩小字号，仍放不下时以省略号结尾）
+    fitted = fitter.fit(name, 0.9*w, font_size)
+    canvas.setFont("simhei", fitted.size)
+    canvas.drawCentredString(0.5*w,0.28*h,fitted.lines[0])
+    # 设置公司（过长时缩小字号或折成两行，仍放不下时以省略号结尾）
+    fitted = fitter.fit(company, 0.9*w, 50, max_lines=2, max_height=0.07*h)
+    canvas.setFont("simhei", fitted.size)
+    for i, line in enumerate(reversed(fitted.lines)):
+        canvas.drawString(0.05*w,0.43*h+i*TextFitter.LEADING*fitted.size,line)
+    if post:
         # 设置职务
-        canvas.drawRightString(w-0.05*w,0.2*h,post[0])
-    except:
-        pass
+        fitted = fitter.fit(post[0], 0.9*w, 50)
+        canvas.setFont("simhei", fitted.size)
+        canvas.drawRightString(w-0.05*w,0.2*h,fitted.lines[0])
 # 倒置
-def Inversion(canvas, name, company, font_size, font_color, *post):
-    w,h = A4
+def Inversion(canvas, name, company, font_size, font_color, *post, size=A4):
+    w,h = size
     canvas.translate(w,h)
     canvas.scale(-1.0, -1.0)
     try:
-        Normal(canvas, name, company, font_size, font_color, post[0])
+        Normal(canvas, name, company, font_size, font_color, post[0], size=size)
     except:
-        Normal(canvas, name, company, font_size, font_color)
-
-# 读取CSV文件，输出CSV文件内容
-def outputCSV(filename):
-    with open(filename, 'rb') as File:
-        text = File.read()   
-    Encoding = chardet.detect(text)['encoding']
-    csv_reader = csv.reader(open(filename,mode='r',encoding=Encoding))
-    result = []
-    for row in csv_reader:
-        info = {}
-        info['name'] = row[0]
-        info['company'] = row[1]
-        try: 
-            info['post'] = row[2]
-        except:
-            pass
-        result.append(info)
-    result.pop(0)
-    return result
-
-# 读取CSV文件，生成PDF
-def dealCSV(filename, font_size, font_color):
-    pdfmetrics.registerFont(TTFont('simhei', 'simhei.ttf'))
-    w,h = A4
-    c = canvas.Canvas("documents/print.pdf", pagesize=A4)
-    for row in outputCSV(filename):
-        # 画出折痕线
-        c.setDash([1,1,3,3,1,4,4,1], 0) #设置线条为点虚线
-        c.line(0,0.5*h,w,0.5*h)
-        c.line(0,0.85*h,w,0.85*h)
-        c.line(0,0.15*h,w,0.15*h)
-        try:    
-            Normal(c,row['name'],row['company'], font_size, font_color, row['post'])
-            Inversion(c,row['name'],row['company'], font_size, font_color, row['post'])
-        except:
-            Normal(c,row['name'],row['company'], font_size, font_color)
-            Inversion(c,row['name'],row['company'], font_size, font_color)
-        c.showPage()
+        Normal(canvas, name, company, font_size, font_color, size=size)
+
+# 注册字体（simhei.ttf只在首次使用时解析一次）
+def registerFont():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    if 'simhei' not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont('simhei', 'simhei.ttf'))
+
+# 根据选中的行，生成PDF（每张纸排列多张坐席卡，折痕线和裁切线由Imposition画出）
+def dealCSV(rows, font_size, font_color, card_size=None):
+    from reportlab.pdfgen import canvas
+    registerFont()
+    imposition = Imposition(card_size or CardSize.parse(None))
+    c = canvas.Canvas("documents/print.pdf", pagesize=imposition.pagesize)
+
+    # 在坐席卡的坐标系中画出正面和倒置的背面
+    def drawCard(c, row, w, h):
+        post = () if row.post is None else (row.post,)
+        Normal(c, row.name, row.company, font_size, font_color, *post, size=(w, h))
+        Inversion(c, row.name, row.company, font_size, font_color, *post, size=(w, h))
+
+    # 一次性测量所有行的文字宽度
+    TextFitter.get("simhei").prepare([text for row in rows for text in row[1:] if text])
+
+    imposition.render(c, rows, drawCard)
     c.save()
 
 
@@ -106,7 +92,6 @@ class PrintView(View):
     def start(self):
         """Starts a new print job."""
         # Get default print setting
-        Logger.warn('接受到了请求！')
         printer = Printer(self.api_token)
         setting = printer.get_default_setting()
         
@@ -120,14 +105,17 @@ class PrintView(View):
         # Configure payload for background task
         font_size = int(request_body['font_size'])
         font_color = str(request_body['font_color'])
-        Logger.warn('字号选择了' + str(font_size))
-        Logger.warn('颜色选择了' + str(font_color))
+        card_size = self._parse_card_size(request_body)
+
+        # 只打印选中的行（行范围、行号、列筛选）
+        rows = self._select_rows(request_body)
+        Logger.record('print_requested', font_size=font_size, font_color=font_color, card_size=card_size.name,
+                      rows=len(rows))
 
-        dealCSV("documents/zxk.csv", font_size, font_color)
-    
         storage = AppStorage(self.api_token)
 
         try:
+            dealCSV(rows, font_size, font_color, card_size)
             PrintJob.start(self.api_token, setting, 'documents/print.pdf')
         except JobError as e:
             error_type = {
@@ -140,7 +128,34 @@ class PrintView(View):
             Logger.error('打印任务不能启动的原因:"{}".'.format(error_type))
             Logger.error('Print job cannot be started by "{}".'.format(error_type))
         finally:
+            # 上传的CSV保留到下次上传，以便再次打印其他行
             storage.delete_file('documents/print.pdf')
-            storage.delete_file('documents/zxk.csv')
 
         return self.response.ok()
+
+    def _parse_card_size(self, request_body):
+        """Parses card size which is imposed on each sheet."""
+        try:
+            return CardSize.parse(request_body.get('card_size', None))
+        except ValueError as e:
+            raise BadRequestError(ErrorCode.InvalidRequest, {'error_type': str(e)})
+
+    def _select_rows(self, request_body):
+        """Selects attendee rows to print based on request parameters."""
+        try:
+            selection = RowSelection.parse(
+                row_ranges=request_body.get('row_ranges', None),
+                row_ids=request_body.get('row_ids', None),
+                filters=request_body.get('filters', None),
+            )
+        except ValueError as e:
+            raise BadRequestError(ErrorCode.InvalidRequest, {'error_type': str(e)})
+
+        try:
+            rows = Roster.load('documents/zxk.csv').select(selection)
+        except ValueError as e:
+            raise BadRequestError(ErrorCode.InvalidRequest, {'error_type': str(e)})
+        if not rows:
+            raise BadRequestError(ErrorCode.InvalidRequest, {'error_type': 'No row is selected.'})
+
+        return rows
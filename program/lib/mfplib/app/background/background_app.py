@@ -3,8 +3,11 @@
 import traceback
 
 from .comm_server import CommunicationServer
+from .journal import TaskJournal
+from .registry import allow_modules, handler_registry, task_registry
 from .worker import WorkerHost
 
+from ..storage import AppStorage
 from ...jobs.image import ImageSourceRepository
 from ...events.stream import EventStreamSubscriber as Subscriber
 from ...debug import Logger, LoggerType
@@ -13,21 +16,60 @@ from ...debug import Logger, LoggerType
 class BackgroundApp:
     """This class is background app base."""
 
-    def __init__(self, headers, worker_count=10):
+    _LOG_FLUSH_TIMEOUT = 1
+
+    def __init__(self, headers, worker_count=10, allowed_modules=None, shortest_job_first=False,
+                 min_worker_count=1, idle_timeout=60, process_count=0, journal_file=None, drain_timeout=5,
+                 log_buffer_size=1024, allow_pickle=False):
         """Initializes a new instance.
 
         Args:
             headers (dict): Key value settings which are provided by app framework.
-            worker_count (int): Background worker count. Default is 10.
+            worker_count (int): Maximum background worker count. Default is 10.
+            allowed_modules (list[str]): Modules of task and request handler classes
+                which can be requested from client side (e.g. ['tasks']).
+                Payload modules of dispatched tasks must be also listed (e.g. ['tasks', 'payloads']).
+                If None is given, only handlers in mfplib and explicitly registered classes are allowed,
+                so tasks dispatched by ``Dispatcher`` or ``ScanJobListener.create`` are rejected.
+            shortest_job_first (bool): Whether smaller tasks in a session are executed first or not.
+            min_worker_count (int): Background worker count which is kept while idle. Default is 1.
+            idle_timeout (float): Seconds after which an idle worker is stopped. Default is 60.
+            process_count (int): Process count for CPU bound tasks. Default is 0 (process pool is disabled).
+            journal_file (str): Task journal file path in app storage (e.g. 'task_journal.log').
+                If it is given, waiting tasks at stop are resumed at next start. Default is None (not journaled).
+            drain_timeout (float): Seconds to wait for running tasks to finish at stop. Default is 5.
+            log_buffer_size (int): Maximum count of logs which wait for writer thread. Default is 1024.
+                If 0 is given, logs are written synchronously on calling threads.
+            allow_pickle (bool): Whether pickle data is accepted from client side or not.
+                Set true only for legacy clients which send pickled requests. Default is False.
         """
         self._api_token = headers['X-WebAPI-AccessToken']
 
+        # Restrict requested classes
+        allow_modules(allowed_modules)
+
         # Setup logger
-        Logger.set_logger_type(LoggerType.BackgroundAppLogger)
+        Logger.set_logger_type(
+            LoggerType.BackgroundAppLogger,
+            asynchronous=log_buffer_size > 0,
+            buffer_size=log_buffer_size,
+        )
+        if not allowed_modules:
+            Logger.error(
+                'No task module is allowed, so dispatched tasks are rejected unless they are registered. '
+                'Pass task and payload modules to BackgroundApp (e.g. allowed_modules=[\'tasks\', \'payloads\']).')
 
         # Initialize worker host and communication server
-        self._worker_host = WorkerHost(worker_count)
-        self._comm_server = CommunicationServer(self._api_token)
+        self._worker_host = WorkerHost(
+            worker_count,
+            shortest_job_first=shortest_job_first,
+            min_worker_count=min_worker_count,
+            idle_timeout=idle_timeout,
+            process_count=process_count,
+        )
+        self._comm_server = CommunicationServer(self._api_token, allow_pickle)
+        self._journal_file = journal_file
+        self._drain_timeout = drain_timeout
 
         # Setup event subscriber
         self._subscriber = Subscriber()
@@ -38,6 +80,15 @@ class BackgroundApp:
         """Gets API access token."""
         return self._api_token
 
+    @property
+    def dispatch_statistics(self):
+        """Gets dispatch latency counters per handler and class resolution statistics."""
+        return {
+            'handlers': self._comm_server.statistics,
+            'handler_classes': handler_registry.statistics,
+            'task_classes': task_registry.statistics,
+        }
+
     def on_started(self):
         """This method is invoked at background app started."""
         pass
@@ -54,7 +105,10 @@ class BackgroundApp:
             repository = ImageSourceRepository(self._api_token)
             repository.switch_keep_mode(enabled=True)
 
-            # Start worker host
+            # Start worker host (waiting tasks at last stop are resumed)
+            if self._journal_file:
+                storage = AppStorage(self._api_token)
+                self._worker_host.set_journal(TaskJournal(storage.get_path(self._journal_file)))
             self._worker_host.start()
 
             # Open app communication
@@ -72,11 +126,14 @@ class BackgroundApp:
             self._comm_server.close()
 
             # Terminate worker host
-            self._worker_host.terminate()
+            self._worker_host.terminate(self._drain_timeout)
 
             self.on_stopped()
         except Exception:
             Logger.error(traceback.format_exc())
+        finally:
+            # Write waiting logs before app process exits
+            Logger.flush(self._LOG_FLUSH_TIMEOUT)
 
     def onEvent(self, strEvent):
         Logger.debug('App job event occurs.')
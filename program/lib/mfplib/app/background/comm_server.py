@@ -1,9 +1,11 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
-import pickle
-import base64
-import importlib
+import time
+import traceback
+from threading import Lock
 
+from ..comm.serializer import find_serializer
+from .registry import handler_registry
 from ...webapi import WebApi
 from ...debug import Logger
 
@@ -13,9 +15,21 @@ class CommunicationServer:
 
     _SERVER_API_URL = '/app/communication/server'
 
-    def __init__(self, api_token):
+    def __init__(self, api_token, allow_pickle=False):
+        """Initializes a new instance.
+
+        Args:
+            api_token (str): API access token.
+            allow_pickle (bool): Whether pickle data (legacy format or embedded objects) is accepted
+                from client side or not. Default is False.
+        """
         self._api = WebApi(api_token)
         self._opened = False
+        self._allow_pickle = allow_pickle
+
+        # Handler path -> (count, errors, total seconds, max seconds)
+        self._stats = {}
+        self._stats_lock = Lock()
 
     @property
     def opened(self):
@@ -44,6 +58,27 @@ class CommunicationServer:
         self._opened = False
         Logger.info('App communication is closed on server side.')
 
+    @property
+    def statistics(self):
+        """Gets dispatch latency counters per handler.
+
+        Returns:
+            dict: Handler path -> counters.
+                Counters are request count ('count'), failed count ('errors'),
+                total, average and maximum latency in milliseconds ('total_ms', 'average_ms' and 'max_ms').
+        """
+        with self._stats_lock:
+            return {
+                path: {
+                    'count': count,
+                    'errors': errors,
+                    'total_ms': total * 1000,
+                    'average_ms': total * 1000 / count,
+                    'max_ms': maximum * 1000,
+                }
+                for path, (count, errors, total, maximum) in self._stats.items()
+            }
+
     def handle_requested_data(self, request_data, client_api_token):
         """Handles a requested data via app communication.
 
@@ -52,34 +87,65 @@ class CommunicationServer:
             client_api_token (str): API access token for client session.
         Returns:
             str: Serialized response data to client.
+                Response data is serialized in the same format as request data.
+        Note:
+            If requested data is a batch of requests, the response is a list of
+            (succeeded, response data or error message) pairs in order of requests.
         """
         # Recover serialized request data
-        dump = base64.b64decode(request_data.encode('ascii'))
-        request = pickle.loads(dump)
+        serializer = find_serializer(request_data, self._allow_pickle)
+        request = serializer.loads(request_data)
+
+        if 'requests' in request:
+            # Handle all requests in batch even if some of them are failed
+            Logger.debug('%d remote requests are handled in a batch.', len(request['requests']))
+            response = []
+            for item in request['requests']:
+                try:
+                    response.append((True, self._handle(item, client_api_token)))
+                except Exception as e:
+                    Logger.error(traceback.format_exc())
+                    response.append((False, '{}: {}'.format(type(e).__name__, e)))
+        else:
+            response = self._handle(request, client_api_token)
 
-        # Specify request handler
-        handler_path = request['handler_path']
+        # Serialize response data
+        return serializer.dumps(response)
 
-        index = handler_path.rindex('.')
-        module_path = handler_path[:index]
-        class_name = handler_path[index + 1:]
-        Logger.debug('Remote request is handled by {} class in {} module.'.format(class_name, module_path))
+    def _handle(self, request, client_api_token):
+        """Invokes a request handler and counts its latency."""
+        started_at = time.perf_counter()
 
-        # Invoke request handler
-        handler_class = self._get_handler(module_path, class_name)
-        handler = handler_class(client_api_token)
-        response = handler.handle_request(request['body'])
+        # Specify request handler
+        handler_path = request['handler_path']
+        Logger.debug('Remote request is handled by %s class.', handler_path)
 
-        # Serialize response data
-        dump = pickle.dumps(response)
-        serialized = base64.b64encode(dump).decode('ascii')
+        succeeded = False
+        try:
+            # Invoke request handler
+            handler_class = self._get_handler(handler_path)
+            handler = handler_class(client_api_token)
+            response = handler.handle_request(request['body'])
 
-        return serialized
+            succeeded = True
+            return response
+        finally:
+            self._count(handler_path, time.perf_counter() - started_at, succeeded)
 
-    def _get_handler(self, module_path, class_name):
+    def _get_handler(self, handler_path):
         """Gets request handler."""
         try:
-            module = importlib.import_module(module_path)
-            return getattr(module, class_name)
-        except (ImportError, AttributeError):
-            raise RuntimeError('Requested handler {}.{} is not found.'.format(module_path, class_name))
+            return handler_registry.resolve(handler_path)
+        except RuntimeError as e:
+            raise RuntimeError('Requested handler {} is not available: {}'.format(handler_path, e))
+
+    def _count(self, handler_path, elapsed, succeeded):
+        """Updates dispatch latency counters."""
+        with self._stats_lock:
+            count, errors, total, maximum = self._stats.get(handler_path, (0, 0, 0., 0.))
+            self._stats[handler_path] = (
+                count + 1,
+                errors if succeeded else errors + 1,
+                total + elapsed,
+                max(maximum, elapsed),
+            )
@@ -0,0 +1,35 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from .handler import RequestHandler
+from ..worker import WorkerHost
+
+
+class TaskMetricsHandler(RequestHandler):
+    """This class handles a task metrics request.
+
+    Request (dict, optional):
+        recent (int): Count of recent task metrics to be returned. Default is 20.
+
+    Response (dict):
+        summary (dict): Counts and times per task class.
+        recent (list[dict]): Recent task metrics (newest last).
+        pool (dict): Worker pool state.
+    """
+
+    _DEFAULT_RECENT_COUNT = 20
+
+    def handle_request(self, request):
+        """Handles a task metrics request."""
+        host = WorkerHost._current
+        if host is None:
+            raise RuntimeError('Worker host thread is not started.')
+
+        request = request or {}
+        limit = request.get('recent', self._DEFAULT_RECENT_COUNT)
+
+        metrics = host.metrics
+        return {
+            'summary': metrics.summary(),
+            'recent': [metric.to_dict() for metric in metrics.recent(limit)],
+            'pool': host.pool_state,
+        }
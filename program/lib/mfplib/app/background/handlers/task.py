@@ -1,15 +1,19 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
 from .handler import RequestHandler
+from ..registry import task_registry
 from ..worker import WorkerHost
 
 
 class TaskHandler(RequestHandler):
-    """This class handles a task request."""
+    """This class handles a task request.
+    Only tasks of classes which are allowed by task registry are accepted.
+    """
 
     def handle_request(self, request):
         """Handles a task request."""
         task = request['task']
+        self._check_task(task)
 
         # Set attributes
         task._set_task_attributes(
@@ -20,3 +24,15 @@ class TaskHandler(RequestHandler):
 
         # Put task into queue
         WorkerHost.enqueue_task(task)
+
+    def _check_task(self, task):
+        """Checks whether task class is allowed or not."""
+        task_class = type(task)
+        class_path = '{}.{}'.format(task_class.__module__, task_class.__qualname__)
+        try:
+            allowed = task_registry.resolve(class_path) is task_class
+        except RuntimeError as e:
+            raise RuntimeError('Task class {} is not available: {}'.format(class_path, e))
+
+        if not allowed:
+            raise RuntimeError('Task class {} is not available.'.format(class_path))
@@ -1,8 +1,7 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
-import importlib
-
 from .handler import RequestHandler
+from ..registry import task_registry
 from ..worker import WorkerHost
 
 from mfplib.debug import Logger
@@ -32,15 +31,8 @@ class TaskPayloadHandler(RequestHandler):
     def _create_task(self, task_class):
         """Creates task instance."""
         try:
-            module_path, class_name = self._parse_class_path(task_class)
-            module = importlib.import_module(module_path)
-            class_type = getattr(module, class_name)
-        except (ImportError, AttributeError, ValueError):
-            raise RuntimeError('Task class {} is not found.'.format(task_class))
+            class_type = task_registry.resolve(task_class)
+        except RuntimeError as e:
+            raise RuntimeError('Task class {} is not available: {}'.format(task_class, e))
 
         return class_type()
-
-    def _parse_class_path(self, class_path):
-        """Parses class path to module path and class name (foo.Bar -> foo, Bar)."""
-        index = class_path.rindex('.')
-        return (class_path[:index], class_path[index + 1:])
@@ -0,0 +1,237 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import json
+import os
+from collections import namedtuple, OrderedDict
+from threading import Lock
+
+from ..comm.serializer import CompactSerializer
+from ...debug import Logger
+
+
+class JournalRecord(namedtuple('JournalRecord', ('entry_id', 'key', 'task', 'payload', 'size'))):
+    """This class represents a queued task which is recovered from journal.
+
+    Attributes:
+        entry_id (int): Journal entry ID.
+        key (str): Idempotency key. If task has no key, None is set.
+        task (Task): Queued task.
+        payload (TaskPayload): Task payload.
+        size (float): Estimated relative task size.
+    """
+    pass
+
+
+class TaskJournal:
+    """This class records queued tasks in an append-only file to resume them after restart.
+
+    Each line of journal file is a JSON record.
+
+    - ``{"op": "put", "id": 1, "key": "...", "data": "..."}``: Task is queued (data is serialized task).
+    - ``{"op": "done", "id": 1, "key": "..."}``: Task is completed or aborted.
+    - ``{"op": "discard", "id": 1}``: Task is not queued (e.g. session cannot be locked).
+    - ``{"op": "key", "key": "..."}``: Idempotency key of completed task (written by compaction).
+
+    Journal file is compacted when completed records increase,
+    so the file holds only waiting tasks and recent idempotency keys.
+    """
+
+    COMPACTION_THRESHOLD = 256
+    """Completed record count which triggers compaction."""
+
+    KEY_HISTORY = 1024
+    """Count of idempotency keys of completed tasks which are remembered."""
+
+    def __init__(self, file_path, sync=True):
+        """Initializes a new instance.
+
+        Args:
+            file_path (str): Journal file path (e.g. a file in app storage).
+            sync (bool): Whether each record is flushed to storage device (fsync) or not.
+        """
+        self._file_path = file_path
+        self._sync = sync
+        self._serializer = CompactSerializer()
+
+        self._file = None
+        self._lock = Lock()
+        self._next_id = 1
+
+        self._pending = OrderedDict()  # Entry ID -> (key, serialized data)
+        self._pending_keys = set()
+        self._completed_keys = OrderedDict()
+        self._completed_count = 0
+
+    @property
+    def file_path(self):
+        """Gets journal file path."""
+        return self._file_path
+
+    def open(self):
+        """Opens journal file and recovers waiting tasks.
+
+        Returns:
+            list[JournalRecord]: Waiting tasks in original order.
+        """
+        with self._lock:
+            if os.path.isfile(self._file_path):
+                self._load()
+
+            self._compact()
+
+            records = []
+            for entry_id, (key, data) in self._pending.items():
+                try:
+                    item = self._serializer.loads(data)
+                except Exception as e:
+                    Logger.error('Journal entry %s cannot be recovered: %s', entry_id, e)
+                    continue
+                records.append(JournalRecord(entry_id, key, item['task'], item['payload'], item['size']))
+
+        Logger.info('%d waiting tasks are recovered from journal.', len(records))
+        return records
+
+    def close(self):
+        """Closes journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def contains(self, key):
+        """Gets whether a task with the idempotency key is waiting or recently completed.
+
+        Args:
+            key (str): Idempotency key.
+        Returns:
+            bool: True if the key is known.
+        """
+        with self._lock:
+            return key in self._pending_keys or key in self._completed_keys
+
+    def append(self, task, payload=None, size=1, key=None):
+        """Records a queued task.
+        Idempotency key is checked and recorded atomically, so same task is recorded only once.
+
+        Args:
+            task (Task): Queued task.
+            payload (TaskPayload): Task payload.
+            size (float): Estimated relative task size.
+            key (str): Idempotency key.
+        Returns:
+            int: Journal entry ID. If a task with the key is waiting or recently completed, None is returned.
+        """
+        data = self._serializer.dumps({'task': task, 'payload': payload, 'size': size})
+
+        with self._lock:
+            if key is not None and (key in self._pending_keys or key in self._completed_keys):
+                return None
+
+            entry_id = self._next_id
+            self._next_id += 1
+
+            self._write({'op': 'put', 'id': entry_id, 'key': key, 'data': data})
+            self._pending[entry_id] = (key, data)
+            if key is not None:
+                self._pending_keys.add(key)
+
+        return entry_id
+
+    def complete(self, entry_id):
+        """Records a task is completed or aborted.
+
+        Args:
+            entry_id (int): Journal entry ID.
+        """
+        with self._lock:
+            if entry_id not in self._pending:
+                return
+
+            key, _ = self._pending.pop(entry_id)
+            self._write({'op': 'done', 'id': entry_id, 'key': key})
+            self._remember_key(key)
+
+            self._completed_count += 1
+            if self._completed_count >= self.COMPACTION_THRESHOLD:
+                self._compact()
+
+    def discard(self, entry_id):
+        """Removes a recorded task which is not queued.
+        Unlike ``complete``, idempotency key is not remembered, so same task can be requested again.
+
+        Args:
+            entry_id (int): Journal entry ID.
+        """
+        with self._lock:
+            if entry_id not in self._pending:
+                return
+
+            key, _ = self._pending.pop(entry_id)
+            self._write({'op': 'discard', 'id': entry_id})
+            self._pending_keys.discard(key)
+
+    def _load(self):
+        """Loads records in journal file (lock must be held)."""
+        with open(self._file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Last line may be broken at power loss
+                    Logger.warn('Broken journal record is skipped.')
+                    continue
+
+                op = record.get('op')
+                key = record.get('key')
+                if op == 'put':
+                    self._pending[record['id']] = (key, record['data'])
+                    self._next_id = max(self._next_id, record['id'] + 1)
+                elif op == 'done':
+                    self._pending.pop(record['id'], None)
+                    self._remember_key(key)
+                elif op == 'discard':
+                    self._pending.pop(record['id'], None)
+                elif op == 'key':
+                    self._remember_key(key)
+
+        self._pending_keys = set(key for key, _ in self._pending.values() if key is not None)
+
+    def _compact(self):
+        """Rewrites journal file with waiting tasks and recent keys only (lock must be held)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        temp_path = self._file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for key in self._completed_keys:
+                file.write(json.dumps({'op': 'key', 'key': key}) + '\n')
+            for entry_id, (key, data) in self._pending.items():
+                file.write(json.dumps({'op': 'put', 'id': entry_id, 'key': key, 'data': data}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temp_path, self._file_path)
+        self._completed_count = 0
+        Logger.debug('Task journal is compacted (%d waiting tasks).', len(self._pending))
+
+    def _write(self, record):
+        """Appends a record to journal file (lock must be held)."""
+        if self._file is None:
+            self._file = open(self._file_path, 'a', encoding='utf-8')
+
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        if self._sync:
+            os.fsync(self._file.fileno())
+
+    def _remember_key(self, key):
+        """Remembers an idempotency key of completed task (lock must be held)."""
+        if key is None:
+            return
+
+        self._pending_keys.discard(key)
+        self._completed_keys[key] = None
+        self._completed_keys.move_to_end(key)
+        while len(self._completed_keys) > self.KEY_HISTORY:
+            self._completed_keys.popitem(last=False)
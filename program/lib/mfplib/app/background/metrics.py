@@ -0,0 +1,116 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from collections import deque, namedtuple
+from enum import Enum
+from threading import Lock
+
+
+class TaskStatus(Enum):
+    """This enum represents how a task is finished."""
+    Completed = 'completed'
+    Failed = 'failed'
+    Aborted = 'aborted'
+
+
+class TaskMetric(namedtuple('TaskMetric', (
+        'task_class', 'status', 'finished_at', 'queue_wait', 'execution_time', 'lock_time'))):
+    """This class represents measured times of a finished task.
+
+    Attributes:
+        task_class (str): Task class path.
+        status (TaskStatus): Finished status.
+        finished_at (float): Unix time stamp at task finished.
+        queue_wait (float): Seconds from enqueued to started.
+        execution_time (float): Seconds of execution. If task is not started, 0 is set.
+        lock_time (float): Seconds taken to acquire session lock at enqueue.
+    """
+
+    def to_dict(self):
+        """Converts to a dictionary which can be sent via app communication."""
+        values = self._asdict()
+        values['status'] = self.status.value
+        return values
+
+
+class TaskMetrics:
+    """This class records task metrics.
+
+    Recent metrics are retained in a ring buffer, and counts and times per task class are accumulated.
+    """
+
+    CAPACITY = 512
+    """Count of recent metrics which are retained."""
+
+    def __init__(self, capacity=None):
+        """Initializes a new instance.
+
+        Args:
+            capacity (int): Count of recent metrics. Default is ``CAPACITY``.
+        """
+        self._recent = deque(maxlen=capacity or self.CAPACITY)
+        self._totals = {}  # Task class -> accumulated values
+        self._lock = Lock()
+
+    def record(self, metric):
+        """Records a task metric.
+
+        Args:
+            metric (TaskMetric): Task metric.
+        """
+        with self._lock:
+            self._recent.append(metric)
+
+            total = self._totals.get(metric.task_class, None)
+            if total is None:
+                total = self._totals[metric.task_class] = {
+                    'count': 0,
+                    'failed': 0,
+                    'aborted': 0,
+                    'queue_wait': 0.,
+                    'execution_time': 0.,
+                    'lock_time': 0.,
+                    'max_queue_wait': 0.,
+                    'max_execution_time': 0.,
+                }
+
+            total['count'] += 1
+            if metric.status is TaskStatus.Failed:
+                total['failed'] += 1
+            elif metric.status is TaskStatus.Aborted:
+                total['aborted'] += 1
+
+            for name in ('queue_wait', 'execution_time', 'lock_time'):
+                total[name] += getattr(metric, name)
+            total['max_queue_wait'] = max(total['max_queue_wait'], metric.queue_wait)
+            total['max_execution_time'] = max(total['max_execution_time'], metric.execution_time)
+
+    def summary(self):
+        """Gets accumulated counts and times per task class.
+
+        Returns:
+            dict: Task class path -> counts ('count', 'failed' and 'aborted'),
+                average seconds ('queue_wait', 'execution_time' and 'lock_time')
+                and maximum seconds ('max_queue_wait' and 'max_execution_time').
+        """
+        with self._lock:
+            summary = {}
+            for task_class, total in self._totals.items():
+                values = dict(total)
+                for name in ('queue_wait', 'execution_time', 'lock_time'):
+                    values[name] = total[name] / total['count']
+                summary[task_class] = values
+
+            return summary
+
+    def recent(self, limit=None):
+        """Gets recent task metrics.
+
+        Args:
+            limit (int): Maximum count. If None is given, all retained metrics are returned.
+        Returns:
+            list[TaskMetric]: Task metrics in finished order (newest last).
+        """
+        with self._lock:
+            metrics = list(self._recent)
+
+        return metrics if limit is None else metrics[-limit:] if limit > 0 else []
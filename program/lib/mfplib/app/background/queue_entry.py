@@ -1,65 +1,126 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
+import time
+from threading import Lock
+
 from ...debug import Logger
 from ...webapi import WebApi
 
 
 class SessionLock:
-    """This class lock home app session in background."""
+    """This class lock home app session in background.
+
+    A lock is shared by queued tasks of same session (API access token).
+    Session is locked when first task is queued and released when last task is finished,
+    so lock API is not requested for each task.
+    """
 
     _LOCK_API_URL = '/app/communication/server/lock'
 
-    def __init__(self, api_token, lock_id):
+    # API access token -> shared lock
+    _locks = {}
+    _locks_guard = Lock()
+
+    def __init__(self, api_token, lock_id=None):
         """Initializes a new instance."""
         self._api_token = api_token
         self._lock_id = lock_id
+        self._references = 0
+        self._acquire_lock = Lock()
 
     @property
     def locked(self):
         """Gets whether session is locked or not."""
         return bool(self._lock_id)
 
+    @property
+    def references(self):
+        """Gets count of tasks which share this lock."""
+        return self._references
+
     @classmethod
-    def acquire(cls, api_token):
+    def acquire(cls, api_token, lazy=False):
         """Acquires a lock to keep job session.
+        If session is already locked for other tasks, the lock is shared without lock API request.
 
         Args:
             api_token (str): API access token in home app session.
+            lazy (bool): If true is given, an existing lock is shared but session is not locked newly.
+        Returns:
+            SessionLock: Shared lock. If lazy is true and session is not locked, None is returned.
         """
-        api = WebApi(api_token)
-        response = api.post(cls._LOCK_API_URL)
-        lock_id = response['lock_id']
-
-        Logger.info('Task session is locked by ID "{}".'.format(lock_id))
-
-        return cls(api_token, lock_id)
+        with cls._locks_guard:
+            lock = cls._locks.get(api_token, None)
+            if lock is None:
+                if lazy:
+                    return None
+                lock = cls._locks[api_token] = cls(api_token)
+            lock._references += 1
+
+        try:
+            with lock._acquire_lock:
+                if not lock._lock_id:
+                    lock._lock_id = lock._request_lock()
+        except Exception:
+            lock.release()
+            raise
+
+        return lock
 
     def release(self):
-        """Releases an existing lock."""
-        if self._lock_id is None:
+        """Releases a reference. Session is unlocked when no task shares this lock."""
+        with self._locks_guard:
+            self._references -= 1
+            if self._references > 0:
+                return
+
+            if self._locks.get(self._api_token, None) is self:
+                del self._locks[self._api_token]
+
+        with self._acquire_lock:
+            lock_id, self._lock_id = self._lock_id, None
+        if lock_id is None:
             return
 
         api = WebApi(self._api_token)
-        api.delete(self._LOCK_API_URL, {'lock_id': self._lock_id})
-        Logger.info('Task session lock (ID: {}) is released.'.format(self._lock_id))
+        api.delete(self._LOCK_API_URL, {'lock_id': lock_id})
+        Logger.info('Task session lock (ID: %s) is released.', lock_id)
 
-        self._lock_id = None
+    def _request_lock(self):
+        """Requests lock API and returns a lock ID."""
+        api = WebApi(self._api_token)
+        response = api.post(self._LOCK_API_URL)
+        lock_id = response['lock_id']
+
+        Logger.info('Task session is locked by ID "%s".', lock_id)
+
+        return lock_id
 
 
 class QueueEntry:
     """This class hosts a task."""
 
-    def __init__(self, task, payload=None):
+    def __init__(self, task, payload=None, size=1, journal_id=None):
         """Initializes a new instance.
 
         Args:
             task (Task): Requested task.
             payload (TaskPayload): Task payload.
+            size (float): Estimated relative task size.
+            journal_id (int): Entry ID in task journal. If task is not journaled, None is set.
         """
         self._task = task
         self._payload = payload
+        self._size = size
+        self._journal_id = journal_id
+        self._enqueued_at = time.monotonic()
+        self._started_at = None
 
         self._lock = None
+        self._lock_time = 0.
+
+        self._finished = False
+        self._finish_lock = Lock()
 
     @property
     def task(self):
@@ -71,19 +132,79 @@ class QueueEntry:
         """Gets a task payload."""
         return self._payload
 
+    @property
+    def priority(self):
+        """Gets a task priority class."""
+        return self._task.priority
+
+    @property
+    def size(self):
+        """Gets an estimated relative task size."""
+        return self._size
+
+    @property
+    def journal_id(self):
+        """Gets an entry ID in task journal."""
+        return self._journal_id
+
+    @property
+    def enqueued_at(self):
+        """Gets monotonic clock time at entry created."""
+        return self._enqueued_at
+
+    @property
+    def started_at(self):
+        """Gets monotonic clock time at execution started. If task is not started, None is returned."""
+        return self._started_at
+
+    @property
+    def finished(self):
+        """Gets whether task is finished (completed, failed or aborted) or not."""
+        return self._finished
+
+    @property
+    def lock_time(self):
+        """Gets seconds taken to acquire session lock."""
+        return self._lock_time
+
     @property
     def locked(self):
         """Gets whether session is locked or not."""
-        return bool(self._lock)
+        return self._lock is not None
+
+    def mark_started(self):
+        """Records execution of task is started."""
+        self._started_at = time.monotonic()
 
-    def lock_session(self, api_token):
-        """Acquires a lock to keep job session."""
-        self._lock = SessionLock.acquire(api_token)
+    def finish(self):
+        """Marks task as finished.
+        Worker and worker host can finish a running task at the same time (e.g. aborted at stop),
+        so only the first caller should invoke hook methods and release resources.
+
+        Returns:
+            bool: True if task is finished by this call, False if it was already finished.
+        """
+        with self._finish_lock:
+            if self._finished:
+                return False
+            self._finished = True
+            return True
+
+    def lock_session(self, api_token, lazy=False):
+        """Acquires a lock to keep job session.
+
+        Args:
+            api_token (str): API access token in home app session.
+            lazy (bool): If true is given, session is locked only if other tasks already lock it.
+        """
+        started_at = time.perf_counter()
+        self._lock = SessionLock.acquire(api_token, lazy)
+        self._lock_time = time.perf_counter() - started_at
 
     def unlock_session(self):
         """Releases an existing lock."""
-        if not self._lock:
+        lock, self._lock = self._lock, None
+        if lock is None:
             return  # session is not locked
 
-        self._lock.release()
-        self._lock = None
+        lock.release()
@@ -0,0 +1,163 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import importlib
+from threading import Lock
+
+from ..comm.serializer import allow_import
+from ..comm.task import Task
+from .handlers.handler import RequestHandler
+from ...debug import Logger
+
+
+class ClassRegistry:
+    """This class resolves requested class paths and caches resolved classes.
+
+    A class path is imported only at first request, so later requests are resolved by a dictionary lookup.
+    Only subclasses of base class in allowed modules can be resolved.
+    """
+
+    def __init__(self, base_class, allowed_modules=None):
+        """Initializes a new instance.
+
+        Args:
+            base_class (type): Base class of resolved classes.
+            allowed_modules (list[str]): Module or class paths which can be resolved (e.g. ['tasks']).
+                Sub modules are also allowed. If None is given, all modules are allowed.
+        """
+        self._base_class = base_class
+        self._allowed_modules = None if allowed_modules is None else list(allowed_modules)
+        self._classes = {}
+        self._registered = set()
+        self._lock = Lock()
+
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def allowed_modules(self):
+        """Gets allowed module paths. None means all modules are allowed."""
+        return self._allowed_modules
+
+    @property
+    def statistics(self):
+        """Gets resolution statistics.
+
+        Returns:
+            dict: Cache hit count ('hits'), miss count ('misses') and cached class count ('classes').
+        """
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'classes': len(self._classes),
+        }
+
+    def set_allowed_modules(self, module_paths):
+        """Sets modules which can be resolved.
+        Cached classes out of new allowed modules are removed.
+
+        Args:
+            module_paths (list[str]): Module or class paths.
+                If None is given, all modules are allowed.
+        """
+        with self._lock:
+            self._allowed_modules = None if module_paths is None else list(module_paths)
+            self._classes = {
+                path: cls for path, cls in self._classes.items()
+                if path in self._registered or self._is_allowed(path)
+            }
+
+    def register(self, cls):
+        """Registers a class explicitly (it is resolved regardless of allowed modules).
+
+        Args:
+            cls (type): Class to be registered.
+        Returns:
+            type: Registered class.
+        """
+        self._check_class(cls)
+
+        class_path = cls.__module__ + '.' + cls.__qualname__
+        with self._lock:
+            self._classes[class_path] = cls
+            self._registered.add(class_path)
+
+        return cls
+
+    def resolve(self, class_path):
+        """Resolves a class path.
+
+        Args:
+            class_path (str): Class path (e.g. package.module.SomeClass).
+        Returns:
+            type: Resolved class.
+        Raises:
+            RuntimeError: Class is not found or not allowed.
+        """
+        cls = self._classes.get(class_path, None)
+        if cls is not None:
+            self._hits += 1
+            return cls
+
+        with self._lock:
+            cls = self._classes.get(class_path, None)
+            if cls is None:
+                cls = self._import(class_path)
+                self._classes[class_path] = cls
+                self._misses += 1
+                Logger.debug('Class %s is resolved and cached.', class_path)
+
+        return cls
+
+    def _import(self, class_path):
+        """Imports a class in allowed modules."""
+        if not self._is_allowed(class_path):
+            raise RuntimeError('Class {} is not allowed.'.format(class_path))
+
+        try:
+            index = class_path.rindex('.')
+            module = importlib.import_module(class_path[:index])
+            cls = getattr(module, class_path[index + 1:])
+        except (ImportError, AttributeError, ValueError):
+            raise RuntimeError('Class {} is not found.'.format(class_path))
+
+        self._check_class(cls)
+        return cls
+
+    def _is_allowed(self, class_path):
+        """Checks whether a class path is in allowed modules or not."""
+        if self._allowed_modules is None:
+            return True
+
+        return any(
+            class_path == path or class_path.startswith(path + '.')
+            for path in self._allowed_modules
+        )
+
+    def _check_class(self, cls):
+        """Checks whether a class is derived from base class or not."""
+        if not (isinstance(cls, type) and issubclass(cls, self._base_class)):
+            raise RuntimeError('{} is not a subclass of {}.'.format(cls, self._base_class.__name__))
+
+
+_MFPLIB_HANDLERS = 'mfplib.app.background.handlers'
+
+handler_registry = ClassRegistry(RequestHandler, [_MFPLIB_HANDLERS])
+"""Registry of request handler classes (only handlers in mfplib are allowed until ``allow_modules`` is called)."""
+
+task_registry = ClassRegistry(Task, [])
+"""Registry of task classes (only registered tasks are allowed until ``allow_modules`` is called)."""
+
+
+def allow_modules(module_paths):
+    """Restricts requested handler and task classes to allowed modules.
+    Handlers in mfplib are always allowed.
+    Task and payload classes in allowed modules can be also deserialized from requests.
+
+    Args:
+        module_paths (list[str]): Module or class paths (e.g. ['tasks', 'handlers']).
+            If None is given, only handlers in mfplib and explicitly registered classes are allowed.
+    """
+    module_paths = list(module_paths or [])
+    handler_registry.set_allowed_modules([_MFPLIB_HANDLERS] + module_paths)
+    task_registry.set_allowed_modules(module_paths)
+    allow_import(module_paths)
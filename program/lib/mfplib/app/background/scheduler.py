@@ -0,0 +1,179 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import heapq
+import itertools
+import time
+from queue import Empty
+from threading import Condition
+
+
+class TaskScheduler:
+    """This class orders queued tasks for workers (used in place of ``queue.Queue``).
+
+    Tasks are scheduled in below order.
+
+    - Priority class: Tasks in higher priority class are always taken first.
+    - Fair queuing: In a priority class, sessions (API access tokens) share workers by task size.
+      A session which has consumed less work is served first,
+      so a session with a large job does not block small jobs of other sessions.
+    - In a session, tasks are taken in enqueued order, or smaller tasks first if shortest job first is enabled.
+    """
+
+    def __init__(self, shortest_job_first=False):
+        """Initializes a new instance.
+
+        Args:
+            shortest_job_first (bool): Whether smaller tasks in a session are taken first or not.
+        """
+        self._shortest_job_first = shortest_job_first
+
+        self._condition = Condition()
+        self._sequence = itertools.count()
+
+        # Priority -> API access token -> heap of (order key, sequence, entry)
+        self._queues = {}
+
+        # Fair queuing: consumed work per session and virtual clock
+        self._virtual_times = {}
+        self._clock = 0.
+
+        self._count = 0
+        self._unfinished = 0
+        self._closed = False
+
+    @property
+    def shortest_job_first(self):
+        """Gets whether smaller tasks in a session are taken first or not."""
+        return self._shortest_job_first
+
+    def qsize(self):
+        """Gets waiting task count."""
+        with self._condition:
+            return self._count
+
+    def empty(self):
+        """Gets whether no task is waiting or not."""
+        return self.qsize() == 0
+
+    @property
+    def closed(self):
+        """Gets whether scheduler is closed or not."""
+        return self._closed
+
+    def close(self):
+        """Closes scheduler. Workers which wait for tasks are woken up and get no more tasks."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def drain(self):
+        """Takes all waiting entries.
+
+        Returns:
+            list[QueueEntry]: Waiting entries in scheduled order.
+        """
+        with self._condition:
+            entries = []
+            while self._count:
+                entries.append(self._take())
+                self._unfinished -= 1
+            self._condition.notify_all()
+            return entries
+
+    def put(self, entry):
+        """Puts a queue entry.
+
+        Args:
+            entry (QueueEntry): Queue entry.
+        """
+        with self._condition:
+            token = entry.task.api_token
+            sessions = self._queues.setdefault(entry.priority, {})
+
+            if not self._is_active(token):
+                # Idle session starts from current clock (no credit for idle time)
+                self._virtual_times[token] = max(self._virtual_times.get(token, 0.), self._clock)
+
+            key = entry.size if self._shortest_job_first else 0
+            heapq.heappush(sessions.setdefault(token, []), (key, next(self._sequence), entry))
+
+            self._count += 1
+            self._unfinished += 1
+            self._condition.notify()
+
+    def get(self, block=True, timeout=None):
+        """Takes a next queue entry.
+
+        Args:
+            block (bool): Whether to wait for a task or not.
+            timeout (float): Maximum seconds to wait. If None is given, waits forever.
+        Returns:
+            QueueEntry: Queue entry.
+        Raises:
+            queue.Empty: No task is queued or scheduler is closed.
+        """
+        with self._condition:
+            if not block:
+                if self._count == 0 or self._closed:
+                    raise Empty
+            elif timeout is None:
+                while self._count == 0 and not self._closed:
+                    self._condition.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while self._count == 0 and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    self._condition.wait(remaining)
+
+            if self._closed:
+                raise Empty
+
+            return self._take()
+
+    def task_done(self):
+        """Notifies that a taken task is done."""
+        with self._condition:
+            if self._unfinished <= 0:
+                raise ValueError('task_done() called too many times.')
+
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._condition.notify_all()
+
+    def join(self):
+        """Waits until all tasks are done."""
+        with self._condition:
+            while self._unfinished:
+                self._condition.wait()
+
+    def _take(self):
+        """Takes a next entry (lock must be held)."""
+        priority = min(priority for priority, sessions in self._queues.items() if sessions)
+        sessions = self._queues[priority]
+
+        # Session which consumed the least work (ties are broken by arrival order)
+        token = min(sessions, key=lambda token: (self._virtual_times[token], sessions[token][0][1]))
+        queue = sessions[token]
+        _, _, entry = heapq.heappop(queue)
+        if not queue:
+            del sessions[token]
+
+        # Charge task size to session
+        self._clock = self._virtual_times[token]
+        self._virtual_times[token] += entry.size
+        self._count -= 1
+
+        # Forget idle sessions which will restart from clock
+        for idle_token in [
+            token for token, virtual_time in self._virtual_times.items()
+            if virtual_time <= self._clock and not self._is_active(token)
+        ]:
+            del self._virtual_times[idle_token]
+
+        return entry
+
+    def _is_active(self, token):
+        """Gets whether a session has waiting tasks or not."""
+        return any(token in sessions for sessions in self._queues.values())
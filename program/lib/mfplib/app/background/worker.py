@@ -1,24 +1,45 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
+import inspect
+import itertools
+import os
+import time
 import traceback
-from threading import Thread, Event
-from queue import Queue
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
+from threading import Thread, Event, Lock
 
+from .metrics import TaskMetric, TaskMetrics, TaskStatus
 from .queue_entry import QueueEntry
+from .scheduler import TaskScheduler
+from ..comm.cancellation import TaskCancelledError
 from ...debug import Logger
 
 
+def _execute_in_process(task, payload=None):
+    """Executes a CPU bound task in a worker process."""
+    if payload is None:
+        task.execute()
+    else:
+        task.execute(payload)
+
+
 class Worker(Thread):
     """This class consumes a task in queue."""
 
-    def __init__(self, worker_id, queue):
+    def __init__(self, worker_id, host):
         super().__init__(daemon=True)
         self._worker_id = worker_id
-        self._queue = queue
+        self._host = host
+        self._queue = host._queue
 
         self._running_task_entry = None
+        self._cancellation = None
         self._terminated = False
 
+    # Task class -> whether execute method has cancellation parameter
+    _accepts_cancellation = {}
+
     @property
     def running_task_entry(self):
         return self._running_task_entry
@@ -27,40 +48,113 @@ class Worker(Thread):
         """Executes tasks in queue."""
         Logger.info('Worker {} is started.'.format(self._worker_id))
 
-        while True:
+        while not self._terminated:
             # Retrieve task from queue and execute
-            entry = self._queue.get(block=True)
+            try:
+                entry = self._queue.get(block=True, timeout=self._host.idle_timeout)
+            except Empty:
+                # Reap idle worker if pool has more workers than minimum
+                if self._host._retire(self):
+                    break
+                continue
+
             task = entry.task
             payload = entry.payload
             self._running_task_entry = entry
+            self._host._set_busy(self, True)
+
+            entry.mark_started()
+            status, error = self._execute_task(task, payload)
+
+            # Task which does not stop in time is already aborted by worker host
+            if entry.finish():
+                if status is TaskStatus.Aborted:
+                    self._host._invoke_on_aborted(task)
+                elif status is TaskStatus.Failed:
+                    self._invoke_on_error(task, error)
+                self._host._record_metric(entry, status, entry.started_at)
+                self._host._complete(entry)
+
+                # Release session
+                entry.unlock_session()
+            else:
+                Logger.info('Task of worker %s is finished after aborted.', self._worker_id)
 
-            self._execute_task(task, payload)
             self._queue.task_done()
-
-            # Abort thread if worker is terminated
-            if self._terminated:
-                break
-
-            # Release session
-            entry.unlock_session()
+            self._host._set_busy(self, False)
             self._running_task_entry = None
 
         Logger.info('Worker {} is terminated.'.format(self._worker_id))
 
     def _execute_task(self, task, payload=None):
-        """Executes a task."""
+        """Executes a task.
+
+        Returns:
+            tuple[TaskStatus, Exception]: Finished status and error (None unless task failed).
+        """
         try:
-            Logger.warn('Worker {} tries to execute a task.'.format(self._worker_id))
+            Logger.warn('Worker %s tries to execute a task.', self._worker_id)
 
-            if payload is None:
-                task.execute()
+            process_pool = self._host._get_process_pool() if getattr(task, 'cpu_bound', False) else None
+            if process_pool is not None:
+                # Run CPU bound task in a process to avoid blocking other workers by GIL
+                # (cancellation token is not available in a process)
+                process_pool.submit(_execute_in_process, task, payload).result()
             else:
-                task.execute(payload)
+                self._execute_in_thread(task, payload)
 
-            Logger.warn('Task is done by worker {}.'.format(self._worker_id))
+            Logger.warn('Task is done by worker %s.', self._worker_id)
+            return TaskStatus.Completed, None
+        except TaskCancelledError:
+            Logger.warn('Task is cancelled at checkpoint in worker %s.', self._worker_id)
+            return TaskStatus.Aborted, None
         except Exception as e:
             Logger.error(traceback.format_exc())
-            self._invoke_on_error(task, e)
+            return TaskStatus.Failed, e
+
+    def _execute_in_thread(self, task, payload=None):
+        """Executes a task with cancellation token on this thread."""
+        kwargs = {}
+        self._cancellation = task._start_execution()
+        if self._accepts_cancellation_token(task):
+            kwargs['cancellation'] = self._cancellation
+
+        started_at = time.perf_counter()
+        cpu_started_at = time.thread_time()
+        try:
+            if payload is None:
+                task.execute(**kwargs)
+            else:
+                task.execute(payload, **kwargs)
+        finally:
+            self._cancellation = None
+            task._end_execution()
+
+        self._host._record_load(time.thread_time() - cpu_started_at, time.perf_counter() - started_at)
+
+    @classmethod
+    def _accepts_cancellation_token(cls, task):
+        """Gets whether execute method of a task has cancellation parameter or not (cached per class)."""
+        task_class = type(task)
+        accepts = cls._accepts_cancellation.get(task_class, None)
+        if accepts is None:
+            try:
+                accepts = 'cancellation' in inspect.signature(task.execute).parameters
+            except (TypeError, ValueError):
+                accepts = False
+            cls._accepts_cancellation[task_class] = accepts
+
+        return accepts
+
+    def cancel(self, reason=None):
+        """Requests running task to stop at next checkpoint.
+
+        Args:
+            reason (str): Cancellation reason.
+        """
+        cancellation = self._cancellation
+        if cancellation is not None:
+            cancellation.cancel(reason)
 
     def _invoke_on_error(self, task, error):
         """Invokes on_error method for task."""
@@ -70,30 +164,139 @@ class Worker(Thread):
             Logger.error(traceback.format_exc())
 
     def terminate(self):
-        """Terminates running worker."""
+        """Terminates running worker after current task."""
         self._terminated = True
 
 
 class WorkerHost(Thread):
-    """This class hosts worker threads."""
+    """This class hosts worker threads.
+
+    Worker threads are started on demand by queue depth up to maximum worker count,
+    and workers which are idle for ``idle_timeout`` seconds are reaped down to minimum worker count.
+    While executed tasks are CPU bound, worker threads do not grow beyond CPU count
+    because more threads do not increase throughput.
+    Tasks which ``cpu_bound`` attribute is true are executed in a process pool if it is enabled.
+
+    If task journal is set, queued tasks are recorded and waiting tasks at stop are resumed at next start.
+
+    Queue wait, execution and session lock times of finished tasks are recorded in ``metrics``.
+    """
+
+    CANCEL_TIMEOUT = 1
+    """Seconds to wait for running tasks to stop at checkpoint after cancellation."""
+
+    CPU_BOUND_RATIO = 0.5
+    """CPU time / execution time ratio above which tasks are regarded as CPU bound."""
+
+    _LOAD_SMOOTHING = 0.2
 
     _current = None
 
-    def __init__(self, worker_count):
+    def __init__(self, worker_count, shortest_job_first=False, min_worker_count=1, idle_timeout=60,
+                 process_count=0):
+        """Initializes a new instance.
+
+        Args:
+            worker_count (int): Maximum worker thread count.
+            shortest_job_first (bool): Whether smaller tasks in a session are executed first or not.
+            min_worker_count (int): Worker thread count which is kept while idle.
+            idle_timeout (float): Seconds after which an idle worker thread is reaped.
+            process_count (int): Process count for CPU bound tasks. If 0 is given, process pool is disabled.
+        """
         super().__init__(daemon=False)
         self._terminate_event = Event()
-        self._queue = Queue()
+        self._queue = TaskScheduler(shortest_job_first)
         self._workers = []
+        self._busy_workers = set()
+        self._workers_lock = Lock()
+        self._worker_ids = itertools.count(1)
 
         self._worker_count = worker_count
+        self._min_worker_count = min(min_worker_count, worker_count)
+        self._idle_timeout = idle_timeout
+
+        self._process_count = process_count
+        self._process_pool = None
+
+        # Smoothed CPU time / execution time ratio of tasks
+        self._cpu_ratio = 0.
+
+        self._journal = None
+        self._resumed_records = []
+
+        self._metrics = TaskMetrics()
 
     @property
     def worker_count(self):
-        """Gets worker count."""
+        """Gets maximum worker count."""
         return self._worker_count
 
+    @property
+    def min_worker_count(self):
+        """Gets worker count which is kept while idle."""
+        return self._min_worker_count
+
+    @property
+    def idle_timeout(self):
+        """Gets seconds after which an idle worker is reaped."""
+        return self._idle_timeout
+
+    @property
+    def running_worker_count(self):
+        """Gets running worker count."""
+        with self._workers_lock:
+            return len(self._workers)
+
+    @property
+    def cpu_ratio(self):
+        """Gets smoothed CPU time / execution time ratio of executed tasks."""
+        return self._cpu_ratio
+
+    @property
+    def metrics(self):
+        """Gets task metrics."""
+        return self._metrics
+
+    @property
+    def pool_state(self):
+        """Gets worker pool state.
+
+        Returns:
+            dict: Worker counts ('workers', 'busy_workers' and 'max_workers'),
+                waiting task count ('waiting_tasks') and CPU time ratio ('cpu_ratio').
+        """
+        with self._workers_lock:
+            workers = len(self._workers)
+            busy_workers = len(self._busy_workers)
+
+        return {
+            'workers': workers,
+            'busy_workers': busy_workers,
+            'max_workers': self._worker_count,
+            'waiting_tasks': self._queue.qsize(),
+            'cpu_ratio': self._cpu_ratio,
+        }
+
+    @property
+    def journal(self):
+        """Gets task journal. If tasks are not journaled, None is returned."""
+        return self._journal
+
+    def set_journal(self, journal):
+        """Sets task journal to resume waiting tasks after restart.
+        This method must be called before this thread is started.
+
+        Args:
+            journal (TaskJournal): Task journal.
+        """
+        self._journal = journal
+
     def start(self):
         """Starts this thread."""
+        # Recover waiting tasks before new tasks are journaled
+        if self._journal is not None:
+            self._resumed_records = self._journal.open()
+
         WorkerHost._current = self
         super().start()
 
@@ -102,11 +305,13 @@ class WorkerHost(Thread):
         try:
             Logger.info('Worker host thread is started.')
 
-            # Start worker threads
-            for counter in range(self._worker_count):
-                worker = Worker(counter + 1, self._queue)
-                self._workers.append(worker)
-                worker.start()
+            # Start minimum worker threads (others are started on demand)
+            with self._workers_lock:
+                for _ in range(self._min_worker_count):
+                    self._start_worker()
+
+            # Resume tasks which were waiting at last stop
+            self._resume_tasks()
 
             # Wait for app terminated
             self._terminate_event.wait()
@@ -114,38 +319,81 @@ class WorkerHost(Thread):
         except Exception:
             Logger.error(traceback.format_exc())
 
-    def terminate(self):
-        """Terminates worker hosting thread."""
-        # Terminate all workers
-        for worker in self._workers:
+    def terminate(self, drain_timeout=0):
+        """Terminates worker hosting thread.
+
+        Waiting tasks are aborted (or kept in journal) immediately.
+        Running tasks can finish in drain timeout, then they are requested to stop by cancellation token
+        and tasks which do not stop in ``CANCEL_TIMEOUT`` seconds are aborted.
+
+        Args:
+            drain_timeout (float): Seconds to wait for running tasks to finish. Default is 0.
+        """
+        # Terminate all workers and stop dispatching tasks
+        with self._workers_lock:
+            workers = list(self._workers)
+        for worker in workers:
             worker.terminate()
+        self._queue.close()
 
-        # Abort running or waiting tasks
-        self._abort_tasks()
+        # Abort waiting tasks
+        self._abort_tasks(self._queue.drain())
 
-        # Kill running thread
-        self._terminate_event.set()
+        # Drain running tasks until deadline
+        deadline = time.monotonic() + drain_timeout
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+        # Request running tasks to stop at checkpoint
+        running_workers = [worker for worker in workers if worker.running_task_entry]
+        if running_workers:
+            Logger.warn('%d running tasks are requested to stop.', len(running_workers))
+            for worker in running_workers:
+                worker.cancel('shutdown')
 
-    def _abort_tasks(self):
-        """Abort running or waiting tasks."""
-        # Get running task entries
-        entries = [
+            deadline = time.monotonic() + self.CANCEL_TIMEOUT
+            for worker in running_workers:
+                worker.join(max(deadline - time.monotonic(), 0))
+
+        # Abort tasks which are still running
+        self._abort_tasks([
             worker.running_task_entry
-            for worker in self._workers if worker.running_task_entry
-        ]
+            for worker in running_workers if worker.running_task_entry
+        ], running=True)
+
+        if self._journal is not None:
+            self._journal.close()
 
-        # Get waiting task entries
-        while not self._queue.empty():
-            entries.append(self._queue.get())
+        # Stop process pool
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+
+        # Kill running thread
+        self._terminate_event.set()
+
+    def _abort_tasks(self, entries, running=False):
+        """Abort running or waiting tasks.
+        If tasks are journaled, waiting tasks are kept in journal to be resumed instead of aborted.
+        """
+        if not running:
+            for entry in [entry for entry in entries if entry.journal_id is not None]:
+                entries.remove(entry)
+                entry.unlock_session()
+                Logger.info('Waiting task is kept in journal (ID: %s).', entry.journal_id)
 
         # Sort by start timestamp
         entries = sorted(entries, key=lambda x: x.task.dispatched_at)
 
         Logger.warn('{} tasks are not completed at background app stopped.'.format(len(entries)))
 
-        # Abort task
+        # Abort task (unless worker finishes it meanwhile)
         for entry in entries:
+            if not entry.finish():
+                continue
+
             self._invoke_on_aborted(entry.task)
+            self._record_metric(entry, TaskStatus.Aborted, entry.started_at)
+            self._complete(entry)
             entry.unlock_session()
 
     def _invoke_on_aborted(self, task):
@@ -160,17 +408,169 @@ class WorkerHost(Thread):
         """Puts a task into queue."""
         host = cls._current
 
-        if host is None:
+        if host is None or host._queue.closed:
             raise RuntimeError('Worker host thread is not started.')
 
+        # Skip same work which is waiting or already done
+        journal = host._journal
+        key = task.idempotency_key
+        if journal is not None and key is not None and journal.contains(key):
+            Logger.warn('Task is not enqueued because same task is already requested (key: %s).', key)
+            return
+
         # Invoke hook method
         task.on_enqueued(payload)
 
-        # Create queue entry
-        entry = QueueEntry(task, payload)
-
-        # Lock app session
-        entry.lock_session(task.api_token)
+        # Create queue entry (key is checked again atomically with recording)
+        size = cls._estimate_size(task, payload)
+        journal_id = None
+        if journal is not None:
+            journal_id = journal.append(task, payload, size, key)
+            if journal_id is None:
+                Logger.warn('Task is not enqueued because same task is already requested (key: %s).', key)
+                return
+        entry = QueueEntry(task, payload, size, journal_id)
+
+        # Lock app session (shared by queued tasks of same session)
+        try:
+            entry.lock_session(task.api_token, task.lazy_session_lock)
+        except Exception:
+            # Forget the task without its key, so that it can be requested again
+            host._discard(entry)
+            raise
 
         # Enqueue
         host._queue.put(entry)
+        host._grow()
+
+    def _resume_tasks(self):
+        """Enqueues tasks which are recovered from journal."""
+        records, self._resumed_records = self._resumed_records, []
+        for record in records:
+            entry = QueueEntry(record.task, record.payload, record.size, record.entry_id)
+
+            # Session at last stop may be expired
+            try:
+                entry.lock_session(record.task.api_token)
+            except Exception:
+                Logger.warn('Session of resumed task (ID: %s) cannot be locked.', record.entry_id)
+
+            self._queue.put(entry)
+            self._grow()
+
+    def _record_metric(self, entry, status, started_at=None):
+        """Records metric of a finished task.
+
+        Args:
+            entry (QueueEntry): Queue entry.
+            status (TaskStatus): Finished status.
+            started_at (float): Monotonic clock time at execution started. If task is not started, None is given.
+        """
+        now = time.monotonic()
+        task_class = type(entry.task)
+        try:
+            self._metrics.record(TaskMetric(
+                task_class='{}.{}'.format(task_class.__module__, task_class.__qualname__),
+                status=status,
+                finished_at=time.time(),
+                queue_wait=(now if started_at is None else started_at) - entry.enqueued_at,
+                execution_time=0. if started_at is None else now - started_at,
+                lock_time=entry.lock_time,
+            ))
+        except Exception:
+            Logger.error(traceback.format_exc())
+
+    def _complete(self, entry):
+        """Records a task is completed in journal."""
+        if self._journal is None or entry.journal_id is None:
+            return
+
+        try:
+            self._journal.complete(entry.journal_id)
+        except Exception:
+            Logger.error(traceback.format_exc())
+
+    def _discard(self, entry):
+        """Removes a task which is not queued from journal."""
+        if self._journal is None or entry.journal_id is None:
+            return
+
+        try:
+            self._journal.discard(entry.journal_id)
+        except Exception:
+            Logger.error(traceback.format_exc())
+
+    @classmethod
+    def _estimate_size(cls, task, payload):
+        """Estimates task size for scheduling."""
+        try:
+            size = task.estimate_size(payload)
+            return size if size and size > 0 else 1
+        except Exception:
+            Logger.error(traceback.format_exc())
+            return 1
+
+    def _grow(self):
+        """Starts workers if queued tasks are more than idle workers."""
+        if self._terminate_event.is_set():
+            return
+
+        limit = self._worker_count
+        if self._cpu_ratio > self.CPU_BOUND_RATIO:
+            # More threads do not help CPU bound tasks
+            limit = max(min(limit, os.cpu_count() or 1), self._min_worker_count)
+
+        with self._workers_lock:
+            idle = len(self._workers) - len(self._busy_workers)
+            count = min(self._queue.qsize() - idle, limit - len(self._workers))
+            for _ in range(count):
+                self._start_worker()
+
+    def _start_worker(self):
+        """Starts a worker thread (workers lock must be held)."""
+        worker = Worker(next(self._worker_ids), self)
+        self._workers.append(worker)
+        worker.start()
+        Logger.debug('Worker pool size is %d.', len(self._workers))
+
+    def _retire(self, worker):
+        """Removes an idle worker from pool if pool has more workers than minimum.
+        The worker is removed under workers lock before it stops, so ``_grow`` never counts it as idle.
+        If a task is queued meanwhile, the worker is kept because ``_grow`` may have counted it.
+
+        Returns:
+            bool: Whether the worker should stop or not.
+        """
+        with self._workers_lock:
+            if len(self._workers) <= self._min_worker_count or self._queue.qsize() > 0:
+                return False
+
+            self._workers.remove(worker)
+            Logger.debug('Idle worker is reaped (pool size: %d).', len(self._workers))
+            return True
+
+    def _set_busy(self, worker, busy):
+        """Marks a worker as busy or idle."""
+        with self._workers_lock:
+            if busy:
+                self._busy_workers.add(worker)
+            else:
+                self._busy_workers.discard(worker)
+
+    def _record_load(self, cpu_time, elapsed):
+        """Records CPU time / execution time ratio of an executed task."""
+        if elapsed <= 0:
+            return
+
+        ratio = min(cpu_time / elapsed, 1.)
+        self._cpu_ratio += (ratio - self._cpu_ratio) * self._LOAD_SMOOTHING
+
+    def _get_process_pool(self):
+        """Gets process pool for CPU bound tasks. If disabled, None is returned."""
+        if self._process_count <= 0:
+            return None
+
+        with self._workers_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self._process_count)
+            return self._process_pool
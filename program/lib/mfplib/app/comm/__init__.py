@@ -1,13 +1,32 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
-from .client import CommunicationClient, CommunicationError
-from .task import Task
+from .client import CommunicationClient, CommunicationError, RemoteRequestError
+from .task import Task, TaskPriority
 from .dispatcher import TaskPayload, Dispatcher
+from .cancellation import CancellationToken, TaskCancelledError
+from .serializer import (
+    Serializer,
+    PickleSerializer,
+    CompactSerializer,
+    SerializationError,
+    register,
+    allow_import,
+)
 
 __all__ = [
     'CommunicationClient',
     'CommunicationError',
+    'RemoteRequestError',
     'Task',
+    'TaskPriority',
     'TaskPayload',
     'Dispatcher',
+    'CancellationToken',
+    'TaskCancelledError',
+    'Serializer',
+    'PickleSerializer',
+    'CompactSerializer',
+    'SerializationError',
+    'register',
+    'allow_import',
 ]
@@ -0,0 +1,83 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from threading import Event, Lock
+
+
+class TaskCancelledError(Exception):
+    """This class represents a task is stopped by cancellation request."""
+    pass
+
+
+class CancellationToken:
+    """This class notifies a running task that it should stop (cooperative cancellation).
+
+    Background app cancels tokens of running tasks at stop.
+    A task checks the token at safe points (e.g. between pages) and stops by itself.
+    """
+
+    def __init__(self):
+        """Initializes a new instance."""
+        self._event = Event()
+        self._reason = None
+        self._callbacks = []
+        self._lock = Lock()
+
+    @property
+    def cancelled(self):
+        """Gets whether cancellation is requested or not."""
+        return self._event.is_set()
+
+    @property
+    def reason(self):
+        """Gets a cancellation reason."""
+        return self._reason
+
+    def cancel(self, reason=None):
+        """Requests cancellation.
+
+        Args:
+            reason (str): Cancellation reason (e.g. 'shutdown').
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+
+            self._reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            callback(self)
+
+    def raise_if_cancelled(self):
+        """Raises an error if cancellation is requested.
+
+        Raises:
+            TaskCancelledError: Cancellation is requested.
+        """
+        if self._event.is_set():
+            raise TaskCancelledError('Task is cancelled ({}).'.format(self._reason))
+
+    def wait(self, timeout=None):
+        """Waits for cancellation (e.g. instead of sleep while polling device status).
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+        Returns:
+            bool: Whether cancellation is requested or not.
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """Adds a function which is invoked at cancellation (e.g. to cancel a device job).
+        If cancellation is already requested, the function is invoked immediately.
+
+        Args:
+            callback (callable): Function which is invoked as ``callback(token)``.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+
+        callback(self)
@@ -1,10 +1,11 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
 import itertools
-import pickle
-import base64
+from concurrent.futures import Future, ThreadPoolExecutor
 from threading import Lock
 
+from . import session
+from .serializer import CompactSerializer, find_serializer
 from ...webapi import WebApi, WebApiError
 from ...debug import Logger
 
@@ -14,6 +15,20 @@ class CommunicationError(Exception):
     pass
 
 
+class RemoteRequestError(CommunicationError):
+    """This class represents an error of a request which is failed in background app."""
+
+    def __init__(self, handler_path, message):
+        """Initializes a new instance.
+
+        Args:
+            handler_path (str): Handler class path of failed request.
+            message (str): Error message in background app.
+        """
+        super().__init__('Request to {} is failed: {}'.format(handler_path, message))
+        self.handler_path = handler_path
+
+
 class CommunicationClient:
     """This class manages app communication on client side."""
 
@@ -21,14 +36,24 @@ class CommunicationClient:
     _CONNECTION_API_URL = '/app/communication/client/{}'
 
     _RETRY_COUNT = 1
+    _SUBMIT_WORKERS = 2
 
     _lock = Lock()
     _singleton = None
+    _serializer = CompactSerializer(allow_pickle=False)
+
+    _executor = None
+    _executor_lock = Lock()
 
     def __init__(self, api_token, connection_id):
         self._api_token = api_token
         self._connection_id = connection_id
 
+        # Submitted requests which are not sent yet
+        self._pending = []
+        self._pending_lock = Lock()
+        self._sending = False
+
     @classmethod
     def connect(cls, api_token, refresh=False):
         """Connects to background app.
@@ -53,6 +78,10 @@ class CommunicationClient:
                 Logger.info('Existing connection is used for app communication.')
                 return client
 
+            # Session is changed, so cached information of previous session is not used any more
+            if client and client._api_token != api_token:
+                session.invalidate(client._api_token)
+
             # Open new connection
             connection_id = cls._establish_connection(api_token)
             client = cls(api_token, connection_id)
@@ -63,6 +92,16 @@ class CommunicationClient:
         finally:
             cls._lock.release()
 
+    @classmethod
+    def set_serializer(cls, serializer):
+        """Sets a serializer for request data.
+        Response data is deserialized in the same format as request data.
+
+        Args:
+            serializer (Serializer): Serializer (e.g. PickleSerializer for legacy background app).
+        """
+        cls._serializer = serializer
+
     def request(self, handler_path, body=None):
         """Sends a request to background app via established connection.
 
@@ -76,17 +115,115 @@ class CommunicationClient:
         Note:
             Request body can include an object but the object must be serializable.
         """
-        api = WebApi(self._api_token)
+        return self._send(self._build_message(handler_path, body))
+
+    def request_batch(self, requests, return_exceptions=False):
+        """Sends multiple requests to background app in one round trip.
+
+        Args:
+            requests (list[tuple[str, object]]): Pairs of handler class path and request body.
+            return_exceptions (bool): If true is given, failed requests are returned as RemoteRequestError objects
+                instead of raising the first error.
+        Returns:
+            list[object]: Response data in order of requests.
+        Raises:
+            CommunicationError: Background app is not started or does not open connection.
+            RemoteRequestError: A request is failed in background app.
+        """
+        results = self._send_batch(requests)
 
-        # Build message object
-        request = {
+        responses = []
+        for index, (succeeded, value) in enumerate(results):
+            if not succeeded:
+                value = RemoteRequestError(requests[index][0], value)
+                if not return_exceptions:
+                    raise value
+            responses.append(value)
+
+        return responses
+
+    def submit(self, handler_path, body=None):
+        """Submits a request to background app without waiting for response.
+        Requests which are submitted while previous requests are being sent
+        are sent together in next round trip.
+
+        Args:
+            handler_path (str): Handler class path (e.g. package.SomeHandler).
+            body (object): Request body.
+        Returns:
+            concurrent.futures.Future: Future of response data.
+                CommunicationError or RemoteRequestError is set if the request is failed.
+        """
+        future = Future()
+
+        with self._pending_lock:
+            self._pending.append((handler_path, body, future))
+            if not self._sending:
+                self._sending = True
+                self._get_executor().submit(self._flush_pending)
+
+        return future
+
+    def _flush_pending(self):
+        """Sends submitted requests in batches until no request is pending."""
+        finished = False
+        try:
+            while True:
+                with self._pending_lock:
+                    pending, self._pending = self._pending, []
+                    if not pending:
+                        self._sending = False
+                        finished = True
+                        return
+
+                requests = [(handler_path, body) for handler_path, body, _ in pending]
+                try:
+                    results = self._send_batch(requests)
+                except Exception as e:
+                    for _, _, future in pending:
+                        future.set_exception(e)
+                    continue
+
+                Logger.debug('%d submitted requests are sent in a batch.', len(pending))
+                for (handler_path, _, future), (succeeded, value) in zip(pending, results):
+                    if succeeded:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(RemoteRequestError(handler_path, value))
+        finally:
+            if not finished:
+                # Let next submission start sending again after unexpected error
+                with self._pending_lock:
+                    self._sending = False
+
+    @classmethod
+    def _get_executor(cls):
+        """Gets a thread pool which sends submitted requests."""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls._SUBMIT_WORKERS)
+            return cls._executor
+
+    def _send_batch(self, requests):
+        """Sends a batch message and gets (succeeded, response or error message) pairs."""
+        message = {
+            'requests': [self._build_message(handler_path, body) for handler_path, body in requests],
+        }
+        return self._send(message)
+
+    def _build_message(self, handler_path, body):
+        """Builds a request message."""
+        return {
             'handler_path': handler_path,
             'body': {} if body is None else body,
         }
 
+    def _send(self, message):
+        """Sends a message and receives response data."""
+        api = WebApi(self._api_token)
+
         # Serializes message
-        dump = pickle.dumps(request)
-        serialized = base64.b64encode(dump).decode('ascii')
+        serialized = self._serializer.dumps(message)
 
         # Send data
         counter = itertools.count(0)
@@ -117,8 +254,7 @@ class CommunicationClient:
 
         # Recover serialized response data
         serialized = response['data']
-        dump = base64.b64decode(serialized.encode('ascii'))
-        response = pickle.loads(dump)
+        response = find_serializer(serialized).loads(serialized)
 
         return response
 
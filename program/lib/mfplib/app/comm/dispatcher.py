@@ -4,20 +4,37 @@ from datetime import datetime
 
 from . import session
 from .client import CommunicationClient
+from .serializer import register
 
 
+@register
 class TaskPayload:
-    """This class contains payload for background task."""
+    """This class contains payload for background task.
+
+    Payload attributes are transferred to background app in compact format (see ``serializer``).
+    Attribute values must be None, bool, int, float, str, bytes, list, tuple (namedtuple is received as tuple),
+    dict, set, frozenset, datetime, date, Enum members or objects of registered classes
+    (Task and TaskPayload subclasses or classes decorated by ``register``).
+    Other values raise SerializationError at dispatch.
+    """
 
     def __init__(self, **kwargs):
         """Initializes a new instance."""
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def __init_subclass__(cls, **kwargs):
+        """Registers a payload class to be serialized in compact format."""
+        super().__init_subclass__(**kwargs)
+        register(cls)
+
 
 class Dispatcher:
     """This class dispatches tasks to background app."""
 
+    _HANDLER_PATH = 'mfplib.app.background.handlers.task_payload.TaskPayloadHandler'
+    _METRICS_HANDLER_PATH = 'mfplib.app.background.handlers.metrics.TaskMetricsHandler'
+
     def __init__(self, api_token):
         """Initializes a new instance.
 
@@ -31,20 +48,69 @@ class Dispatcher:
 
         Args:
             task_class (str): Related task class path (e.g. tasks.upload.UploadTask).
-                Task class must be implemented under 'lib' or 'backgroundapp' directory.
+                Task class must be implemented under 'lib' or 'backgroundapp' directory,
+                and its module must be listed in ``BackgroundApp(allowed_modules=...)`` (e.g. ['tasks']).
             payload (TaskPayload): Task payload.
                 If payload class is inherited from TaskPayload class,
-                the super class must be implemented under 'lib' directory.
+                the super class must be implemented under 'lib' directory,
+                and its module must be also listed in ``allowed_modules`` (e.g. ['tasks', 'payloads']).
         Raises:
             CommunicationError: Background app is not started or does not open connection.
         """
         client = CommunicationClient.connect(self._api_token)
         client.request(
-            handler_path='mfplib.app.background.handlers.task_payload.TaskPayloadHandler',
-            body={
-                'task_class': task_class,
-                'dispatched_at': datetime.now().timestamp(),
-                'locale': session.get_locale(self._api_token),
-                'payload': payload,
-            },
+            handler_path=self._HANDLER_PATH,
+            body=self._build_body(task_class, payload),
+        )
+
+    def dispatch_batch(self, task_class, payloads, wait=True):
+        """Dispatches payloads of tasks in one round trip (e.g. one task per CSV shard).
+
+        Args:
+            task_class (str): Related task class path (e.g. tasks.upload.UploadTask).
+            payloads (list[TaskPayload]): Task payloads. One task is executed per payload.
+            wait (bool): If false is given, this method returns without waiting for background app.
+        Returns:
+            list[concurrent.futures.Future]: Futures of dispatched tasks if wait is False, otherwise None.
+        Raises:
+            CommunicationError: Background app is not started or does not open connection.
+            RemoteRequestError: A task cannot be enqueued in background app.
+        """
+        client = CommunicationClient.connect(self._api_token)
+
+        if not wait:
+            return [
+                client.submit(self._HANDLER_PATH, self._build_body(task_class, payload))
+                for payload in payloads
+            ]
+
+        client.request_batch([
+            (self._HANDLER_PATH, self._build_body(task_class, payload))
+            for payload in payloads
+        ])
+
+    def get_task_metrics(self, recent=20):
+        """Gets task metrics of background app worker pool.
+
+        Args:
+            recent (int): Count of recent task metrics to be returned.
+        Returns:
+            dict: Counts and times per task class ('summary'), recent task metrics ('recent')
+                and worker pool state ('pool').
+        Raises:
+            CommunicationError: Background app is not started or does not open connection.
+        """
+        client = CommunicationClient.connect(self._api_token)
+        return client.request(
+            handler_path=self._METRICS_HANDLER_PATH,
+            body={'recent': recent},
         )
+
+    def _build_body(self, task_class, payload):
+        """Builds a task payload request body."""
+        return {
+            'task_class': task_class,
+            'dispatched_at': datetime.now().timestamp(),
+            'locale': session.get_locale(self._api_token),
+            'payload': payload,
+        }
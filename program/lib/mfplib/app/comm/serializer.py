@@ -0,0 +1,593 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+"""This module implements serializers for app communication data.
+
+App communication API carries a text in JSON body, so each serializer converts an object to a text.
+
+- ``PickleSerializer``: Legacy format (pickle + base64).
+- ``CompactSerializer``: Schema based binary format (msgpack style) + optional zlib compression + base64.
+
+Compact format can encode None, bool, int, float, str, bytes, list, tuple (including namedtuple, decoded as tuple),
+dict, set, frozenset, datetime, date, Enum members and objects of registered classes.
+``Task`` and ``TaskPayload`` subclasses are registered automatically.
+Objects of other classes are embedded as pickle data unless pickle is disallowed
+(communication client disallows it, so such objects raise ``SerializationError`` at serialization).
+
+At deserialization, a module is imported only if the class path is registered
+or it is in importable modules (see ``allow_import``), so received data cannot import arbitrary modules.
+"""
+
+import base64
+import binascii
+import importlib
+import pickle
+import struct
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from threading import Lock
+
+
+class SerializationError(ValueError):
+    """This class represents an error while serializing or deserializing communication data."""
+    pass
+
+
+class Serializer:
+    """This class is an abstract serializer for app communication data."""
+
+    def dumps(self, obj):
+        """Serializes an object to a text.
+
+        Args:
+            obj (object): Object to be serialized.
+        Returns:
+            str: Serialized text.
+        """
+        raise NotImplementedError('dumps method is not implemented.')
+
+    def loads(self, text):
+        """Deserializes an object from a text.
+
+        Args:
+            text (str): Serialized text.
+        Returns:
+            object: Deserialized object.
+        """
+        raise NotImplementedError('loads method is not implemented.')
+
+    def accepts(self, text):
+        """Gets whether a text is serialized by this serializer or not."""
+        raise NotImplementedError('accepts method is not implemented.')
+
+
+class PickleSerializer(Serializer):
+    """This class serializes data by pickle and base64 (legacy format)."""
+
+    def dumps(self, obj):
+        dump = pickle.dumps(obj)
+        return base64.b64encode(dump).decode('ascii')
+
+    def loads(self, text):
+        dump = base64.b64decode(text.encode('ascii'))
+        return pickle.loads(dump)
+
+    def accepts(self, text):
+        # Pickle data (protocol 2 or later) starts with 0x80 which is 'gA' in base64
+        return text.startswith('gA')
+
+
+# Registered classes (class path -> field names or None)
+# If field names are None, instance dictionary is serialized as is.
+_schemas = {}
+_schemas_lock = Lock()
+
+# Modules which can be imported at deserialization to register their classes
+_importable_modules = ('mfplib',)
+
+
+def register(cls=None, fields=None, path=None):
+    """Registers a class which objects are serialized in compact format.
+    This function can be used as a class decorator.
+
+    Args:
+        cls (type): Class to be registered.
+        fields (list[str]): Attribute names in serialized order.
+            Attribute names are not transferred if they are specified.
+            If None is given, all instance attributes are transferred with their names.
+        path (str): Class path (e.g. package.module.Class) to be registered without importing the module.
+    Returns:
+        type: Registered class.
+    """
+    if cls is None and path is None:
+        return lambda cls: register(cls, fields)
+
+    if path is None:
+        path = _get_class_path(cls)
+
+    with _schemas_lock:
+        _schemas[path] = None if fields is None else tuple(fields)
+
+    return cls
+
+
+def allow_import(module_paths):
+    """Sets modules which can be imported at deserialization to register their classes (e.g. task modules).
+    Classes in other modules must be registered before their objects are deserialized.
+
+    Args:
+        module_paths (list[str]): Module paths. Sub modules are also allowed. mfplib is always allowed.
+    """
+    global _importable_modules
+    _importable_modules = ('mfplib',) + tuple(module_paths or ())
+
+
+def _is_importable(path):
+    """Checks whether a class path is in importable modules or not."""
+    return any(path.startswith(module_path + '.') for module_path in _importable_modules)
+
+
+def _get_class_path(cls):
+    """Gets class path (e.g. package.module.Class)."""
+    return cls.__module__ + '.' + cls.__qualname__
+
+
+# Settings in task payloads (module is imported when an object is deserialized)
+register(path='mfplib.jobs.print.setting.PrintSetting', fields=(
+    'paper_size', 'sets', 'color_mode', 'toner_mode', 'duplex_mode',
+    'staple', 'hole_punch', 'original_size_prioritized', 'scaling_type',
+))
+register(path='mfplib.jobs.scan.setting.OcrSetting', fields=(
+    'primary_language', 'secondary_language', 'auto_rotation',
+))
+register(path='mfplib.jobs.scan.setting.ScanSetting', fields=(
+    'file_format', 'color_mode', 'resolution', 'original_mode', 'image_rotation', 'duplex_mode',
+    'preview', 'omit_blank_page', 'ocr', 'exposure', 'background', 'contrast', 'sharpness',
+))
+
+
+# Format tags (msgpack compatible for primitive values)
+_NIL = 0xc0
+_FALSE = 0xc2
+_TRUE = 0xc3
+_BIN8, _BIN16, _BIN32 = 0xc4, 0xc5, 0xc6
+_FLOAT64 = 0xcb
+_UINT8, _UINT16, _UINT32, _UINT64 = 0xcc, 0xcd, 0xce, 0xcf
+_INT8, _INT16, _INT32, _INT64 = 0xd0, 0xd1, 0xd2, 0xd3
+_STR8, _STR16, _STR32 = 0xd9, 0xda, 0xdb
+_ARRAY16, _ARRAY32 = 0xdc, 0xdd
+_MAP16, _MAP32 = 0xde, 0xdf
+
+# Extension tag followed by extension type byte
+_EXT = 0xc7
+_EXT_TUPLE = 0x01  # array
+_EXT_ENUM = 0x02  # type reference, value
+_EXT_OBJECT = 0x03  # type reference, array (registered fields) or map (instance attributes)
+_EXT_PICKLE = 0x04  # bin
+_EXT_DATETIME = 0x05  # str (ISO 8601 with offset if aware)
+_EXT_DATE = 0x06  # str (ISO 8601)
+_EXT_SET = 0x07  # array
+_EXT_FROZENSET = 0x08  # array
+
+_RAW = 0x00
+_COMPRESSED = 0x01  # zlib with preset dictionary
+
+# Preset dictionary for zlib which contains frequent strings in task requests,
+# so even small requests are compressed well. Do not change it without changing format prefix.
+_PRESET_DICTIONARY = ' '.join([
+    'mfplib.jobs.scan.setting.OcrSetting',
+    'mfplib.jobs.scan.setting.ScanSetting',
+    'mfplib.jobs.scan.setting.ImageFileFormat',
+    'mfplib.jobs.scan.setting.Resolution',
+    'mfplib.jobs.scan.setting.OriginalMode',
+    'mfplib.jobs.scan.setting.ImageRotation',
+    'mfplib.jobs.print.setting.StaplePosition',
+    'mfplib.jobs.print.setting.HolePunchPosition',
+    'mfplib.jobs.print.setting.ScalingType',
+    'mfplib.jobs.print.setting.TonerMode',
+    'mfplib.jobs.print.setting.DuplexMode',
+    'mfplib.jobs.print.setting.ColorMode',
+    'mfplib.jobs.print.setting.PaperSize',
+    'mfplib.jobs.print.setting.PrintSetting',
+    'payloads.scan.ScanTaskPayload',
+    'payloads.print.PrintTaskPayload',
+    'mfplib.app.background.handlers.task.TaskHandler',
+    'mfplib.app.background.handlers.task_payload.TaskPayloadHandler',
+    'handler_path body task_class dispatched_at locale payload task',
+]).encode('ascii')
+
+_pack_float = struct.Struct('>d').pack
+_unpack_float = struct.Struct('>d').unpack_from
+
+
+class _Encoder:
+    """This class encodes an object to compact binary format."""
+
+    def __init__(self, allow_pickle):
+        self._buffer = bytearray()
+        self._types = {}  # Class path -> index in message
+        self._allow_pickle = allow_pickle
+
+    def encode(self, obj):
+        self._write(obj)
+        return bytes(self._buffer)
+
+    def _write(self, obj):
+        cls = type(obj)
+        writer = self._WRITERS.get(cls, None)
+        if writer is not None:
+            writer(self, obj)
+        elif isinstance(obj, Enum):
+            self._write_enum(obj)
+        else:
+            self._write_object(obj)
+
+    def _write_none(self, obj):
+        self._buffer.append(_NIL)
+
+    def _write_bool(self, obj):
+        self._buffer.append(_TRUE if obj else _FALSE)
+
+    def _write_int(self, obj):
+        buffer = self._buffer
+        if 0 <= obj < 0x80:
+            buffer.append(obj)
+        elif -0x20 <= obj < 0:
+            buffer.append(obj & 0xff)
+        elif 0 <= obj < 0x10000000000000000:
+            for tag, size in ((_UINT8, 1), (_UINT16, 2), (_UINT32, 4), (_UINT64, 8)):
+                if obj < 1 << (size * 8):
+                    buffer.append(tag)
+                    buffer += obj.to_bytes(size, 'big')
+                    break
+        elif -0x8000000000000000 <= obj < 0:
+            for tag, size in ((_INT8, 1), (_INT16, 2), (_INT32, 4), (_INT64, 8)):
+                if obj >= -(1 << (size * 8 - 1)):
+                    buffer.append(tag)
+                    buffer += obj.to_bytes(size, 'big', signed=True)
+                    break
+        else:
+            self._write_pickle(obj)  # Out of 64 bit range
+
+    def _write_float(self, obj):
+        self._buffer.append(_FLOAT64)
+        self._buffer += _pack_float(obj)
+
+    def _write_str(self, obj):
+        data = obj.encode('utf-8')
+        self._write_length(len(data), 0xa0, 0x20, (_STR8, _STR16, _STR32))
+        self._buffer += data
+
+    def _write_bytes(self, obj):
+        self._write_length(len(obj), None, 0, (_BIN8, _BIN16, _BIN32))
+        self._buffer += obj
+
+    def _write_list(self, obj):
+        self._write_length(len(obj), 0x90, 0x10, (None, _ARRAY16, _ARRAY32))
+        for item in obj:
+            self._write(item)
+
+    def _write_tuple(self, obj):
+        self._buffer += bytes((_EXT, _EXT_TUPLE))
+        self._write_list(obj)
+
+    def _write_dict(self, obj):
+        self._write_length(len(obj), 0x80, 0x10, (None, _MAP16, _MAP32))
+        for key, value in obj.items():
+            self._write(key)
+            self._write(value)
+
+    def _write_enum(self, obj):
+        self._buffer += bytes((_EXT, _EXT_ENUM))
+        self._write_type(type(obj))
+        self._write(obj.value)
+
+    def _write_datetime(self, obj):
+        self._buffer += bytes((_EXT, _EXT_DATETIME))
+        self._write_str(obj.isoformat())
+
+    def _write_date(self, obj):
+        self._buffer += bytes((_EXT, _EXT_DATE))
+        self._write_str(obj.isoformat())
+
+    def _write_set(self, obj):
+        self._buffer += bytes((_EXT, _EXT_FROZENSET if isinstance(obj, frozenset) else _EXT_SET))
+        self._write_list(list(obj))
+
+    def _write_object(self, obj):
+        cls = type(obj)
+        path = _get_class_path(cls)
+        if path not in _schemas or not hasattr(obj, '__dict__'):
+            if isinstance(obj, tuple):
+                # Named tuple is transferred as a plain tuple
+                self._write_tuple(obj)
+            else:
+                self._write_pickle(obj)
+            return
+
+        self._buffer += bytes((_EXT, _EXT_OBJECT))
+        self._write_type(cls, path)
+
+        fields = _schemas[path]
+        if fields is None:
+            self._write_dict(obj.__dict__)
+        else:
+            self._write_list([getattr(obj, field, None) for field in fields])
+
+    def _write_pickle(self, obj):
+        if not self._allow_pickle:
+            raise SerializationError(
+                '{} object cannot be serialized. Register the class or use supported types.'.format(type(obj).__name__))
+
+        self._buffer += bytes((_EXT, _EXT_PICKLE))
+        self._write_bytes(pickle.dumps(obj))
+
+    def _write_type(self, cls, path=None):
+        """Writes a type reference (class path at first time, index after that)."""
+        path = path or _get_class_path(cls)
+        index = self._types.get(path, None)
+        if index is None:
+            self._types[path] = len(self._types)
+            self._write_str(path)
+        else:
+            self._write_int(index)
+
+    def _write_length(self, length, fix_tag, fix_limit, tags):
+        """Writes a header of str, bin, array or map."""
+        buffer = self._buffer
+        if fix_tag is not None and length < fix_limit:
+            buffer.append(fix_tag | length)
+            return
+
+        for tag, size in zip(tags, (1, 2, 4)):
+            if tag is not None and length < 1 << (size * 8):
+                buffer.append(tag)
+                buffer += length.to_bytes(size, 'big')
+                return
+
+        raise SerializationError('Data length {} is too large.'.format(length))
+
+    _WRITERS = {
+        type(None): _write_none,
+        bool: _write_bool,
+        int: _write_int,
+        float: _write_float,
+        str: _write_str,
+        bytes: _write_bytes,
+        bytearray: _write_bytes,
+        list: _write_list,
+        tuple: _write_tuple,
+        dict: _write_dict,
+        set: _write_set,
+        frozenset: _write_set,
+        datetime: _write_datetime,
+        date: _write_date,
+    }
+
+
+class _Decoder:
+    """This class decodes an object from compact binary format."""
+
+    def __init__(self, data, allow_pickle):
+        self._data = data
+        self._pos = 0
+        self._types = []  # Classes in order of appearance
+        self._allow_pickle = allow_pickle
+
+    def decode(self):
+        obj = self._read()
+        if self._pos != len(self._data):
+            raise SerializationError('Data has trailing bytes.')
+        return obj
+
+    def _read(self):
+        data = self._data
+        tag = data[self._pos]
+        self._pos += 1
+
+        if tag < 0x80:
+            return tag
+        elif tag >= 0xe0:
+            return tag - 0x100
+        elif tag < 0x90:
+            return self._read_map(tag & 0x0f)
+        elif tag < 0xa0:
+            return self._read_array(tag & 0x0f)
+        elif tag < 0xc0:
+            return self._read_raw(tag & 0x1f).decode('utf-8')
+        elif tag == _NIL:
+            return None
+        elif tag == _FALSE:
+            return False
+        elif tag == _TRUE:
+            return True
+        elif tag == _FLOAT64:
+            value = _unpack_float(data, self._pos)[0]
+            self._pos += 8
+            return value
+        elif _UINT8 <= tag <= _UINT64:
+            return self._read_uint(1 << (tag - _UINT8))
+        elif _INT8 <= tag <= _INT64:
+            size = 1 << (tag - _INT8)
+            value = int.from_bytes(data[self._pos:self._pos + size], 'big', signed=True)
+            self._pos += size
+            return value
+        elif _STR8 <= tag <= _STR32:
+            return self._read_raw(self._read_uint(1 << (tag - _STR8))).decode('utf-8')
+        elif _BIN8 <= tag <= _BIN32:
+            return self._read_raw(self._read_uint(1 << (tag - _BIN8)))
+        elif tag in (_ARRAY16, _ARRAY32):
+            return self._read_array(self._read_uint(2 if tag == _ARRAY16 else 4))
+        elif tag in (_MAP16, _MAP32):
+            return self._read_map(self._read_uint(2 if tag == _MAP16 else 4))
+        elif tag == _EXT:
+            return self._read_ext()
+
+        raise SerializationError('Unknown tag 0x{:02x} is found.'.format(tag))
+
+    def _read_uint(self, size):
+        value = int.from_bytes(self._data[self._pos:self._pos + size], 'big')
+        self._pos += size
+        return value
+
+    def _read_raw(self, length):
+        value = self._data[self._pos:self._pos + length]
+        self._pos += length
+        return value
+
+    def _read_array(self, length):
+        return [self._read() for _ in range(length)]
+
+    def _read_map(self, length):
+        result = {}
+        for _ in range(length):
+            key = self._read()
+            result[key] = self._read()
+        return result
+
+    def _read_ext(self):
+        ext_type = self._data[self._pos]
+        self._pos += 1
+
+        if ext_type == _EXT_TUPLE:
+            return tuple(self._read())
+        elif ext_type == _EXT_ENUM:
+            cls = self._read_type()
+            return cls(self._read())
+        elif ext_type == _EXT_OBJECT:
+            cls, path = self._read_type(with_path=True)
+            state = self._read()
+            fields = _schemas[path]
+            if fields is not None:
+                state = dict(zip(fields, state))
+
+            obj = cls.__new__(cls)
+            obj.__dict__.update(state)
+            return obj
+        elif ext_type == _EXT_DATETIME:
+            return datetime.fromisoformat(self._read())
+        elif ext_type == _EXT_DATE:
+            return date.fromisoformat(self._read())
+        elif ext_type == _EXT_SET:
+            return set(self._read())
+        elif ext_type == _EXT_FROZENSET:
+            return frozenset(self._read())
+        elif ext_type == _EXT_PICKLE:
+            if not self._allow_pickle:
+                raise SerializationError('Pickle data is not allowed.')
+            return pickle.loads(self._read())
+
+        raise SerializationError('Unknown extension type 0x{:02x} is found.'.format(ext_type))
+
+    def _read_type(self, with_path=False):
+        """Reads a type reference and resolves a class."""
+        ref = self._read()
+        if isinstance(ref, int):
+            cls, path = self._types[ref]
+        else:
+            path = ref
+            cls = self._resolve(path)
+            self._types.append((cls, path))
+
+        return (cls, path) if with_path else cls
+
+    def _resolve(self, path):
+        """Resolves a class path. Only registered classes and enums are allowed."""
+        # Do not import modules which are neither registered nor allowed
+        if path not in _schemas and not _is_importable(path):
+            raise SerializationError('Class {} is not registered.'.format(path))
+
+        module_path, _, class_name = path.rpartition('.')
+        try:
+            module = importlib.import_module(module_path)
+            cls = getattr(module, class_name)
+        except (ImportError, AttributeError, ValueError):
+            raise SerializationError('Class {} is not found.'.format(path))
+
+        # Registration is done at module import
+        if not (path in _schemas or (isinstance(cls, type) and issubclass(cls, Enum))):
+            raise SerializationError('Class {} is not registered.'.format(path))
+
+        return cls
+
+
+class CompactSerializer(Serializer):
+    """This class serializes data in schema based binary format.
+
+    Serialized text is '{PREFIX}{base64 data}'.
+    The first byte of data shows whether the rest is compressed by zlib or not.
+    """
+
+    PREFIX = '~1'
+    """Format identifier which is never used in base64."""
+
+    def __init__(self, compression_threshold=128, compression_level=6, allow_pickle=True):
+        """Initializes a new instance.
+
+        Args:
+            compression_threshold (int): Encoded data is compressed if its size is larger than this value.
+                If None is given, data is never compressed.
+            compression_level (int): zlib compression level.
+            allow_pickle (bool): Whether objects of unregistered classes are embedded as pickle data or not.
+        """
+        self._compression_threshold = compression_threshold
+        self._compression_level = compression_level
+        self._allow_pickle = allow_pickle
+
+    def dumps(self, obj):
+        data = _Encoder(self._allow_pickle).encode(obj)
+
+        flag = _RAW
+        if self._compression_threshold is not None and len(data) > self._compression_threshold:
+            compressor = zlib.compressobj(self._compression_level, zdict=_PRESET_DICTIONARY)
+            compressed = compressor.compress(data) + compressor.flush()
+            if len(compressed) < len(data):
+                flag, data = _COMPRESSED, compressed
+
+        return self.PREFIX + base64.b64encode(bytes((flag,)) + data).decode('ascii')
+
+    def loads(self, text):
+        if not self.accepts(text):
+            raise SerializationError('Data is not serialized in compact format.')
+
+        try:
+            data = base64.b64decode(text[len(self.PREFIX):].encode('ascii'))
+            flag, data = data[0], data[1:]
+            if flag == _COMPRESSED:
+                decompressor = zlib.decompressobj(zdict=_PRESET_DICTIONARY)
+                data = decompressor.decompress(data) + decompressor.flush()
+            elif flag != _RAW:
+                raise SerializationError('Unknown data flag 0x{:02x} is found.'.format(flag))
+
+            return _Decoder(data, self._allow_pickle).decode()
+        except (IndexError, KeyError, TypeError, ValueError, pickle.UnpicklingError, zlib.error, struct.error,
+                binascii.Error) as e:
+            if isinstance(e, SerializationError):
+                raise
+            raise SerializationError('Data is broken: {}'.format(e))
+
+    def accepts(self, text):
+        return text.startswith(self.PREFIX)
+
+
+_serializers = [CompactSerializer(), PickleSerializer()]
+_safe_serializers = [CompactSerializer(allow_pickle=False)]
+
+
+def find_serializer(text, allow_pickle=True):
+    """Finds a serializer which can deserialize a text.
+
+    Args:
+        text (str): Serialized text.
+        allow_pickle (bool): Whether pickle data (legacy format or embedded objects) is accepted or not.
+            Set false to deserialize untrusted data.
+    Returns:
+        Serializer: Serializer.
+    Raises:
+        SerializationError: Data format is unknown or not allowed.
+    """
+    for serializer in _serializers if allow_pickle else _safe_serializers:
+        if serializer.accepts(text):
+            return serializer
+
+    raise SerializationError('Data format is unknown.')
@@ -1,18 +1,96 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
+import time
+from collections import namedtuple
+from threading import Lock
+
 from ...webapi import WebApi
+from ...session.user import LoginUser
+from ...debug import Logger
 
 
 _SESSION_API_URL = '/session/current'
 
+CACHE_TTL = 60
+"""Seconds while cached session information is used."""
+
+_MAX_CACHE_ENTRIES = 64
+
+# API access token -> (expiration time, session information)
+_cache = {}
+_lock = Lock()
+
+
+class SessionInfo(namedtuple('SessionInfo', ('locale', 'user'))):
+    """This class represents home app session information.
+
+    Attributes:
+        locale (str): Display locale (e.g. en_US).
+        user (mfplib.session.user.LoginUser): Login user. If user authentication is disabled, None is set.
+    """
+    pass
+
+
+def get_session_info(api_token, refresh=False):
+    """Gets home app session information.
+    Session information is cached per API access token for ``CACHE_TTL`` seconds.
+
+    Args:
+        api_token (str): API access token.
+        refresh (bool): If true is given, session information is retrieved regardless of cache.
+    Returns:
+        SessionInfo: Session information.
+    """
+    now = time.monotonic()
+
+    if not refresh:
+        cached = _cache.get(api_token, None)
+        if cached is not None and cached[0] > now:
+            return cached[1]
 
-def get_locale(api_token):
-    """Gets display locale of home app session."""
     api = WebApi(api_token)
     response = api.get(_SESSION_API_URL)
-    locale = response['display_language'].replace('-', '_')
+    info = SessionInfo(
+        locale=_fix_locale(response['display_language']),
+        user=LoginUser.from_session(response),
+    )
+
+    with _lock:
+        if len(_cache) >= _MAX_CACHE_ENTRIES:
+            # Remove expired sessions, or all sessions if every session is alive
+            expired = [token for token, (expires_at, _) in _cache.items() if expires_at <= now]
+            for token in expired or list(_cache):
+                del _cache[token]
+
+        _cache[api_token] = (now + CACHE_TTL, info)
+
+    Logger.debug('Session information is cached (locale: %s).', info.locale)
+    return info
+
+
+def invalidate(api_token=None):
+    """Invalidates cached session information.
+    This function should be called when home app session is changed (e.g. user logged out or locale changed).
+
+    Args:
+        api_token (str): API access token. If None is given, all sessions are invalidated.
+    """
+    with _lock:
+        if api_token is None:
+            _cache.clear()
+        else:
+            _cache.pop(api_token, None)
+
+
+def get_locale(api_token):
+    """Gets display locale of home app session."""
+    return get_session_info(api_token).locale
+
+
+def _fix_locale(display_language):
+    """Fixes locale string (e.g. en-us -> en_US)."""
+    locale = display_language.replace('-', '_')
 
-    # Fix locale string (e.g. en_us -> en_US)
     splits = locale.split('_')
     splits_len = len(splits)
     if splits_len == 1:
@@ -1,19 +1,62 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
 from datetime import datetime
+from enum import IntEnum
 
 from . import session
+from .cancellation import CancellationToken
 from .client import CommunicationClient
+from .serializer import register
 
 
+class TaskPriority(IntEnum):
+    """This enum represents a task priority class. Smaller value is executed first."""
+    High = 0
+    Normal = 1
+    Low = 2
+
+
+@register
 class Task:
-    """This class is an abstract task which is executed on background app."""
+    """This class is an abstract task which is executed on background app.
+
+    Attributes:
+        priority (TaskPriority): Priority class of task. Tasks in higher class are always executed first.
+        cpu_bound (bool): Whether task is CPU bound (e.g. PDF rendering) or not.
+            CPU bound tasks are executed in a worker process if background app enables process pool.
+            Changes of task attributes in a worker process are not reflected to background app.
+        idempotency_key (str): Key which identifies same work (e.g. print file digest).
+            If background app journals tasks, a task with known key is not enqueued again.
+        lazy_session_lock (bool): Whether session lock is skipped for short task or not.
+            If true, task shares a session lock only if other tasks of same session lock it.
+            Set it only to tasks which finish before home app session expires.
+
+    Note:
+        Task attributes are transferred to background app in compact format (see ``serializer``).
+        Attribute values must be None, bool, int, float, str, bytes, list, tuple (namedtuple is received as tuple),
+        dict, set, frozenset, datetime, date, Enum members or objects of registered classes
+        (Task and TaskPayload subclasses or classes decorated by ``register``).
+        Other values raise SerializationError at dispatch.
+    """
+
+    priority = TaskPriority.Normal
+    cpu_bound = False
+    idempotency_key = None
+    lazy_session_lock = False
+
+    _cancellation = None
+    _last_checkpoint = None
 
     def __init__(self):
         self.__api_token = None
         self.__dispatched_at = None
         self.__locale = None
 
+    def __init_subclass__(cls, **kwargs):
+        """Registers a task class to be serialized in compact format."""
+        super().__init_subclass__(**kwargs)
+        register(cls)
+
     @property
     def api_token(self):
         """Gets an API access token."""
@@ -29,6 +72,16 @@ class Task:
         """Gets locale in home app session."""
         return self.__locale
 
+    @property
+    def cancellation(self):
+        """Gets a cancellation token while task is executed in background. Otherwise None is returned."""
+        return self._cancellation
+
+    @property
+    def last_checkpoint(self):
+        """Gets a progress which is passed at last checkpoint (e.g. printed page count)."""
+        return self._last_checkpoint
+
     def dispatch(self, api_token):
         """Dispatches task to background via existing communication connection.
         If connection is not opened yet, this method will open by itself.
@@ -37,6 +90,9 @@ class Task:
             api_token (str): API access token.
         Raises:
             CommunicationError: Background app is not started or does not open connection.
+        Note:
+            Module of this task must be listed in ``BackgroundApp(allowed_modules=...)``,
+            otherwise background app rejects the task.
         """
         client = CommunicationClient.connect(api_token)
         client.request(
@@ -49,15 +105,56 @@ class Task:
         )
 
     def execute(self, payload=None):
-        """This is an abstract method to execute a task."""
+        """This is an abstract method to execute a task.
+
+        If this method has ``cancellation`` parameter, a cancellation token is passed as keyword argument.
+        Long running tasks should call ``checkpoint`` at safe points to stop when background app stops.
+        """
         raise NotImplementedError('execute method is not implemented.')
 
+    def checkpoint(self, progress=None):
+        """Marks a point where task can stop safely (e.g. between rendered pages).
+
+        Args:
+            progress (object): Progress at this point. It can be referred by ``last_checkpoint`` in on_aborted.
+        Raises:
+            TaskCancelledError: Cancellation is requested. Task is regarded as aborted.
+        """
+        self._last_checkpoint = progress
+        if self._cancellation is not None:
+            self._cancellation.raise_if_cancelled()
+
+    def _start_execution(self):
+        """Prepares a cancellation token before task is executed.
+
+        Returns:
+            CancellationToken: Cancellation token.
+        """
+        self._cancellation = CancellationToken()
+        self._last_checkpoint = None
+        return self._cancellation
+
+    def _end_execution(self):
+        """Removes a cancellation token after task is executed."""
+        self.__dict__.pop('_cancellation', None)
+
     def _set_task_attributes(self, api_token, dispatched_at, locale):
         """Sets task attributes."""
         self.__api_token = api_token
         self.__dispatched_at = dispatched_at
         self.__locale = locale
 
+    def estimate_size(self, payload=None):
+        """This method is invoked at task enqueued to estimate relative task size (e.g. card count).
+        Task size is used for fair scheduling between sessions and shortest job first ordering.
+
+        Args:
+            payload (TaskPayload): Dispatched task payload.
+        Returns:
+            float: Relative task size. Default is 1.
+        """
+        return 1
+
     def on_enqueued(self, payload=None):
         """This method is invoked at task enqueued in background.
 
@@ -67,7 +164,7 @@ class Task:
         pass
 
     def on_aborted(self):
-        """This method is invoked at task aborted."""
+        """This method is invoked at task aborted (including task stopped by cancellation)."""
         pass
 
     def on_error(self, error):
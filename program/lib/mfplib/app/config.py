@@ -2,7 +2,9 @@
 
 from enum import Enum
 from collections import namedtuple
+from threading import Lock
 import json
+import time
 from ..webapi import WebApi, WebApiError
 
 
@@ -87,13 +89,33 @@ class AppConfigError(Exception):
 class AppConfig:
     """This class manages app config.
     Sub class of ``AppConfig`` class fetches or stores app config sections.
+
+    Loaded sections are cached for ``CACHE_TTL`` seconds and the cache is cleared when they are saved.
+    Loaded objects track assigned attributes, so only items which are assigned after load (or save)
+    are written at save. Values are not compared with loaded ones because they may be stale
+    (e.g. changed by other objects or setting app while cached).
     """
 
     _CONFIG_API_URL = '/app/config'
     _CONFIG_LIST_API_URL = '/app/config/list'
 
+    CACHE_TTL = 30
+    """Seconds while loaded sections are cached (setting app may update app config)."""
+
     _cached_specs = None
 
+    # (class, section) -> (expiration time, item values)
+    _cache = {}
+    _cache_lock = Lock()
+
+    # Whether app config list API accepts bulk update or not (falls back to item update if not)
+    # Bulk update is not documented for all devices, so it is disabled once the device rejects it
+    _bulk_supported = True
+    _BULK_UNSUPPORTED_STATUS = (404, 405, 501)
+
+    # Section which this object is loaded from or saved into (for change detection)
+    _loaded_section = None
+
     def __init__(self, **kwargs):
         """Initializes a new instance."""
         # Set specified values in attributes
@@ -108,6 +130,12 @@ class AppConfig:
             if spec.attr_name not in kwargs:
                 setattr(self, spec.attr_name, spec.initial_value)
 
+    def __setattr__(self, name, value):
+        """Sets an attribute and records it as changed if it is a config item."""
+        super().__setattr__(name, value)
+        if any(spec.attr_name == name for spec in self._list_specs()):
+            self.__dict__.setdefault('_dirty', set()).add(name)
+
     @classmethod
     def load_section(cls, api_token, section):
         """Loads an app config section.
@@ -123,12 +151,13 @@ class AppConfig:
         return cls.load_sections(api_token, [section])[0]
 
     @classmethod
-    def load_sections(cls, api_token, sections):
+    def load_sections(cls, api_token, sections, refresh=False):
         """Loads multiple app config sections.
 
         Args:
             api_token (str): API access token.
             sections (list[str]): App config section names.
+            refresh (bool): If true is given, sections are loaded regardless of cache.
         Returns:
             list[AppConfig]: AppConfig objects which attributes are fetched item values.
         Raises:
@@ -141,77 +170,212 @@ class AppConfig:
         if len(specs) == 0:
             return [cls()]
 
+        # Find cached sections
+        now = time.monotonic()
+        loaded = {}
+        if not refresh:
+            for section in sections:
+                cached = cls._cache.get((cls, section), None)
+                if cached is not None and cached[0] > now:
+                    loaded[section] = cached[1]
+
+        # Load values of other sections from app config
+        missing_sections = [section for section in dict.fromkeys(sections) if section not in loaded]
+        if missing_sections:
+            loaded.update(cls._request_sections(api_token, missing_sections, specs))
+
+        # Assign loaded values
+        configs = []
+        for section in sections:
+            config = cls()
+            values = loaded[section]
+
+            for spec, value in zip(specs, values):
+                setattr(config, spec.attr_name, value)
+
+            config._set_clean(section)
+            configs.append(config)
+
+        return configs
+
+    @classmethod
+    def _request_sections(cls, api_token, sections, specs):
+        """Loads item values of sections from app config and caches them.
+
+        Returns:
+            dict: Section name -> item values (in specs order).
+        """
         # Build API parameter
         entries = [
             {'section': section, 'name': spec.item_name, 'type': spec.type.value}
             for section in sections for spec in specs
         ]
 
-        # Load values from app config
         api = WebApi(api_token)
         try:
             response = api.get(cls._CONFIG_LIST_API_URL, {'config_entries': json.dumps(entries)})
         except WebApiError as e:
-            if e.error['name'] == 'IllegalArgumentException':
+            if e.error.get('name', None) == 'IllegalArgumentException':
                 raise AppConfigError('Config section, item name or item type is invalid.')
             else:
                 raise
 
-        # Assign loaded values
-        values = (item['value'] for item in response['app_config_list'])
+        values = [item['value'] for item in response['app_config_list']]
+        count = len(specs)
+        loaded = {
+            section: tuple(values[index * count:(index + 1) * count])
+            for index, section in enumerate(sections)
+        }
 
-        configs = []
-        for section in sections:
-            config = cls()
+        expiration = time.monotonic() + cls.CACHE_TTL
+        with cls._cache_lock:
+            for section, section_values in loaded.items():
+                cls._cache[(cls, section)] = (expiration, section_values)
 
-            for spec in specs:
-                setattr(config, spec.attr_name, next(values))
+        return loaded
 
-            configs.append(config)
+    @classmethod
+    def invalidate(cls, section=None):
+        """Clears cached sections.
 
-        return configs
+        Args:
+            section (str): Section name. If None is given, all sections are cleared.
+        """
+        with cls._cache_lock:
+            for key in [key for key in cls._cache if section is None or key[1] == section]:
+                del cls._cache[key]
+
+    def changed_items(self, section):
+        """Gets attribute names which are assigned after loaded from (or saved into) a section.
+
+        Args:
+            section (str): Section name to be saved.
+        Returns:
+            list[str]: Attribute names. If this object is not loaded from the section, all items are returned.
+        """
+        return [spec.attr_name for spec, value in self._get_changed_values(section)]
 
-    def save_section(self, api_token, section):
+    def save_section(self, api_token, section, force=False):
         """Saves current attribute values into an app config section.
+        Only changed values are written in one request.
 
         Args:
             api_token (str): API access token.
             section (str): Section name.
+            force (bool): If true is given, all values are written regardless of changes.
         Raises:
             AppConfigError: Section name or item name is not found, or item type is incorrect.
         Note:
             If attribute value is None, the config item is not updated.
         """
-        # Get specified config specs
-        specs = self._list_specs()
-
-        # Skip if no config item
-        if len(specs) == 0:
-            return
-
-        # Save all values
-        api = WebApi(api_token)
-        for spec in specs:
-            # Get attribute value
-            value = getattr(self, spec.attr_name)
+        self.save_sections(api_token, {section: self}, force)
 
-            # Skip if attribute value is None or attribute is not present
-            if value is None or type(value) is AppConfigItem:
-                continue
+    @classmethod
+    def save_sections(cls, api_token, configs, force=False):
+        """Saves multiple app config sections in one request.
 
-            try:
-                api.post(self._CONFIG_API_URL, {
+        Args:
+            api_token (str): API access token.
+            configs (dict): Section name -> AppConfig object.
+            force (bool): If true is given, all values are written regardless of changes.
+        Raises:
+            AppConfigError: Section name or item name is not found, or item type is incorrect.
+        """
+        # Collect changed values
+        entries = []
+        for section, config in configs.items():
+            for spec, value in config._get_changed_values(None if force else section):
+                entries.append({
                     'section': section,
                     'name': spec.item_name,
                     'type': spec.type.value,
                     'value': value,
                 })
+
+        # Skip if nothing is changed
+        if not entries:
+            return
+
+        try:
+            cls._write_entries(api_token, entries)
+        finally:
+            for section in configs:
+                AppConfig.invalidate(section)
+
+        # Clear changes which are saved
+        for section, config in configs.items():
+            config._set_clean(section)
+
+    @classmethod
+    def _write_entries(cls, api_token, entries):
+        """Writes config entries into app config."""
+        api = WebApi(api_token)
+
+        bulk_rejected = False
+        if AppConfig._bulk_supported and len(entries) > 1:
+            try:
+                api.post(cls._CONFIG_LIST_API_URL, {'config_entries': entries})
+                return
+            except WebApiError as e:
+                if e.status_code in cls._BULK_UNSUPPORTED_STATUS:
+                    # Bulk update is not supported by this device
+                    AppConfig._bulk_supported = False
+                elif e.status_code == 400 or cls._is_invalid_argument(e):
+                    # Device may not accept bulk update body, or entries may be invalid (checked by item update)
+                    bulk_rejected = True
+                else:
+                    raise
+
+        for entry in entries:
+            try:
+                api.post(cls._CONFIG_API_URL, entry)
             except WebApiError as e:
-                if e.error['name'] in ['IllegalArgumentException', 'value']:
+                if cls._is_invalid_argument(e):
                     raise AppConfigError('Config section, item name or item type is invalid.')
                 else:
                     raise
 
+        if bulk_rejected:
+            # Entries are valid, so bulk update is not accepted by this device
+            AppConfig._bulk_supported = False
+
+    @classmethod
+    def _is_invalid_argument(cls, error):
+        """Gets whether an API error shows invalid section, item name or item type or not."""
+        return error.error.get('name', None) in ['IllegalArgumentException', 'value']
+
+    def _set_clean(self, section):
+        """Remembers a section which this object is loaded from or saved into, and clears changes."""
+        self._loaded_section = section
+        self.__dict__['_dirty'] = set()
+
+    def _get_changed_values(self, section):
+        """Gets item specs and values to be written.
+
+        Args:
+            section (str): Section name. If None is given, all values are regarded as changed.
+        Returns:
+            list[tuple]: Pairs of item spec and value.
+        """
+        loaded = section is not None and section == self._loaded_section
+        dirty = self.__dict__.get('_dirty', ())
+        changed = []
+        for spec in self._list_specs():
+            # Get attribute value
+            value = getattr(self, spec.attr_name)
+
+            # Skip if attribute value is None or attribute is not present
+            if value is None or type(value) is AppConfigItem:
+                continue
+
+            # Skip if attribute is not assigned after loaded
+            if loaded and spec.attr_name not in dirty:
+                continue
+
+            changed.append((spec, value))
+
+        return changed
+
     @classmethod
     def _list_specs(cls):
         """Lists up config item specifications which are defined by AppConfigItem.
@@ -3,6 +3,8 @@
 # Copyright(c) 2020 TOSHIBA TEC CORPORATION, All Rights Reserved.
 
 import importlib
+import time
+from threading import Lock
 
 from ..webapi import WebApi
 from ..debug import Logger
@@ -18,13 +20,31 @@ _KNOWN_LOCALES = {
 
 
 class Localizer:
-    """This class loads localized messages for requested locales."""
+    """This class loads localized messages for requested locales.
+
+    Installed locales and specified locales are cached for ``CACHE_TTL`` seconds,
+    and messages merged with default locale messages are cached per locale,
+    so localization of each request does not access Web API nor rebuild messages.
+    """
 
     _API_URL = '/app/context/self/localization_data_list'
 
     _MODULE_DIR = 'localization'
     _MODULE_NAME = 'messages'
 
+    CACHE_TTL = 300
+    """Seconds while cached installed locales are used."""
+
+    _MAX_CACHE_ENTRIES = 256
+
+    # Built-in locales -> (expiration time, locale map, language code map)
+    _installed_cache = {}
+    # (built-in locales, requested locales) -> (expiration time, specified locale)
+    _locale_cache = {}
+    # (locale, default locale) -> messages merged with default locale messages
+    _catalogs = {}
+    _cache_lock = Lock()
+
     def __init__(self, api_token, builtin_locales):
         """Initializes a new instance of Localizer class.
 
@@ -56,7 +76,7 @@ class Localizer:
             locales (list[str]): Locales (e.g. ['en-US', 'ja-JP'] or ['en_us', 'ja_jp]).
                 Each locale allows both '_' and '-' separator, and ignores case.
         Returns:
-            dict: Localized messages.
+            dict: Localized messages. The dictionary is shared by callers and must not be modified.
         Note:
             This method specify locale for localized messages based on below rules.
 
@@ -71,17 +91,57 @@ class Localizer:
         locales = [] if locales is None else locales
         locale = self._specify_locale(locales)
 
+        key = (locale, self._default_locale)
+        messages = self._catalogs.get(key, None)
+        if messages is not None:
+            return messages
+
         # Load messages based on locale
         messages = self._load_messages(locale)
-        Logger.debug('Localized messages are fetched based on locale {}.'.format(locale))
+        Logger.debug('Localized messages are fetched based on locale %s.', locale)
 
         # Fallback messages using default locale messages
         messages = self._fallback_messages(messages)
 
-        return messages
+        with self._cache_lock:
+            return self._catalogs.setdefault(key, messages)
+
+    @classmethod
+    def invalidate(cls):
+        """Clears cached locales and messages (e.g. after localization data is installed)."""
+        with cls._cache_lock:
+            cls._installed_cache.clear()
+            cls._locale_cache.clear()
+            cls._catalogs.clear()
 
     def _specify_locale(self, requested_locales):
-        """Specify locale based on installed locales."""
+        """Specify locale based on installed locales (cached per requested locales)."""
+        now = time.monotonic()
+        key = (tuple(self._builtin_locales), tuple(requested_locales))
+
+        cached = self._locale_cache.get(key, None)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        locale_map, language_map = self._get_locale_maps()
+        locale = self._find_locale(requested_locales, locale_map, language_map)
+
+        with self._cache_lock:
+            if len(self._locale_cache) >= self._MAX_CACHE_ENTRIES:
+                self._locale_cache.clear()
+            self._locale_cache[key] = (now + self.CACHE_TTL, locale)
+
+        return locale
+
+    def _get_locale_maps(self):
+        """Gets locale map and language code map of installed locales (cached for ``CACHE_TTL`` seconds)."""
+        now = time.monotonic()
+        key = tuple(self._builtin_locales)
+
+        cached = self._installed_cache.get(key, None)
+        if cached is not None and cached[0] > now:
+            return cached[1], cached[2]
+
         # Get installed locales including built-in
         installed_locales = self._get_installed_locales()
 
@@ -100,6 +160,13 @@ class Localizer:
             if language not in language_map:
                 language_map[language] = locale
 
+        with self._cache_lock:
+            self._installed_cache[key] = (now + self.CACHE_TTL, locale_map, language_map)
+
+        return locale_map, language_map
+
+    def _find_locale(self, requested_locales, locale_map, language_map):
+        """Finds locale from installed locales."""
         # Find locale
         for locale in requested_locales:
             Logger.debug('Try to find localized messages for locale {}.'.format(locale))
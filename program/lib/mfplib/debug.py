@@ -1,7 +1,11 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
-import inspect
+import json
+import sys
+import time
+from collections import deque
 from enum import Enum
+from threading import Thread, Condition, Lock
 
 
 class LoggerType(Enum):
@@ -19,18 +23,149 @@ class LoggerType(Enum):
     """Logger for background app."""
 
 
+class AsyncLogSink:
+    """This class writes logs to a logger object on a dedicated writer thread.
+
+    Logs are put into a bounded buffer and written in batches, so logging does not block callers.
+    If the buffer is full, new logs are dropped and counted,
+    and the dropped count is written when the writer catches up.
+    """
+
+    def __init__(self, logger_obj, buffer_size=1024, batch_size=64):
+        """Initializes a new instance.
+
+        Args:
+            logger_obj (object): Logger object which has ``log(message, log_level, name)`` method.
+            buffer_size (int): Maximum count of waiting logs.
+            batch_size (int): Maximum count of logs which are written in a batch.
+        """
+        self._logger_obj = logger_obj
+        self._buffer_size = buffer_size
+        self._batch_size = batch_size
+
+        self._buffer = deque()
+        self._condition = Condition()
+        self._writing = False
+        self._closed = False
+
+        self._written = 0
+        self._dropped = 0
+        self._unreported = 0  # Dropped count which is not written yet
+
+        self._thread = Thread(target=self._run, name='AsyncLogSink', daemon=True)
+        self._thread.start()
+
+    @property
+    def statistics(self):
+        """Gets written and dropped log counts ('written' and 'dropped') and waiting log count ('waiting')."""
+        with self._condition:
+            return {'written': self._written, 'dropped': self._dropped, 'waiting': len(self._buffer)}
+
+    def log(self, message, log_level='debug', name=None):
+        """Puts a log to be written."""
+        with self._condition:
+            if len(self._buffer) >= self._buffer_size or self._closed:
+                self._dropped += 1
+                self._unreported += 1
+                return
+
+            self._buffer.append((message, log_level, name))
+            if len(self._buffer) == 1:
+                self._condition.notify()
+
+    def flush(self, timeout=None):
+        """Waits until waiting logs are written.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+        Returns:
+            bool: Whether all logs are written or not.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._buffer and not self._writing, timeout)
+
+    def close(self, timeout=None):
+        """Writes waiting logs and stops writer thread.
+
+        Args:
+            timeout (float): Maximum seconds to wait for waiting logs.
+        """
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _run(self):
+        """Writes logs in batches."""
+        while True:
+            with self._condition:
+                while not self._buffer and not self._unreported and not self._closed:
+                    self._condition.wait()
+
+                if self._closed and not self._buffer:
+                    return
+
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self._batch_size))]
+                dropped, self._unreported = self._unreported, 0
+                self._writing = True
+
+            if dropped:
+                batch.append(('{} logs are dropped because log buffer is full.'.format(dropped), 'warning', 'debug.py AsyncLogSink'))
+
+            for message, log_level, name in batch:
+                try:
+                    self._logger_obj.log(message, log_level=log_level, name=name)
+                except Exception:
+                    pass  # Logging errors cannot be logged
+
+            with self._condition:
+                self._written += len(batch)
+                self._writing = False
+                self._condition.notify_all()
+
+
 class Logger:
-    """This class outputs a debug log."""
+    """This class outputs a debug log.
+
+    Log level is checked before any other work, so suppressed logs cost only a method call.
+    Message arguments are formatted in ``%`` style only if the log is emitted::
+
+        Logger.info('Task %s is requested.', task_class)
+    """
 
     _logger_obj = None
 
+    # Levels are compared as numbers
+    _LEVELS = {
+        'debug': 10,
+        'info': 20,
+        'warning': 30,
+        'error': 40,
+    }
+    _DISABLED = 100
+
+    # Minimum level to be emitted (set by logger type and log level)
+    _level = 'debug'
+    _threshold = _DISABLED
+
+    # Code object -> tag
+    _tags = {}
+
+    _CLOSE_TIMEOUT = 1
+
+    # (code object, event name) -> [call count, tokens, last refill time, suppressed count]
+    _samplers = {}
+    _samplers_lock = Lock()
+
     @classmethod
-    def set_logger_type(cls, type=LoggerType.None_):
+    def set_logger_type(cls, type=LoggerType.None_, asynchronous=False, buffer_size=1024):
         """Sets logger type.
         If ``LoggerType.None_`` is given, no debug log is recorded.
 
         Args:
            type (LoggerType): Logger type.
+           asynchronous (bool): Whether logs are written on a writer thread or not (see ``AsyncLogSink``).
+           buffer_size (int): Maximum count of waiting logs if logs are written asynchronously.
         """
         if type is LoggerType.HomeAppLogger:
             from hmserver.apps.common.logger import logger_obj
@@ -44,71 +179,230 @@ class Logger:
         else:
             obj = None
 
-        cls._logger_obj = obj
+        if obj is not None and asynchronous:
+            obj = AsyncLogSink(obj, buffer_size)
+
+        previous, cls._logger_obj = cls._logger_obj, obj
+        cls._update_threshold()
+
+        if isinstance(previous, AsyncLogSink):
+            previous.close(cls._CLOSE_TIMEOUT)
 
     @classmethod
-    def _log(cls, frame, level='debug', message='', tag=None):
-        if cls._logger_obj is None:
-            return
+    def flush(cls, timeout=None):
+        """Waits until logs are written if logs are written asynchronously.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+        """
+        if isinstance(cls._logger_obj, AsyncLogSink):
+            cls._logger_obj.flush(timeout)
+
+    @classmethod
+    def get_statistics(cls):
+        """Gets written and dropped log counts if logs are written asynchronously.
+
+        Returns:
+            dict: Counts (see ``AsyncLogSink.statistics``). If logs are written synchronously, None is returned.
+        """
+        if isinstance(cls._logger_obj, AsyncLogSink):
+            return cls._logger_obj.statistics
+        return None
+
+    @classmethod
+    def set_level(cls, level='debug'):
+        """Sets minimum log level to be recorded.
 
+        Args:
+            level (str): Log level ('debug', 'info', 'warning' or 'error').
+        Raises:
+            ValueError: Unknown log level is given.
+        """
+        if level not in cls._LEVELS:
+            raise ValueError('Unknown log level: {}'.format(level))
+
+        cls._level = level
+        cls._update_threshold()
+
+    @classmethod
+    def is_enabled(cls, level):
+        """Gets whether logs of given level are recorded or not
+        (e.g. to skip building an expensive message).
+
+        Args:
+            level (str): Log level ('debug', 'info', 'warning' or 'error').
+        Returns:
+            bool: Whether logs are recorded or not.
+        """
+        return cls._LEVELS[level] >= cls._threshold
+
+    @classmethod
+    def _update_threshold(cls):
+        """Updates minimum level number to be emitted."""
+        cls._threshold = cls._DISABLED if cls._logger_obj is None else cls._LEVELS[cls._level]
+
+    @classmethod
+    def _get_tag(cls, code):
+        """Gets a tag from code object of log invoker."""
+        tag = cls._tags.get(code, None)
         if tag is None:
             # Tag format is [{Source File Name} {Invoked Function Name}]
-            filename = frame.f_code.co_filename
+            filename = code.co_filename
 
             # Extract file name from path
             index = filename.rfind('/')
             if index != -1:
                 filename = filename[index + 1:]
 
-            func = frame.f_code.co_name
-            tag = '{0} {1}'.format(filename, func)
+            tag = cls._tags[code] = '{0} {1}'.format(filename, code.co_name)
 
-        cls._logger_obj.log(message, log_level=level, name=tag)
+        return tag
 
     @classmethod
-    def debug(cls, message, tag=None):
+    def _log(cls, level, message, args, tag):
+        """Emits a log."""
+        logger_obj = cls._logger_obj
+        if logger_obj is None:
+            return
+
+        if tag is None:
+            # Frame of log invoker (this method is called from level method)
+            tag = cls._get_tag(sys._getframe(2).f_code)
+
+        if args:
+            message = message % args
+
+        logger_obj.log(message, log_level=level, name=tag)
+
+    @classmethod
+    def record(cls, event, level='info', sample_every=1, max_per_second=None, tag=None, **fields):
+        """Outputs a structured log which consists of an event name and fields.
+
+        Fields are formatted (e.g. ``device_get url=/app/context/self status=200``) only if the log is emitted.
+        High volume call sites can be sampled and rate limited per call site.
+        Count of suppressed logs is recorded as ``suppressed`` field in next emitted log.
+
+        Args:
+            event (str): Event name.
+            level (str): Log level ('debug', 'info', 'warning' or 'error').
+            sample_every (int): Only one in given count of calls is emitted.
+            max_per_second (float): Maximum emitted count per second. If None is given, not limited.
+            tag (str): Log message tag.
+                If ``None`` is given, source file name and function name are recorded.
+            **fields: Log fields. Values which are not string are formatted as JSON.
+        """
+        if cls._LEVELS[level] < cls._threshold:
+            return
+
+        code = sys._getframe(1).f_code
+        if sample_every > 1 or max_per_second is not None:
+            suppressed = cls._sample((code, event), sample_every, max_per_second)
+            if suppressed is None:
+                return
+            if suppressed:
+                fields['suppressed'] = suppressed
+
+        logger_obj = cls._logger_obj
+        if logger_obj is None:
+            return
+
+        message = ' '.join([event] + ['{}={}'.format(name, cls._format_field(value)) for name, value in fields.items()])
+        logger_obj.log(message, log_level=level, name=cls._get_tag(code) if tag is None else tag)
+
+    @classmethod
+    def _sample(cls, key, sample_every, max_per_second):
+        """Decides whether a structured log is emitted or not.
+
+        Returns:
+            int: Count of suppressed logs since last emitted log. If the log is suppressed, None is returned.
+        """
+        now = time.monotonic()
+        with cls._samplers_lock:
+            sampler = cls._samplers.get(key, None)
+            if sampler is None:
+                sampler = cls._samplers[key] = [0, max_per_second or 0., now, 0]
+
+            # Sampling
+            sampler[0] += 1
+            if (sampler[0] - 1) % sample_every:
+                sampler[3] += 1
+                return None
+
+            # Rate limit (token bucket)
+            if max_per_second is not None:
+                sampler[1] = min(sampler[1] + (now - sampler[2]) * max_per_second, max_per_second)
+                sampler[2] = now
+                if sampler[1] < 1:
+                    sampler[3] += 1
+                    return None
+                sampler[1] -= 1
+
+            suppressed, sampler[3] = sampler[3], 0
+            return suppressed
+
+    @staticmethod
+    def _format_field(value):
+        """Formats a structured log field value."""
+        if isinstance(value, str) and value and not any(c in value for c in ' ="\n'):
+            return value
+
+        try:
+            return json.dumps(value, ensure_ascii=False, default=str)
+        except ValueError:
+            return repr(value)
+
+    @classmethod
+    def debug(cls, message, *args, tag=None):
         """Outputs a debug level log.
 
         Args:
-            message (str): Log message.
+            message (str): Log message. ``%`` style format is applied if arguments are given.
+            *args: Format arguments of log message.
             tag (str): Log message tag.
                 If ``None`` is given, source file name and function name are recorded.
         """
-        frame = inspect.currentframe().f_back
-        cls._log(frame, 'debug', message, tag)
+        if cls._threshold > 10:
+            return
+        cls._log('debug', message, args, tag)
 
     @classmethod
-    def info(cls, message, tag=None):
+    def info(cls, message, *args, tag=None):
         """Outputs an info level log.
 
         Args:
-            message (str): Log message.
+            message (str): Log message. ``%`` style format is applied if arguments are given.
+            *args: Format arguments of log message.
             tag (str): Log message tag.
                 If ``None`` is given, source file name and function name are recorded.
         """
-        frame = inspect.currentframe().f_back
-        cls._log(frame, 'info', message, tag)
+        if cls._threshold > 20:
+            return
+        cls._log('info', message, args, tag)
 
     @classmethod
-    def warn(cls, message, tag=None):
+    def warn(cls, message, *args, tag=None):
         """Outputs a warning level log.
 
         Args:
-            message (str): Log message.
+            message (str): Log message. ``%`` style format is applied if arguments are given.
+            *args: Format arguments of log message.
             tag (str): Log message tag.
                 If ``None`` is given, source file name and function name are recorded.
         """
-        frame = inspect.currentframe().f_back
-        cls._log(frame, 'warning', message, tag)
+        if cls._threshold > 30:
+            return
+        cls._log('warning', message, args, tag)
 
     @classmethod
-    def error(cls, message, tag=None):
+    def error(cls, message, *args, tag=None):
         """Outputs an error level log.
 
         Args:
-            message (str): Log message.
+            message (str): Log message. ``%`` style format is applied if arguments are given.
+            *args: Format arguments of log message.
             tag (str): Log message tag.
                 If ``None`` is given, source file name and function name are recorded.
         """
-        frame = inspect.currentframe().f_back
-        cls._log(frame, 'error', message, tag)
+        if cls._threshold > 40:
+            return
+        cls._log('error', message, args, tag)
@@ -0,0 +1,191 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import time
+import traceback
+from collections import deque, OrderedDict
+from threading import Thread, Condition
+
+from ..debug import Logger
+
+
+class EventCoalescer:
+    """This class collapses frequent intermediate job events.
+
+    An intermediate event (e.g. page scanned) is passed immediately if same event of the job
+    was not passed within coalescing window. Otherwise it is held until the window ends
+    and replaced by later same events, so only the latest one is passed.
+    While a job has held events, its later intermediate events are also held,
+    and all held events of the job are passed together in arrival order.
+    Other events (e.g. jobs completed) are always passed immediately
+    after held events of the same job are passed, so order of job events is kept.
+
+    Events are passed to handler outside the lock by one thread at a time in the decided order,
+    so a slow handler does not block receiving thread while it holds the lock.
+    """
+
+    DEFAULT_EVENT_NAMES = ('jobs_page_scanned',)
+    """Event names which are collapsed by default."""
+
+    _MAX_PASSED_TIMES = 256
+
+    def __init__(self, handler, window=0.2, event_names=None):
+        """Initializes a new instance.
+
+        Args:
+            handler (callable): Function which receives passed events as ``handler(event)``.
+            window (float): Coalescing window in seconds.
+            event_names (list[str]): Event names which are collapsed. Default is ``DEFAULT_EVENT_NAMES``.
+        """
+        self._handler = handler
+        self._window = window
+        self._event_names = frozenset(self.DEFAULT_EVENT_NAMES if event_names is None else event_names)
+
+        self._condition = Condition()
+        # Job key -> [time at which held events are passed, event name -> held event (in arrival order)]
+        self._pending = {}
+        # (job key, event name) -> time at which last event was passed
+        self._passed_at = {}
+        self._thread = None
+
+        # Events to be passed in order and whether a thread is passing them
+        self._outbox = deque()
+        self._draining = False
+
+        self._received = 0
+        self._coalesced = 0
+
+    @property
+    def window(self):
+        """Gets coalescing window in seconds."""
+        return self._window
+
+    @property
+    def statistics(self):
+        """Gets received and collapsed (not passed) event counts ('received' and 'coalesced')."""
+        with self._condition:
+            return {'received': self._received, 'coalesced': self._coalesced}
+
+    def put(self, event):
+        """Puts a received event.
+
+        Args:
+            event (dict): Received event data.
+        """
+        with self._condition:
+            self._accept(event, time.monotonic())
+
+        self._drain()
+
+    def _accept(self, event, now):
+        """Passes, holds or collapses an event (condition lock must be held)."""
+        job_key = self._get_job_key(event)
+        name = event.get('event_name', None)
+        self._received += 1
+
+        if job_key[2] is None or name not in self._event_names:
+            # Pass held events of the job first to keep order
+            held = self._pending.pop(job_key, None)
+            if held is not None:
+                self._outbox.extend(held[1].values())
+            self._forget(job_key)
+            self._outbox.append(event)
+            return
+
+        held = self._pending.get(job_key, None)
+        if held is not None:
+            # Hold behind earlier events of the job (latest same event replaces older one)
+            events = held[1]
+            if events.pop(name, None) is not None:
+                self._coalesced += 1
+            events[name] = event
+            held[0] = max(held[0], self._get_window_end(job_key, name, now))
+            return
+
+        end = self._get_window_end(job_key, name, now)
+        if end <= now:
+            self._passed_at[(job_key, name)] = now
+            self._prune(now)
+            self._outbox.append(event)
+            return
+
+        self._pending[job_key] = [end, OrderedDict([(name, event)])]
+        self._start()
+        self._condition.notify()
+
+    def _get_job_key(self, event):
+        """Gets a key of the job which event is related to."""
+        job_status = event.get('job_status', None)
+        job_id = job_status.get('job_id', None) if isinstance(job_status, dict) else None
+        return event.get('accesstoken', None), event.get('event_class', None), job_id
+
+    def _get_window_end(self, job_key, name, now):
+        """Gets time at which coalescing window of an event ends (condition lock must be held)."""
+        passed_at = self._passed_at.get((job_key, name), None)
+        return now if passed_at is None else max(now, passed_at + self._window)
+
+    def _forget(self, job_key):
+        """Forgets last passed times of a job (condition lock must be held)."""
+        for key in [key for key in self._passed_at if key[0] == job_key]:
+            del self._passed_at[key]
+
+    def _prune(self, now):
+        """Forgets passed times out of window (condition lock must be held)."""
+        if len(self._passed_at) <= self._MAX_PASSED_TIMES:
+            return
+
+        for key in [key for key, passed_at in self._passed_at.items() if now - passed_at >= self._window]:
+            del self._passed_at[key]
+
+    def _drain(self):
+        """Passes events in outbox in order. Only one thread passes events at a time."""
+        with self._condition:
+            if self._draining:
+                return  # Events are passed by other thread
+            self._draining = True
+
+        while True:
+            with self._condition:
+                if not self._outbox:
+                    self._draining = False
+                    return
+                event = self._outbox.popleft()
+
+            self._pass(event)
+
+    def _pass(self, event):
+        """Passes an event to handler."""
+        try:
+            self._handler(event)
+        except Exception:
+            Logger.error(traceback.format_exc())
+
+    def _start(self):
+        """Starts flushing thread (condition lock must be held)."""
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name='EventCoalescer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Passes held events at the end of their windows."""
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due_at = None
+                passed = False
+
+                for job_key, (end, events) in list(self._pending.items()):
+                    if end > now:
+                        due_at = end if due_at is None else min(due_at, end)
+                        continue
+
+                    del self._pending[job_key]
+                    for name, event in events.items():
+                        self._passed_at[(job_key, name)] = now
+                        self._outbox.append(event)
+                    passed = True
+
+                if not passed:
+                    self._condition.wait(None if due_at is None else due_at - now)
+                    continue
+
+            self._drain()
@@ -0,0 +1,208 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import time
+import traceback
+from collections import deque
+from queue import Queue, Full
+from threading import Thread, Lock
+
+from .coalescer import EventCoalescer
+from ..debug import Logger
+
+
+class EventQueue:
+    """This class handles received events on dispatcher threads.
+
+    Events are distributed to dispatcher threads by API access token, event class and job ID,
+    so events of same job are handled in received order while events of other jobs are handled in parallel.
+    Each dispatcher has a bounded queue. If the queue is full, the caller waits for a slot up to ``put_timeout`` seconds
+    (backpressure), so the receiving thread is never blocked indefinitely. After that, droppable intermediate events
+    (e.g. page scanned) are dropped and counted, while other events (e.g. jobs completed) are kept in an overflow list
+    which is never dropped and moved to the queue in order as slots become free.
+
+    If coalescing window is given, frequent intermediate job events are collapsed before queued
+    (see ``EventCoalescer``).
+    """
+
+    def __init__(self, handler, worker_count=2, capacity=256, put_timeout=0.5, coalescing_window=0,
+                 droppable_event_names=None):
+        """Initializes a new instance.
+
+        Args:
+            handler (callable): Function which handles an event as ``handler(event)``.
+            worker_count (int): Dispatcher thread count.
+            capacity (int): Maximum count of waiting events per dispatcher thread.
+            put_timeout (float): Seconds to wait for a queue slot before an event is dropped or kept in overflow list.
+            coalescing_window (float): Seconds in which intermediate job events are collapsed.
+                If 0 is given, events are not collapsed.
+            droppable_event_names (list[str]): Event names which can be dropped while queue is full.
+                Default is ``EventCoalescer.DEFAULT_EVENT_NAMES``. Terminal events must not be included.
+        """
+        self._handler = handler
+        self._put_timeout = put_timeout
+        self._queues = [Queue(maxsize=capacity) for _ in range(max(worker_count, 1))]
+        self._droppable_event_names = frozenset(
+            EventCoalescer.DEFAULT_EVENT_NAMES if droppable_event_names is None else droppable_event_names)
+
+        # Events which are not dropped while queue is full (queue -> events in received order)
+        self._overflows = {id(queue): deque() for queue in self._queues}
+        self._overflow_lock = Lock()
+        self._threads = []
+        self._coalescer = EventCoalescer(self._enqueue, coalescing_window) if coalescing_window > 0 else None
+
+        self._stats_lock = Lock()
+        self._received = 0
+        self._handled = 0
+        self._failed = 0
+        self._dropped = 0
+        self._overflowed = 0
+        self._max_depth = 0
+        self._total_latency = 0.
+        self._max_latency = 0.
+
+    @property
+    def started(self):
+        """Gets whether dispatcher threads are started or not."""
+        return bool(self._threads)
+
+    @property
+    def statistics(self):
+        """Gets event handling counters.
+
+        Returns:
+            dict: Received, collapsed, handled, failed, dropped by full queue
+                and kept in overflow list event counts
+                ('received', 'coalesced', 'handled', 'failed', 'dropped' and 'overflowed'),
+                current and maximum waiting event count ('depth' and 'max_depth'),
+                average and maximum milliseconds from received to handled ('average_ms' and 'max_ms').
+        """
+        coalesced = 0 if self._coalescer is None else self._coalescer.statistics['coalesced']
+        with self._stats_lock:
+            return {
+                'received': self._received,
+                'coalesced': coalesced,
+                'handled': self._handled,
+                'failed': self._failed,
+                'dropped': self._dropped,
+                'overflowed': self._overflowed,
+                'depth': sum(queue.qsize() + len(self._overflows[id(queue)]) for queue in self._queues),
+                'max_depth': self._max_depth,
+                'average_ms': self._total_latency * 1000 / self._handled if self._handled else 0.,
+                'max_ms': self._max_latency * 1000,
+            }
+
+    def start(self):
+        """Starts dispatcher threads."""
+        if self._threads:
+            return
+
+        for index, queue in enumerate(self._queues):
+            thread = Thread(target=self._run, args=(queue,), name='EventDispatcher-{}'.format(index), daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+        Logger.info('%d event dispatcher threads are started.', len(self._threads))
+
+    def put(self, event):
+        """Puts a received event to be handled.
+
+        Args:
+            event (dict): Received event data.
+        """
+        with self._stats_lock:
+            self._received += 1
+
+        if self._coalescer is None:
+            self._enqueue(event)
+        else:
+            self._coalescer.put(event)
+
+    def _enqueue(self, event):
+        """Puts an event into the queue of its dispatcher thread."""
+        received_at = time.monotonic()
+        queue = self._queues[hash(self._get_order_key(event)) % len(self._queues)]
+
+        overflow = self._overflows[id(queue)]
+        droppable = event.get('event_name', None) in self._droppable_event_names
+
+        with self._overflow_lock:
+            if overflow:
+                # Keep order behind events which are waiting in overflow list
+                self._keep_or_drop(queue, overflow, event, received_at, droppable)
+                return
+
+        try:
+            queue.put((event, received_at), timeout=self._put_timeout)
+        except Full:
+            # Do not block event sender (e.g. webhook thread) while handlers are stuck
+            with self._overflow_lock:
+                self._keep_or_drop(queue, overflow, event, received_at, droppable)
+            return
+
+        depth = queue.qsize()
+        with self._stats_lock:
+            self._max_depth = max(self._max_depth, depth)
+
+    def _keep_or_drop(self, queue, overflow, event, received_at, droppable):
+        """Drops an intermediate event or keeps other event in overflow list (overflow lock must be held)."""
+        if droppable:
+            Logger.warn('Event queue is full. Event "%s" is dropped.', event.get('event_name', None))
+            with self._stats_lock:
+                self._dropped += 1
+        else:
+            Logger.warn('Event queue is full. Event "%s" waits in overflow list.', event.get('event_name', None))
+            overflow.append((event, received_at))
+            with self._stats_lock:
+                self._overflowed += 1
+
+        # Dispatcher may have emptied the queue meanwhile
+        self._refill(queue, overflow)
+
+    def _refill(self, queue, overflow):
+        """Moves events in overflow list to free queue slots (overflow lock must be held)."""
+        while overflow:
+            try:
+                queue.put_nowait(overflow[0])
+            except Full:
+                return
+            overflow.popleft()
+
+    def join(self):
+        """Waits until all queued events are handled."""
+        for queue in self._queues:
+            queue.join()
+
+    def _get_order_key(self, event):
+        """Gets a key of events which must be handled in order."""
+        job_status = event.get('job_status', None)
+        job_id = job_status.get('job_id', None) if isinstance(job_status, dict) else None
+        return event.get('accesstoken', None), event.get('event_class', None), job_id
+
+    def _run(self, queue):
+        """Handles queued events on dispatcher thread."""
+        while True:
+            event, received_at = queue.get()
+            try:
+                self._handle(event, received_at)
+            finally:
+                overflow = self._overflows[id(queue)]
+                if overflow:
+                    with self._overflow_lock:
+                        self._refill(queue, overflow)
+                queue.task_done()
+
+    def _handle(self, event, received_at):
+        """Handles an event and records latency."""
+        failed = False
+        try:
+            self._handler(event)
+        except Exception:
+            failed = True
+            Logger.error(traceback.format_exc())
+
+        latency = time.monotonic() - received_at
+        with self._stats_lock:
+            self._handled += 1
+            self._failed += failed
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
@@ -1,6 +1,12 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
 import importlib
+import time
+import traceback
+from collections import deque
+from threading import Thread, Condition
+
+from ..debug import Logger
 
 _sse_client = None
 
@@ -14,6 +20,48 @@ def send_event(api_token, type, name, body=None):
         name (str): Event name.
         body (dict): Event body.
     """
+    _get_sse_client().sendNotification(api_token, _build_notification(type, name, body))
+
+
+def publish(api_token, type, name, body=None, key=None, flush=False):
+    """Publishes an event to client side via SSE in batch (see ``SsePublisher``).
+
+    Args:
+        api_token (str): API access token.
+        type (str): Event type.
+        name (str): Event name.
+        body (dict): Event body.
+        key (object): Key of superseded events (e.g. job ID for progress events).
+            Waiting event which has same type, name and key is replaced by this event.
+            If None is given, the event is not replaced.
+        flush (bool): Whether to send waiting events immediately or not (e.g. for job completed events).
+    """
+    _publisher.publish(api_token, type, name, body, key, flush)
+
+
+def flush(api_token=None):
+    """Sends waiting events immediately.
+
+    Args:
+        api_token (str): API access token. If None is given, events for all clients are sent.
+    """
+    _publisher.flush(api_token)
+
+
+def set_publisher(publisher):
+    """Sets SSE publisher to configure batching.
+
+    Args:
+        publisher (SsePublisher): SSE publisher.
+    """
+    global _publisher
+
+    _publisher.flush()
+    _publisher = publisher
+
+
+def _get_sse_client():
+    """Gets SSE client."""
     global _sse_client
 
     if _sse_client is None:
@@ -23,8 +71,180 @@ def send_event(api_token, type, name, body=None):
         module = importlib.import_module(module_name)
         _sse_client = module.EventHandler()
 
-    _sse_client.sendNotification(api_token, {
+    return _sse_client
+
+
+def _build_notification(type, name, body=None):
+    """Builds a notification."""
+    return {
         'type': type,
         'name': name,
         'body': {} if body is None else body,
-    })
+    }
+
+
+class SsePublisher:
+    """This class sends events to client side in batch.
+
+    Events are accumulated per API access token and sent when ``interval`` seconds passed
+    from first waiting event, when ``max_events`` events are waiting or when flush is requested.
+    Waiting progress events are replaced by later events with same key,
+    so fine-grained progress does not flood client side.
+
+    If ``combine`` is true, waiting events are sent as one notification
+    (type: 'batch', name: 'events', body: {'events': [notifications]}).
+    Client side must support the batch notification to enable it.
+
+    Batches for an API access token are sent by one thread at a time in order.
+    If other thread is sending for the token, flushed events are sent by that thread.
+    """
+
+    def __init__(self, interval=0.25, max_events=32, combine=False):
+        """Initializes a new instance.
+
+        Args:
+            interval (float): Maximum seconds for which events wait.
+            max_events (int): Maximum count of waiting events per API access token.
+            combine (bool): Whether waiting events are sent as one notification or not.
+        """
+        self._interval = interval
+        self._max_events = max_events
+        self._combine = combine
+
+        self._condition = Condition()
+        # API access token -> [waiting notifications, keys of them, time at which events must be sent]
+        self._batches = {}
+        self._thread = None
+
+        # API access token -> batches to be sent in order, and tokens for which a thread is sending
+        self._outboxes = {}
+        self._sending = set()
+
+        self._published = 0
+        self._superseded = 0
+        self._sent = 0
+
+    @property
+    def statistics(self):
+        """Gets published, replaced and sent notification counts ('published', 'superseded' and 'sent')."""
+        with self._condition:
+            return {'published': self._published, 'superseded': self._superseded, 'sent': self._sent}
+
+    def publish(self, api_token, type, name, body=None, key=None, flush=False):
+        """Publishes an event (see ``sse.publish``)."""
+        notification = _build_notification(type, name, body)
+
+        with self._condition:
+            self._published += 1
+
+            batch = self._batches.get(api_token, None)
+            if batch is None:
+                batch = self._batches[api_token] = [[], [], time.monotonic() + self._interval]
+                self._start()
+                self._condition.notify()
+
+            notifications, keys, _ = batch
+            if key is not None:
+                merge_key = (type, name, key)
+                if merge_key in keys:
+                    # Remove superseded event (new one is appended to keep order with other events)
+                    index = keys.index(merge_key)
+                    del notifications[index]
+                    del keys[index]
+                    self._superseded += 1
+            else:
+                merge_key = None
+
+            notifications.append(notification)
+            keys.append(merge_key)
+
+            if not flush and len(notifications) < self._max_events:
+                return
+
+            del self._batches[api_token]
+            self._post(api_token, notifications)
+
+        self._drain(api_token)
+
+    def flush(self, api_token=None):
+        """Sends waiting events immediately.
+
+        Args:
+            api_token (str): API access token. If None is given, events for all clients are sent.
+        """
+        with self._condition:
+            tokens = list(self._batches) if api_token is None else [api_token]
+            tokens = [token for token in tokens if token in self._batches]
+            for token in tokens:
+                self._post(token, self._batches.pop(token)[0])
+
+        for token in tokens:
+            self._drain(token)
+
+    def _post(self, api_token, notifications):
+        """Puts notifications to be sent after earlier ones (condition lock must be held)."""
+        self._outboxes.setdefault(api_token, deque()).append(notifications)
+
+    def _drain(self, api_token):
+        """Sends posted notifications in order. Only one thread sends for an API access token at a time."""
+        with self._condition:
+            if api_token in self._sending:
+                return  # Notifications are sent by other thread
+            self._sending.add(api_token)
+
+        while True:
+            with self._condition:
+                outbox = self._outboxes.get(api_token, None)
+                if not outbox:
+                    self._outboxes.pop(api_token, None)
+                    self._sending.discard(api_token)
+                    return
+                notifications = outbox.popleft()
+
+            self._send(api_token, notifications)
+
+    def _send(self, api_token, notifications):
+        """Sends notifications."""
+        if not notifications:
+            return
+
+        try:
+            client = _get_sse_client()
+            if self._combine and len(notifications) > 1:
+                client.sendNotification(api_token, _build_notification('batch', 'events', {'events': notifications}))
+            else:
+                for notification in notifications:
+                    client.sendNotification(api_token, notification)
+        except Exception:
+            Logger.error(traceback.format_exc())
+            return
+
+        with self._condition:
+            self._sent += len(notifications)
+
+    def _start(self):
+        """Starts flushing thread (condition lock must be held)."""
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name='SsePublisher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Sends waiting events at their deadlines."""
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = [token for token, (_, _, deadline) in self._batches.items() if deadline <= now]
+
+                if not due:
+                    deadlines = [deadline for _, _, deadline in self._batches.values()]
+                    self._condition.wait(min(deadlines) - now if deadlines else None)
+                    continue
+
+                for token in due:
+                    self._post(token, self._batches.pop(token)[0])
+
+            for token in due:
+                self._drain(token)
+
+
+_publisher = SsePublisher()
@@ -14,12 +14,7 @@ class EventStreamSubscriber(Subscriber):
 
     def __init__(self):
         """Initializes a new instance."""
-        self._handlers = []
-
-    @property
-    def handlers(self):
-        """Gets event handlers."""
-        return self._handlers
+        super().__init__()
 
     def _subscribe(self, api_token, event_class, event_names=None):
         """Subscribes to events using event stream."""
@@ -36,13 +31,12 @@ class EventStreamSubscriber(Subscriber):
         self._subscribe(handler.api_token, handler.event_class, handler.event_names)
 
         # Add handler
-        self._handlers.append(handler)
-        Logger.warn('Stream event handler for "{}" is added (existing handlers: {}).'.format(handler.event_class, len(self._handlers)))
+        _, count = self._add_handler(handler)
+        Logger.warn('Stream event handler for "%s" is added (existing handlers: %d).', handler.event_class, count)
 
     def unsubscribe(self, handler):
         """Unsubscribes to events."""
-        if handler in self._handlers:
-            self._handlers.remove(handler)
+        if self._remove_handler(handler):
             Logger.warn('Stream event handler for "{}" is removed.'.format(handler.event_class))
         else:
             Logger.warn('Strteam handler for "{}" is not present.'.format(handler.event_class))
@@ -1,13 +1,28 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
+from threading import Lock
+
 from ..debug import Logger
 
 
 class Subscriber:
-    """This class subscribes to events from MFP."""
+    """This class subscribes to events from MFP.
+
+    Event handlers are indexed by API access token, event class and job ID,
+    so a received event is routed to its handlers without scanning all handlers.
+    Handlers which job ID is None receive all events of their event class.
+    """
 
     _subscriber = None
 
+    def __init__(self):
+        """Initializes a new instance."""
+        # (API access token, event class, job ID) -> handlers (ordered by subscription)
+        self._index = {}
+        # Handler -> index key
+        self._handler_keys = {}
+        self._index_lock = Lock()
+
     @classmethod
     def get_subscriber(cls):
         """Gets current subscriber.
@@ -31,7 +46,8 @@ class Subscriber:
     @property
     def handlers(self):
         """Gets event handlers."""
-        raise NotImplementedError()
+        with self._index_lock:
+            return list(self._handler_keys)
 
     def subscribe(self, handler):
         """Subscribes to events using given event handler.
@@ -49,21 +65,77 @@ class Subscriber:
         """
         raise NotImplementedError()
 
-    def _get_handlers(self, api_token, event_class):
+    def update_handler(self, handler):
+        """Updates index of a subscribed event handler after its job ID is changed.
+
+        Args:
+            handler (EventHandler): Existing event handler.
+        """
+        with self._index_lock:
+            if handler in self._handler_keys:
+                self._remove_from_index(handler)
+                self._add_to_index(handler)
+
+    def _add_handler(self, handler):
+        """Adds an event handler to index.
+        If the handler is already added, it is re-indexed (e.g. job ID is changed) but not added twice.
+
+        Args:
+            handler (EventHandler): Event handler.
+        Returns:
+            tuple[bool, int]: Whether handler is newly added or not, and count of existing handlers.
+        """
+        with self._index_lock:
+            added = handler not in self._handler_keys
+            if not added:
+                self._remove_from_index(handler)
+            self._add_to_index(handler)
+            return added, len(self._handler_keys)
+
+    def _remove_handler(self, handler):
+        """Removes an event handler from index.
+
+        Args:
+            handler (EventHandler): Existing event handler.
+        Returns:
+            bool: Whether handler was present or not.
+        """
+        with self._index_lock:
+            if handler not in self._handler_keys:
+                return False
+
+            self._remove_from_index(handler)
+            return True
+
+    def _add_to_index(self, handler):
+        """Adds a handler to index (index lock must be held)."""
+        key = (handler.api_token, handler.event_class, getattr(handler, 'job_id', None))
+        self._index.setdefault(key, {})[handler] = None
+        self._handler_keys[handler] = key
+
+    def _remove_from_index(self, handler):
+        """Removes a handler from index (index lock must be held)."""
+        key = self._handler_keys.pop(handler)
+        handlers = self._index[key]
+        del handlers[handler]
+        if not handlers:
+            del self._index[key]
+
+    def _get_handlers(self, api_token, event_class, job_id=None):
         """Gets existing event handlers.
 
         Args:
             api_token (str): API access token.
             event_class (str): Event class.
+            job_id (int): Job ID of event. If event is not related to a job, None is given.
         Returns:
             list[EventHandler]: Event handlers.
         """
-        handlers = [
-            handler
-            for handler in self.handlers
-            if handler.api_token == api_token and handler.event_class == event_class
-        ]
-        return handlers
+        with self._index_lock:
+            handlers = list(self._index.get((api_token, event_class, None), ()))
+            if job_id is not None:
+                handlers.extend(self._index.get((api_token, event_class, job_id), ()))
+            return handlers
 
     def handle_event(self, event):
         """Handles a received event using event handlers.
@@ -83,19 +155,21 @@ class Subscriber:
             Logger.warn('Received event "{}" does not have API access token.'.format(event_class))
             return
 
-        Logger.warn('Event "{}" is received.'.format(event_class))
+        Logger.warn('Event "%s" is received.', event_class)
 
         # Distributes event to handlers
-        handlers = self._get_handlers(api_token, event_class)
+        job_status = event.get('job_status', None)
+        job_id = job_status.get('job_id', None) if isinstance(job_status, dict) else None
+        handlers = self._get_handlers(api_token, event_class, job_id)
 
         if not handlers:
-            Logger.warn('No handler is present to handle an event "{}".'.format(event_class))
+            Logger.warn('No handler is present to handle an event "%s".', event_class)
             return
 
         for handler in handlers:
             handler.handle_event(event)
 
-        Logger.warn('Received event "{}" has been handled.'.format(event_class))
+        Logger.warn('Received event "%s" has been handled.', event_class)
 
 
 def subscribe(handler):
@@ -122,3 +196,14 @@ def unsubscribe(handler):
         raise RuntimeError('Specific event subscriber is not configured.')
 
     subscriber.unsubscribe(handler)
+
+
+def update_handler(handler):
+    """Updates index of a subscribed event handler after its job ID is changed.
+
+    Args:
+        handler (EventHandler): Existing event handler.
+    """
+    subscriber = Subscriber.get_subscriber()
+    if subscriber is not None:
+        subscriber.update_handler(handler)
@@ -1,35 +1,77 @@
 # Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
 
+from threading import Lock
+
+from .event_queue import EventQueue
 from .subscriber import Subscriber
 from ..webapi import WebApi
 from ..debug import Logger
 
 
+_event_queue = None
+
+
 def set_url(url):
     """Sets webhook URL."""
     Subscriber.set_subscriber(WebhookSubscriber(url))
 
 
+def start_event_queue(worker_count=2, capacity=256, coalescing_window=0.2):
+    """Starts handling webhook events on dispatcher threads,
+    so webhook requests are acknowledged without waiting for event handlers.
+
+    Args:
+        worker_count (int): Dispatcher thread count.
+        capacity (int): Maximum count of waiting events per dispatcher thread.
+        coalescing_window (float): Seconds in which page scanned events of a job are collapsed.
+            If 0 is given, all events are handled.
+    Returns:
+        EventQueue: Started event queue.
+    """
+    global _event_queue
+
+    if _event_queue is None:
+        _event_queue = EventQueue(_dispatch_event, worker_count, capacity, coalescing_window=coalescing_window)
+        _event_queue.start()
+
+    return _event_queue
+
+
+def get_event_queue():
+    """Gets event queue. If events are handled synchronously, None is returned."""
+    return _event_queue
+
+
 def handle_event(event):
-    """Handles an webhook event."""
+    """Handles an webhook event.
+    If event queue is started, the event is handled asynchronously.
+    """
     subscriber = Subscriber.get_subscriber()
 
     if subscriber is None:
         raise RuntimeError('Specific event subscriber is not configured.')
 
-    subscriber.handle_event(event)
+    if _event_queue is None:
+        subscriber.handle_event(event)
+    else:
+        _event_queue.put(event)
+
+
+def _dispatch_event(event):
+    """Handles a queued webhook event."""
+    subscriber = Subscriber.get_subscriber()
+    if subscriber is not None:
+        subscriber.handle_event(event)
 
 
 class WebhookSubscriber(Subscriber):
     """This class subscribes to event using webhook.
     This subscriber is assumed to use in home/setting app.
 
-    Note:
-        This subscriber cannot host multi event handlers for same event class.
-        For example, once a jobs event handler is registered, only scan job events are handlerable.
-        Both print and scan job events cannot be handlerable.
-        If print job event handler is added, the handler overwrites existing scan job event handler
-        (and scan job events will not be handlerable).
+    Webhook subscription is shared by event handlers of same API access token and event class.
+    Subscription is requested to MFP only when first handler is added (or event names are added),
+    and it is deleted when last handler is removed.
+    So multiple jobs (e.g. print and scan jobs) can be handled concurrently.
     """
 
     _API_URL = '/subscription/webhooks/{}'
@@ -40,19 +82,18 @@ class WebhookSubscriber(Subscriber):
         Args:
             webhook_url (str): Webhook URL to receive events.
         """
+        super().__init__()
         self._webhook_url = webhook_url
-        self._handlers = {}
+
+        # (API access token, event class) -> [handler count, subscribed event names]
+        self._subscriptions = {}
+        self._subscriptions_lock = Lock()
 
     @property
     def webhook_url(self):
         """Gets webhook url."""
         return self._webhook_url
 
-    @property
-    def handlers(self):
-        """Gets event handlers."""
-        return self._handlers.values()
-
     def _subscribe(self, api_token, event_class, event_names=None):
         """Subscribes to events using webhook."""
         api = WebApi(api_token)
@@ -63,21 +104,64 @@ class WebhookSubscriber(Subscriber):
 
         Logger.info('Event for "{}" is subscribed using webhook.'.format(event_class))
 
+    def _unsubscribe(self, api_token, event_class):
+        """Deletes webhook subscription."""
+        try:
+            api = WebApi(api_token)
+            api.delete(self._API_URL.format(event_class))
+            Logger.info('Webhook subscription for "%s" is deleted.', event_class)
+        except Exception as e:
+            # Subscription expires with session
+            Logger.warn('Webhook subscription for "%s" cannot be deleted: %s', event_class, e)
+
     def subscribe(self, handler):
         """Subscribes to events using given event handler."""
-        # Subscribe to events
-        self._subscribe(handler.api_token, handler.event_class, handler.event_names)
+        key = (handler.api_token, handler.event_class)
+        event_names = set(handler.event_names or [])
+
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.get(key, None)
+
+            # Subscribe to events if not subscribed yet or new event names are required
+            # (empty event names means all events)
+            if subscription is None or (subscription[1] and (not event_names or event_names - subscription[1])):
+                if subscription is None or not event_names:
+                    names = event_names
+                else:
+                    names = subscription[1] | event_names
+                self._subscribe(handler.api_token, handler.event_class, sorted(names))
 
-        # Add handler
-        self._handlers[handler.event_class] = handler
-        Logger.warn('Webhook event handler for "{}" is added (existing handlers: {}).'.format(handler.event_class, len(self._handlers)))
+                if subscription is None:
+                    subscription = self._subscriptions[key] = [0, names]
+                subscription[1] = names
+
+            # Add handler (same handler is counted only once, so one unsubscription removes it)
+            added, count = self._add_handler(handler)
+            if added:
+                subscription[0] += 1
+
+        Logger.warn('Webhook event handler for "%s" is added (existing handlers: %d).', handler.event_class, count)
 
     def unsubscribe(self, handler):
         """Unsubscribes to events."""
         event_class = handler.event_class
 
-        if event_class in self._handlers:
-            self._handlers.pop(event_class)
-            Logger.warn('Webhook event handler for "{}" is removed.'.format(event_class))
-        else:
+        if not self._remove_handler(handler):
             Logger.warn('Webhook event handler for "{}" is not present.'.format(event_class))
+            return
+
+        Logger.warn('Webhook event handler for "%s" is removed.', event_class)
+
+        # Delete subscription if last handler is removed
+        key = (handler.api_token, event_class)
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.get(key, None)
+            if subscription is None:
+                return
+
+            subscription[0] -= 1
+            if subscription[0] > 0:
+                return
+
+            del self._subscriptions[key]
+            self._unsubscribe(handler.api_token, event_class)
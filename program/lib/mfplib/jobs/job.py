@@ -135,6 +135,9 @@ class JobEventHandler(EventHandler):
         """Sets job ID."""
         self._job_id = job_id
 
+        # Route only events of this job to handler
+        subscriber.update_handler(self)
+
     def handle_event(self, event):
         """Handles a job event.
 
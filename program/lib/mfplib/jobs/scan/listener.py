@@ -53,22 +53,26 @@ class ScanJobResult(namedtuple('ScanJobResult', (
 class EventNotifier(namedtuple('EventNotifier', ('api_token', 'job_id'))):
     """This class notifies scan job events to client side using SSE."""
 
-    def notify(self, event_name, body=None):
+    def notify(self, event_name, body=None, progress=False):
         """Notifies a scan job event.
 
         Args:
             event_name (str): Event name.
             body (dict): Event body.
+            progress (bool): Whether event is a progress which is replaced by later same event or not.
+                Other events are sent with waiting progress events immediately.
         """
         body_ = {'job_id': self.job_id}
         if body:
             body_.update(body)
 
-        sse.send_event(
+        sse.publish(
             api_token=self.api_token,
             type=ScanJobListener._JOB_TYPE,
             name=event_name,
             body=body_,
+            key=self.job_id if progress else None,
+            flush=not progress,
         )
 
 
@@ -133,7 +137,7 @@ class ScanJobListener(JobListener):
         Logger.warn('Page scanned event (page: {}) occurs.'.format(page_number))
 
         # Send event to client
-        notifier.notify(EventType.PageScanned.value, {'page_number': page_number})
+        notifier.notify(EventType.PageScanned.value, {'page_number': page_number}, progress=True)
 
     def _handle_preview_created(self, event, notifier):
         """Handles a preview image created event."""
@@ -273,10 +277,12 @@ class ScanJobListener(JobListener):
 
         Args:
             task_class (str): Task class path (e.g. tasks.upload.UploadTask).
-                Task class must be implemented under 'lib' or 'backgroundapp' directory.
+                Task class must be implemented under 'lib' or 'backgroundapp' directory,
+                and its module must be listed in ``BackgroundApp(allowed_modules=...)`` (e.g. ['tasks']).
             payload (TaskPayload): Task payload.
                 If payload class is inherited from TaskPayload class,
-                the super class must be implemented under 'lib' directory.
+                the super class must be implemented under 'lib' directory,
+                and its module must be also listed in ``allowed_modules`` (e.g. ['tasks', 'payloads']).
         Note:
             You can create a listener with task payload: ::
 
@@ -289,6 +295,10 @@ class ScanJobListener(JobListener):
                     def execute(self, payload):
                         document_name = payload.document_name
 
+            Background app resolves only tasks and payloads in allowed modules: ::
+
+                BackgroundApp(headers, allowed_modules=['tasks', 'payloads'])
+
             If failed to dispatch a task by communication error,
             failed event will be notified via SSE where the failed reason is ``'communication_failed'``.
         """
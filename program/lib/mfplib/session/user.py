@@ -48,6 +48,17 @@ class LoginUser(namedtuple('LoginUser', ('id', 'name', 'domain', 'permissions'))
         # Get current user
         api = WebApi(api_token)
         response = api.get(cls._SESSION_API_URL)
+        return cls.from_session(response)
+
+    @classmethod
+    def from_session(cls, response):
+        """Gets a login user from current session information.
+
+        Args:
+            response (dict): Response of current session API.
+        Returns:
+            User: Login user. If user authentication is disabled, None will be returned.
+        """
         response_user = response.get('login_user', {})
 
         if len(response_user) == 0:
@@ -749,6 +749,14 @@ def stringWidth(text, fontName, fontSize, encoding='utf8'):
     not accelerated as fast enough because of instanceStringWidthT1/TTF"""
     return getFont(fontName).stringWidth(text, fontSize, encoding=encoding)
 
+def stringWidths(texts, fontName, fontSize, encoding='utf8'):
+    """Compute widths of all strings in points;
+    fonts with a batch stringWidths method (e.g. TTFont) measure them in one pass"""
+    font = getFont(fontName)
+    if hasattr(font, 'stringWidths'):
+        return font.stringWidths(texts, fontSize, encoding=encoding)
+    return [font.stringWidth(text, fontSize, encoding=encoding) for text in texts]
+
 def dumpFontData():
     print('Registered Encodings:')
     keys = list(_encodings.keys())
@@ -57,8 +57,21 @@ from reportlab.pdfbase import pdfmetrics, pdfdoc
 from reportlab import rl_config, xrange, ascii
 from reportlab.lib.rl_accel import hex32, add32, calcChecksum, instanceStringWidthTTF
 from collections import namedtuple
+from array import array
 import os, time
 
+_numpy = None
+def _getNumpy():
+    "numpy is imported on first batch width request; False if not installed"
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
 class TTFError(pdfdoc.PDFError):
     "TrueType font exception"
     pass
@@ -1093,6 +1106,18 @@ class TTFontFace(TTFontFile, pdfmetrics.TypeFace):
         "Returns the width of character U+<code>"
         return self.charWidths.get(code, self.defaultWidth)
 
+    def getWidthTable(self):
+        """Returns a dense array('d') of widths indexed by character code.
+        The last item is the default width; use it for codes beyond the table."""
+        table = self.__dict__.get('_widthTable')
+        if table is None:
+            charWidths = self.charWidths
+            table = array('d',[self.defaultWidth])*((max(charWidths)+2) if charWidths else 1)
+            for code, width in charWidths.items():
+                table[code] = width
+            self._widthTable = table
+        return table
+
     def addSubsetObjects(self, doc, fontname, subset):
         """Generate a TrueType font subset and add it to the PDF document.
         Returns a PDFReference to the new FontDescriptor object."""
@@ -1204,6 +1229,25 @@ class TTFont:
     def stringWidth(self,text,size,encoding='utf8'):
         return instanceStringWidthTTF(self,text,size,encoding)
 
+    def stringWidths(self,texts,size,encoding='utf8'):
+        """Calculate the widths of all texts in one pass.
+
+        Widths are looked up in the face's dense width table; with numpy
+        all texts are measured by a single vectorized gather and cumsum."""
+        texts = [t if isUnicode(t) else t.decode(encoding or 'utf-8') for t in texts]
+        table = self.face.getWidthTable()
+        last = len(table)-1
+        np = _getNumpy()
+        if np:
+            codes = np.frombuffer(''.join(texts).encode('utf-32-le'),dtype=np.uint32)
+            widths = np.frombuffer(table,dtype=np.float64)[np.minimum(codes,last)]
+            sums = np.concatenate(([0.],np.cumsum(widths)))
+            lengths = np.fromiter(map(len,texts),dtype=np.intp,count=len(texts))
+            ends = np.cumsum(lengths)
+            return ((sums[ends]-sums[ends-lengths])*(0.001*size)).tolist()
+        dw = table[last]
+        return [0.001*size*sum([table[c] if c<last else dw for c in map(ord,t)]) for t in texts]
+
     def _assignState(self,doc,asciiReadable=None,namePrefix=None):
         '''convenience function for those wishing to roll their own state properties'''
         if asciiReadable is None:
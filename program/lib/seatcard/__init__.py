@@ -0,0 +1,18 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from .fitting import FittedText, GlyphAdvances, TextFitter
+from .imposition import CardSize, Imposition, CARD_SIZES
+from .roster import Attendee, Roster, RowSelection
+
+
+__all__ = [
+    'FittedText',
+    'GlyphAdvances',
+    'TextFitter',
+    'CardSize',
+    'Imposition',
+    'CARD_SIZES',
+    'Attendee',
+    'Roster',
+    'RowSelection',
+]
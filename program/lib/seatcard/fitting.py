@@ -0,0 +1,296 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from itertools import accumulate
+from threading import Lock
+
+
+class _ExtraWidths(dict):
+    """This class holds glyph advances out of dense table."""
+
+    def __init__(self, measure):
+        super().__init__()
+        self._measure = measure
+
+    def __missing__(self, code):
+        return self._measure(code)
+
+
+class GlyphAdvances:
+    """This class looks up glyph advances of a registered font.
+
+    Advances are stored in a dense array indexed by code point,
+    so string width is computed without per character dictionary lookups.
+    All widths are measured in 1/1000 of font size.
+    """
+
+    _CACHE_SIZE = 65536
+
+    def __init__(self, font):
+        """Initializes a new instance.
+
+        Args:
+            font: Registered font object (e.g. ``reportlab.pdfbase.ttfonts.TTFont``).
+        """
+        self._font = font
+        self._widths = {}
+
+        get_table = getattr(font.face, 'getWidthTable', None)
+        if get_table is None:
+            # Non TrueType font: characters are measured on first use
+            self._table = array('d')
+            self._extra = _ExtraWidths(self._measure)
+        else:
+            # Share dense width table of TrueType face (last item is default width)
+            self._table = get_table()
+            default = self._table[-1]
+            self._extra = _ExtraWidths(lambda code: default)
+
+    @property
+    def font(self):
+        """Gets measured font."""
+        return self._font
+
+    def advances(self, text):
+        """Gets glyph advances for each character.
+
+        Args:
+            text (str): Text.
+        Returns:
+            list[float]: Glyph advances.
+        """
+        table = self._table
+        size = len(table)
+        extra = self._extra
+        return [
+            table[code] if code < size else extra[code]
+            for code in map(ord, text)
+        ]
+
+    def width(self, text):
+        """Gets text width (memoized).
+
+        Args:
+            text (str): Text.
+        Returns:
+            float: Text width.
+        """
+        width = self._widths.get(text, None)
+        if width is None:
+            width = sum(self.advances(text))
+            self._remember({text: width})
+
+        return width
+
+    def measure(self, texts):
+        """Measures texts in one batch and memoizes their widths.
+        If font supports batch measurement (``stringWidths``), all texts are measured in one pass.
+
+        Args:
+            texts (list[str]): Texts.
+        """
+        missing = list(set(texts).difference(self._widths))
+        if not missing:
+            return
+
+        measure = getattr(self._font, 'stringWidths', None)
+        if measure is None:
+            widths = [sum(self.advances(text)) for text in missing]
+        else:
+            widths = measure(missing, 1000)
+
+        self._remember(dict(zip(missing, widths)))
+
+    def _remember(self, widths):
+        """Memoizes text widths."""
+        if len(self._widths) + len(widths) > self._CACHE_SIZE:
+            self._widths.clear()
+
+        self._widths.update(widths)
+
+    def _measure(self, code):
+        """Measures a character which is not in dense table."""
+        width = self._extra[code] = self._font.stringWidth(chr(code), 1000)
+        return width
+
+
+class FittedText(namedtuple('FittedText', ('lines', 'size'))):
+    """This class represents a text which is fitted in a box.
+
+    Attributes:
+        lines (tuple[str]): Text lines to be drawn.
+        size (float): Font size.
+    """
+    pass
+
+
+class TextFitter:
+    """This class fits a text in a box by shrinking, wrapping or ellipsis.
+
+    Fitting rules are applied in below order.
+
+    - If text fits in a line with requested size, text is used as is.
+    - Shrink font size to fit in a line (down to minimum size).
+    - Wrap text to lines and shrink font size (down to minimum size).
+    - Truncate text with ellipsis at minimum size.
+    """
+
+    LEADING = 1.1
+    """Line pitch relative to font size."""
+
+    MIN_SIZE_RATIO = 0.5
+    """Default minimum size relative to requested size."""
+
+    _ELLIPSIS = '…'
+
+    _fitters = {}
+    _lock = Lock()
+
+    def __init__(self, font):
+        """Initializes a new instance.
+
+        Args:
+            font: Registered font object.
+        """
+        self._advances = GlyphAdvances(font)
+
+        # Use 3 periods if font does not have ellipsis glyph
+        char_widths = getattr(font.face, 'charWidths', None)
+        if char_widths is not None and ord(self._ELLIPSIS) not in char_widths:
+            self._ellipsis = '...'
+        else:
+            self._ellipsis = self._ELLIPSIS
+
+        self.fit = lru_cache(maxsize=4096)(self._fit)
+
+    @classmethod
+    def get(cls, font_name):
+        """Gets a text fitter for a registered font.
+        Fitters are cached per font file, so glyph advances are built once.
+
+        Args:
+            font_name (str): Registered font name.
+        Returns:
+            TextFitter: Text fitter.
+        """
+        # Import on first use to keep app start up light
+        from reportlab.pdfbase import pdfmetrics
+
+        font = pdfmetrics.getFont(font_name)
+        key = (font_name, getattr(font.face, 'filename', None))
+
+        with cls._lock:
+            fitter = cls._fitters.get(key, None)
+            if fitter is None:
+                fitter = cls._fitters[key] = cls(font)
+
+        return fitter
+
+    def prepare(self, texts):
+        """Measures texts to be fitted in one batch.
+
+        Args:
+            texts (list[str]): Texts (e.g. all names in attendee rows).
+        """
+        self._advances.measure(texts)
+
+    def string_width(self, text, size):
+        """Gets text width in points.
+
+        Args:
+            text (str): Text.
+            size (float): Font size.
+        Returns:
+            float: Text width.
+        """
+        return self._advances.width(text) * 0.001 * size
+
+    def _fit(self, text, max_width, size, min_size=None, max_lines=1, max_height=None):
+        """Fits a text in a box (memoized as ``fit``).
+
+        Args:
+            text (str): Text.
+            max_width (float): Box width.
+            size (float): Requested font size.
+            min_size (float): Minimum font size. If None is given, half of requested size is used.
+            max_lines (int): Maximum line count. Default is 1 (no wrapping).
+            max_height (float): Box height which includes line pitches. If None is given, it is not limited.
+        Returns:
+            FittedText: Fitted text.
+        """
+        min_size = size * self.MIN_SIZE_RATIO if min_size is None else min_size
+        max_height = float('inf') if max_height is None else max_height
+
+        # Widths in 1/1000 of font size
+        width = self._advances.width(text)
+        limit = max_width * 1000.
+
+        # Use as is or shrink to fit in a line
+        fitted_size = min(size, max_height, limit / width if width else size)
+        if fitted_size >= min_size:
+            return FittedText((text,), fitted_size)
+
+        # Wrap to 2 lines and shrink
+        if max_lines >= 2 and len(text) > 1:
+            lines, width = self._split(text)
+            fitted_size = min(
+                size,
+                max_height / (1 + self.LEADING),
+                limit / width if width else size,
+            )
+            if fitted_size >= min_size:
+                return FittedText(lines, fitted_size)
+
+        # Truncate with ellipsis at minimum size
+        limit /= min_size
+        if max_lines >= 2 and len(text) > 1 and min_size * (1 + self.LEADING) <= max_height:
+            index = self._find_break(text, limit)
+            lines = (text[:index].rstrip(), self._truncate(text[index:].lstrip(), limit))
+        else:
+            lines = (self._truncate(text, limit),)
+
+        return FittedText(lines, min_size)
+
+    def _split(self, text):
+        """Splits a text into balanced 2 lines.
+
+        Returns:
+            tuple[tuple[str], float]: Lines and the widest line width.
+        """
+        prefix = [0.] + list(accumulate(self._advances.advances(text)))
+        total = prefix[-1]
+
+        # Break at spaces if present, otherwise between any characters (e.g. CJK text)
+        candidates = [index for index, char in enumerate(text) if char == ' ']
+        if not candidates:
+            candidates = range(1, len(text))
+
+        best_index, best_width = len(text), total
+        for index in candidates:
+            width = max(prefix[index], total - prefix[index])
+            if width < best_width:
+                best_index, best_width = index, width
+
+        lines = (text[:best_index].rstrip(), text[best_index:].lstrip())
+        return (lines, max(self._advances.width(line) for line in lines))
+
+    def _find_break(self, text, limit):
+        """Finds a break index where the first line fits in limit."""
+        prefix = list(accumulate(self._advances.advances(text)))
+        index = max(bisect_right(prefix, limit), 1)
+
+        # Prefer breaking at last space in the first line
+        space = text.rfind(' ', 0, index + 1)
+        return space if space > 0 else index
+
+    def _truncate(self, text, limit):
+        """Truncates a text with ellipsis to fit in limit."""
+        if self._advances.width(text) <= limit:
+            return text
+
+        prefix = list(accumulate(self._advances.advances(text)))
+        index = bisect_right(prefix, limit - self._advances.width(self._ellipsis))
+        return text[:index].rstrip() + self._ellipsis
@@ -0,0 +1,195 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from collections import namedtuple
+
+from reportlab.lib.pagesizes import A4, A5, A6, landscape
+from reportlab.lib.units import mm
+
+
+class CardSize(namedtuple('CardSize', ('name', 'width', 'height'))):
+    """This class represents a seat card size (unfolded).
+
+    Attributes:
+        name (str): Card size name used in requests.
+        width (float): Card width in points.
+        height (float): Card height in points.
+    """
+
+    @classmethod
+    def parse(cls, name):
+        """Parses a card size name.
+
+        Args:
+            name (str): Card size name (e.g. 'a4', 'a6' or 'business_card').
+                If None is given, A4 card size is used.
+        Returns:
+            CardSize: Card size.
+        Raises:
+            ValueError: Card size name is unknown.
+        """
+        if name is None:
+            return CARD_SIZES[0]
+
+        for card_size in CARD_SIZES:
+            if card_size.name == name:
+                return card_size
+
+        raise ValueError('Card size "{}" is not supported.'.format(name))
+
+
+CARD_SIZES = [
+    CardSize('a4', *A4),
+    CardSize('a5', *A5),
+    CardSize('a6', *A6),
+    CardSize('business_card', 85 * mm, 95 * mm),
+]
+"""Supported card sizes. First item is default."""
+
+
+class Imposition:
+    """This class lays out multiple seat cards per sheet.
+
+    Each card is drawn in its own coordinate frame.
+    The frame is scaled from A4 design width,
+    so card drawing functions for A4 sheet can be reused for any card size.
+    """
+
+    DESIGN_WIDTH = A4[0]
+    """Card width in card coordinate frame."""
+
+    FOLD_LINES = (0.15, 0.5, 0.85)
+    """Fold line positions relative to card height."""
+
+    _FOLD_DASH = [1, 1, 3, 3, 1, 4, 4, 1]
+    _CUT_MARK_LENGTH = 4 * mm
+    _EPSILON = 0.01
+
+    def __init__(self, card_size, sheet_size=A4):
+        """Initializes a new instance.
+
+        Args:
+            card_size (CardSize): Card size.
+            sheet_size (tuple[float, float]): Portrait sheet size in points. Default is A4.
+        """
+        self._card_size = card_size
+
+        # Choose sheet orientation which holds more cards (portrait is prioritized)
+        layouts = [
+            self._fit(sheet_size, card_size),
+            self._fit(landscape(sheet_size), card_size),
+        ]
+        self._pagesize, self._cols, self._rows = max(layouts, key=lambda x: x[1] * x[2])
+
+        if self.cards_per_sheet == 0:
+            raise ValueError('Card size "{}" is larger than sheet.'.format(card_size.name))
+
+        # Center card grid on sheet
+        sheet_width, sheet_height = self._pagesize
+        self._origin = (
+            (sheet_width - self._cols * card_size.width) / 2,
+            (sheet_height - self._rows * card_size.height) / 2,
+        )
+
+        # Card coordinate frame
+        self._scale = card_size.width / self.DESIGN_WIDTH
+        self._card_height = card_size.height / self._scale
+
+    @property
+    def card_size(self):
+        """Gets card size."""
+        return self._card_size
+
+    @property
+    def pagesize(self):
+        """Gets oriented sheet size."""
+        return self._pagesize
+
+    @property
+    def cards_per_sheet(self):
+        """Gets card count in a sheet."""
+        return self._cols * self._rows
+
+    @property
+    def frame_size(self):
+        """Gets card size in card coordinate frame (width, height)."""
+        return (self.DESIGN_WIDTH, self._card_height)
+
+    def count_sheets(self, card_count):
+        """Gets sheet count to print given number of cards."""
+        return -(-card_count // self.cards_per_sheet)
+
+    def render(self, canvas, items, draw_card):
+        """Renders cards on sheets.
+
+        Args:
+            canvas (reportlab.pdfgen.canvas.Canvas): Canvas which page size is ``pagesize``.
+            items (list): Items to be drawn. One card is drawn per item.
+            draw_card (callable): Card drawing function which is invoked as
+                ``draw_card(canvas, item, width, height)`` in card coordinate frame.
+        """
+        per_sheet = self.cards_per_sheet
+
+        for start in range(0, len(items), per_sheet):
+            sheet_items = items[start:start + per_sheet]
+
+            for index, item in enumerate(sheet_items):
+                canvas.saveState()
+                self._enter_frame(canvas, index)
+                self._draw_fold_lines(canvas)
+                draw_card(canvas, item, *self.frame_size)
+                canvas.restoreState()
+
+            if per_sheet > 1:
+                self._draw_cut_marks(canvas, len(sheet_items))
+
+            canvas.showPage()
+
+    def _enter_frame(self, canvas, index):
+        """Transforms canvas into card coordinate frame (cards are placed from top left)."""
+        col = index % self._cols
+        row = self._rows - 1 - index // self._cols
+
+        canvas.translate(
+            self._origin[0] + col * self._card_size.width,
+            self._origin[1] + row * self._card_size.height,
+        )
+        canvas.scale(self._scale, self._scale)
+
+    def _draw_fold_lines(self, canvas):
+        """Draws fold lines in card coordinate frame."""
+        width, height = self.frame_size
+
+        canvas.setDash(self._FOLD_DASH, 0)
+        for position in self.FOLD_LINES:
+            canvas.line(0, position * height, width, position * height)
+
+    def _draw_cut_marks(self, canvas, card_count):
+        """Draws cross cut marks on corners of printed cards."""
+        card_width, card_height = self._card_size.width, self._card_size.height
+        half = self._CUT_MARK_LENGTH / 2
+
+        # Collect corners of printed cards
+        corners = set()
+        for index in range(card_count):
+            col = index % self._cols
+            row = self._rows - 1 - index // self._cols
+            for x in (col, col + 1):
+                for y in (row, row + 1):
+                    corners.add((x, y))
+
+        canvas.saveState()
+        canvas.setDash([])
+        canvas.setLineWidth(0.3)
+        for x, y in corners:
+            x = self._origin[0] + x * card_width
+            y = self._origin[1] + y * card_height
+            canvas.line(x - half, y, x + half, y)
+            canvas.line(x, y - half, x, y + half)
+        canvas.restoreState()
+
+    @classmethod
+    def _fit(cls, sheet_size, card_size):
+        """Gets how many cards are placed in columns and rows."""
+        cols = int(sheet_size[0] / card_size.width + cls._EPSILON)
+        rows = int(sheet_size[1] / card_size.height + cls._EPSILON)
+        return (sheet_size, cols, rows)
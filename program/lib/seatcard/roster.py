@@ -0,0 +1,242 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import csv
+import hashlib
+import io
+from collections import namedtuple, OrderedDict
+from threading import Lock
+
+from mfplib.debug import Logger
+
+
+class Attendee(namedtuple('Attendee', ('row_id', 'name', 'company', 'post'))):
+    """This class represents an attendee row in an uploaded CSV.
+
+    Attributes:
+        row_id (int): 1-based row number except header row.
+        name (str): Attendee name.
+        company (str): Company name.
+        post (str): Post name. If CSV does not have post column, None is set.
+    """
+    pass
+
+
+class RowSelection(namedtuple('RowSelection', ('ranges', 'row_ids', 'filters'))):
+    """This class represents rows which are selected to print.
+
+    Attributes:
+        ranges (list[tuple[int, int]]): Inclusive row ranges (e.g. [(1, 10)]).
+        row_ids (list[int]): Explicit row IDs.
+        filters (dict): Column filters (e.g. {'company': 'Toshiba'}).
+            All filters must be matched.
+    Note:
+        If neither ranges nor row IDs are specified, all rows are candidates.
+        Filters are evaluated against the candidates.
+    """
+
+    _COLUMNS = ('name', 'company', 'post')
+
+    @property
+    def all_rows(self):
+        """Gets whether this selection selects all rows or not."""
+        return not (self.ranges or self.row_ids or self.filters)
+
+    @classmethod
+    def parse(cls, row_ranges=None, row_ids=None, filters=None):
+        """Parses request parameters for row selection.
+
+        Args:
+            row_ranges (list): Row ranges. Each range is 'first-last' string, [first, last] list
+                or single row number (e.g. ['1-10', [15, 20], 30]).
+            row_ids (list[int]): Explicit row IDs.
+            filters (dict): Column filters (column name -> value).
+        Returns:
+            RowSelection: Row selection.
+        Raises:
+            ValueError: Parameter format is invalid.
+        """
+        ranges = [cls._parse_range(value) for value in (row_ranges or [])]
+        ids = [cls._parse_row_id(value) for value in (row_ids or [])]
+
+        filters = filters or {}
+        if not isinstance(filters, dict):
+            raise ValueError('Row filters must be a dictionary.')
+
+        for column in filters:
+            if column not in cls._COLUMNS:
+                raise ValueError('Column "{}" cannot be filtered.'.format(column))
+
+        filters = {column: str(value).strip() for column, value in filters.items()}
+
+        return cls(ranges=ranges, row_ids=ids, filters=filters)
+
+    @classmethod
+    def _parse_range(cls, value):
+        """Parses a row range ('3-7', [3, 7] or 3 -> (3, 7) or (3, 3))."""
+        if isinstance(value, str) and '-' in value:
+            value = value.split('-', 1)
+
+        if isinstance(value, (list, tuple)):
+            if len(value) != 2:
+                raise ValueError('Row range {} is invalid.'.format(value))
+            first, last = (cls._parse_row_id(item) for item in value)
+        else:
+            first = last = cls._parse_row_id(value)
+
+        if first > last:
+            raise ValueError('Row range {}-{} is reversed.'.format(first, last))
+
+        return (first, last)
+
+    @classmethod
+    def _parse_row_id(cls, value):
+        """Parses a row ID."""
+        try:
+            row_id = int(value)
+        except (TypeError, ValueError):
+            raise ValueError('Row ID {} is not a number.'.format(value))
+
+        if row_id < 1:
+            raise ValueError('Row ID {} is out of range.'.format(row_id))
+
+        return row_id
+
+
+class Roster:
+    """This class holds attendee rows of an uploaded CSV with column indexes.
+
+    Rosters are cached by CSV content digest,
+    so the rows are decoded and indexed only once for each uploaded CSV.
+    """
+
+    _CACHE_SIZE = 4
+
+    _FALLBACK_ENCODINGS = ('utf-8', 'gbk')
+
+    _cache = OrderedDict()
+    _lock = Lock()
+
+    def __init__(self, attendees):
+        """Initializes a new instance.
+
+        Args:
+            attendees (list[Attendee]): Attendee rows ordered by row ID.
+        """
+        self._attendees = attendees
+
+        # Build indexes (column -> value -> row IDs)
+        self._indexes = {column: {} for column in RowSelection._COLUMNS}
+        for attendee in attendees:
+            for column, index in self._indexes.items():
+                value = getattr(attendee, column)
+                if value is not None:
+                    index.setdefault(value.strip(), []).append(attendee.row_id)
+
+    def __len__(self):
+        return len(self._attendees)
+
+    @property
+    def attendees(self):
+        """Gets all attendee rows."""
+        return self._attendees
+
+    @classmethod
+    def load(cls, filename):
+        """Loads an attendee CSV file.
+        If same content has been loaded, cached roster is returned.
+
+        Args:
+            filename (str): CSV file path.
+        Returns:
+            Roster: Loaded roster.
+        Raises:
+            ValueError: CSV data cannot be decoded.
+        """
+        with open(filename, 'rb') as file:
+            data = file.read()
+
+        digest = hashlib.sha1(data).hexdigest()
+
+        with cls._lock:
+            roster = cls._cache.get(digest, None)
+            if roster is not None:
+                cls._cache.move_to_end(digest)
+                Logger.debug('Cached roster is used for CSV (digest: %s).', digest)
+                return roster
+
+        roster = cls(cls._parse(data))
+        Logger.debug('Roster is indexed for CSV (digest: %s, rows: %d).', digest, len(roster))
+
+        with cls._lock:
+            cls._cache[digest] = roster
+            while len(cls._cache) > cls._CACHE_SIZE:
+                cls._cache.popitem(last=False)
+
+        return roster
+
+    @classmethod
+    def _parse(cls, data):
+        """Parses CSV data into attendee rows (header row is skipped)."""
+        # Import on first use because chardet models are large
+        import chardet
+
+        text = cls._decode(data, chardet.detect(data)['encoding'])
+        reader = csv.reader(io.StringIO(text))
+
+        # Skip header row
+        next(reader, None)
+
+        attendees = []
+        for row_id, row in enumerate(reader, 1):
+            attendee = Attendee(
+                row_id=row_id,
+                name=row[0],
+                company=row[1],
+                post=row[2] if len(row) > 2 else None,
+            )
+            attendees.append(attendee)
+
+        return attendees
+
+    @classmethod
+    def _decode(cls, data, encoding=None):
+        """Decodes CSV data by detected encoding or fallback encodings (e.g. encoding is not detected).
+
+        Raises:
+            ValueError: CSV data cannot be decoded.
+        """
+        encodings = ([encoding] if encoding else []) + list(cls._FALLBACK_ENCODINGS)
+        for encoding in encodings:
+            try:
+                return data.decode(encoding)
+            except (LookupError, UnicodeDecodeError):
+                continue
+
+        raise ValueError('CSV encoding cannot be detected.')
+
+    def select(self, selection=None):
+        """Selects attendee rows.
+
+        Args:
+            selection (RowSelection): Row selection. If None is given, all rows are selected.
+        Returns:
+            list[Attendee]: Selected rows ordered by row ID.
+        """
+        if selection is None or selection.all_rows:
+            return self._attendees
+
+        # Specify candidate rows by ranges and row IDs
+        if selection.ranges or selection.row_ids:
+            count = len(self._attendees)
+            row_ids = set(row_id for row_id in selection.row_ids if row_id <= count)
+            for first, last in selection.ranges:
+                row_ids.update(range(first, min(last, count) + 1))
+        else:
+            row_ids = None
+
+        # Narrow down by column indexes
+        for column, value in selection.filters.items():
+            matched = self._indexes[column].get(value, ())
+            row_ids = set(matched) if row_ids is None else row_ids.intersection(matched)
+
+        return [self._attendees[row_id - 1] for row_id in sorted(row_ids)]
@@ -0,0 +1,8 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import os
+import sys
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'program', 'lib'), os.path.join(ROOT_DIR, 'program')]
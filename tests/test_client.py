@@ -0,0 +1,55 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+from threading import Thread
+
+import pytest
+
+pytest.importorskip('requests')
+
+from mfplib.app.comm.client import CommunicationClient  # noqa: E402
+
+
+class ThreadExecutor:
+    """Runs each submitted function on a new thread which can be joined."""
+
+    def __init__(self):
+        self.threads = []
+
+    def submit(self, function):
+        thread = Thread(target=self._run, args=(function,))
+        self.threads.append(thread)
+        thread.start()
+
+    def _run(self, function):
+        try:
+            function()
+        except Exception:
+            pass
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(1)
+
+
+def test_submission_continues_after_unexpected_error(monkeypatch):
+    client = CommunicationClient('token', 'connection')
+    executor = ThreadExecutor()
+    monkeypatch.setattr(CommunicationClient, '_get_executor', classmethod(lambda cls: executor))
+
+    calls = []
+
+    def send_batch(requests):
+        calls.append(requests)
+        if len(calls) == 1:
+            return None  # Broken response raises TypeError outside request error handling
+        return [(True, body) for _, body in requests]
+
+    monkeypatch.setattr(client, '_send_batch', send_batch)
+
+    client.submit('handler', 1)
+    executor.join()
+    assert not client._sending
+
+    future = client.submit('handler', 2)
+    assert future.result(1) == 2
+    assert not client._sending
@@ -0,0 +1,76 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import time
+from threading import Event, Thread
+
+from mfplib.events.coalescer import EventCoalescer
+
+
+def job_event(name, job_id=1, page=None):
+    return {
+        'accesstoken': 'token', 'event_class': 'jobs', 'event_name': name,
+        'job_status': {'job_id': job_id}, 'page': page,
+    }
+
+
+def names(events):
+    return [(event['event_name'], event['page']) for event in events]
+
+
+def test_page_events_are_collapsed_in_window():
+    passed = []
+    coalescer = EventCoalescer(passed.append, window=10)
+
+    for page in range(1, 4):
+        coalescer.put(job_event('jobs_page_scanned', page=page))
+    coalescer.put(job_event('jobs_completed'))
+
+    assert names(passed) == [('jobs_page_scanned', 1), ('jobs_page_scanned', 3), ('jobs_completed', None)]
+    assert coalescer.statistics == {'received': 4, 'coalesced': 1}
+
+
+def test_job_events_keep_arrival_order_across_names():
+    passed = []
+    coalescer = EventCoalescer(passed.append, window=10, event_names=['jobs_page_scanned', 'jobs_preview_img_created'])
+
+    coalescer.put(job_event('jobs_page_scanned', page=1))
+    coalescer.put(job_event('jobs_page_scanned', page=2))  # held
+    coalescer.put(job_event('jobs_preview_img_created', page=1))  # held behind page 2
+    coalescer.put(job_event('jobs_completed'))
+
+    assert names(passed) == [
+        ('jobs_page_scanned', 1), ('jobs_page_scanned', 2), ('jobs_preview_img_created', 1), ('jobs_completed', None),
+    ]
+
+
+def test_held_events_are_passed_at_window_end():
+    passed = []
+    coalescer = EventCoalescer(passed.append, window=0.05)
+
+    coalescer.put(job_event('jobs_page_scanned', page=1))
+    coalescer.put(job_event('jobs_page_scanned', page=2))
+    time.sleep(0.2)
+
+    assert names(passed) == [('jobs_page_scanned', 1), ('jobs_page_scanned', 2)]
+
+
+def test_slow_handler_does_not_block_receiving_thread():
+    released = Event()
+    passed = []
+
+    def handler(event):
+        released.wait(1)
+        passed.append(event)
+
+    coalescer = EventCoalescer(handler, window=10)
+    sender = Thread(target=coalescer.put, args=(job_event('jobs_completed', job_id=1),))
+    sender.start()
+    time.sleep(0.05)  # sender thread is in handler
+
+    started_at = time.monotonic()
+    coalescer.put(job_event('jobs_completed', job_id=2))
+    assert time.monotonic() - started_at < 0.5
+
+    released.set()
+    sender.join(1)
+    assert [event['job_status']['job_id'] for event in passed] == [1, 2]
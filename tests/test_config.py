@@ -0,0 +1,143 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import json
+
+import pytest
+
+pytest.importorskip('requests')
+
+from mfplib.app import config as config_module  # noqa: E402
+from mfplib.app.config import AppConfig, AppConfigError, AppConfigItem  # noqa: E402
+from mfplib.webapi import WebApiError  # noqa: E402
+
+
+class CardConfig(AppConfig):
+    font_size = AppConfigItem.int(initial_value=60)
+    font_color = AppConfigItem.text(initial_value='black')
+    post_visible = AppConfigItem.boolean()
+
+
+class FakeWebApi:
+    """Records requests and returns stored values."""
+
+    stored = {}
+    posts = []
+    bulk_error = None
+
+    def __init__(self, api_token):
+        pass
+
+    def get(self, url, params):
+        entries = json.loads(params['config_entries'])
+        return {'app_config_list': [
+            {'value': self.stored[(entry['section'], entry['name'])]} for entry in entries
+        ]}
+
+    def post(self, url, body):
+        FakeWebApi.posts.append((url, body))
+        if url == AppConfig._CONFIG_LIST_API_URL:
+            if self.bulk_error is not None:
+                raise self.bulk_error
+            entries = body['config_entries']
+        else:
+            entries = [body]
+
+        for entry in entries:
+            if entry['name'] not in ('font_size', 'font_color', 'post_visible'):
+                raise WebApiError(400, [{'name': 'IllegalArgumentException'}])
+            self.stored[(entry['section'], entry['name'])] = entry['value']
+
+
+@pytest.fixture(autouse=True)
+def fake_api(monkeypatch):
+    FakeWebApi.stored = {
+        ('card', 'font_size'): 60, ('card', 'font_color'): 'black', ('card', 'post_visible'): False,
+    }
+    FakeWebApi.posts = []
+    FakeWebApi.bulk_error = None
+    monkeypatch.setattr(config_module, 'WebApi', FakeWebApi)
+    monkeypatch.setattr(AppConfig, '_bulk_supported', True)
+    AppConfig.invalidate()
+    yield FakeWebApi
+    AppConfig.invalidate()
+
+
+def test_only_changed_items_are_saved(fake_api):
+    config = CardConfig.load_section('token', 'card')
+    assert config.changed_items('card') == []
+
+    config.save_section('token', 'card')
+    assert fake_api.posts == []
+
+    config.font_size = 72
+    assert config.changed_items('card') == ['font_size']
+    config.save_section('token', 'card')
+    assert fake_api.posts == [(AppConfig._CONFIG_API_URL,
+                               {'section': 'card', 'name': 'font_size', 'type': 'int', 'value': 72})]
+
+    # Saved values are not written again
+    config.save_section('token', 'card')
+    assert len(fake_api.posts) == 1
+
+    # Other sections are regarded as changed
+    assert config.changed_items('other') == ['font_size', 'font_color', 'post_visible']
+
+
+def test_changed_items_are_saved_in_bulk(fake_api):
+    config = CardConfig.load_section('token', 'card')
+    config.font_size = 72
+    config.font_color = 'blue'
+    config.save_section('token', 'card')
+
+    assert [url for url, _ in fake_api.posts] == [AppConfig._CONFIG_LIST_API_URL]
+    assert CardConfig.load_section('token', 'card').font_color == 'blue'
+
+
+@pytest.mark.parametrize('error', [
+    WebApiError(404),
+    WebApiError(400, [{'name': 'IllegalArgumentException'}]),
+])
+def test_rejected_bulk_update_falls_back_to_item_update(fake_api, error):
+    fake_api.bulk_error = error
+    config = CardConfig.load_section('token', 'card')
+    config.font_size = 72
+    config.font_color = 'blue'
+    config.save_section('token', 'card')
+
+    assert [url for url, _ in fake_api.posts] == [AppConfig._CONFIG_LIST_API_URL] + [AppConfig._CONFIG_API_URL] * 2
+    assert fake_api.stored[('card', 'font_color')] == 'blue'
+    assert not AppConfig._bulk_supported
+
+
+def test_invalid_item_is_reported_after_bulk_update_is_rejected(fake_api):
+    class BrokenConfig(AppConfig):
+        font_size = AppConfigItem.int(initial_value=60)
+        unknown = AppConfigItem.text(initial_value='x')
+
+    fake_api.bulk_error = WebApiError(400, [{'name': 'IllegalArgumentException'}])
+    config = BrokenConfig()
+    with pytest.raises(AppConfigError):
+        config.save_section('token', 'card')
+    assert AppConfig._bulk_supported
+
+
+def test_assigned_value_is_saved_even_if_it_equals_stale_loaded_value(fake_api):
+    config_a, config_b = CardConfig.load_sections('token', ['card', 'card'])
+
+    config_b.font_size = 72
+    config_b.save_section('token', 'card')
+
+    config_a.font_size = 60
+    assert config_a.changed_items('card') == ['font_size']
+    config_a.save_section('token', 'card')
+    assert fake_api.stored[('card', 'font_size')] == 60
+
+
+def test_value_changed_by_setting_app_is_overwritten_by_assignment(fake_api):
+    config = CardConfig.load_section('token', 'card')
+    fake_api.stored[('card', 'font_color')] = 'golden'  # changed while loaded section is cached
+
+    config = CardConfig.load_section('token', 'card')
+    config.font_color = 'black'
+    config.save_section('token', 'card')
+    assert fake_api.stored[('card', 'font_color')] == 'black'
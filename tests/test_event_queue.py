@@ -0,0 +1,59 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import time
+from threading import Event
+
+from mfplib.events.event_queue import EventQueue
+
+
+def job_event(name, job_id=1):
+    return {'accesstoken': 'token', 'event_class': 'jobs', 'event_name': name, 'job_status': {'job_id': job_id}}
+
+
+def test_only_intermediate_events_are_dropped_when_queue_stays_full():
+    released = Event()
+    handled = []
+
+    def handler(event):
+        released.wait(1)
+        handled.append(event['event_name'])
+
+    queue = EventQueue(handler, worker_count=1, capacity=1, put_timeout=0.05)
+    queue.start()
+
+    queue.put(job_event('jobs_page_scanned'))
+    time.sleep(0.05)  # handler holds the first event
+    queue.put(job_event('jobs_preview_img_created'))
+
+    started_at = time.monotonic()
+    queue.put(job_event('jobs_page_scanned'))
+    queue.put(job_event('jobs_completed'))
+    queue.put(job_event('jobs_page_scanned'))  # dropped behind waiting completed event
+    assert time.monotonic() - started_at < 0.5
+
+    released.set()
+    queue.join()
+    assert handled == ['jobs_page_scanned', 'jobs_preview_img_created', 'jobs_completed']
+    assert queue.statistics['dropped'] == 2
+    assert queue.statistics['overflowed'] == 1
+    assert queue.statistics['depth'] == 0
+
+
+def test_completed_events_are_always_handled():
+    released = Event()
+    handled = []
+
+    def handler(event):
+        released.wait(1)
+        handled.append(event['job_status']['job_id'])
+
+    queue = EventQueue(handler, worker_count=1, capacity=2, put_timeout=0.01)
+    queue.start()
+
+    for job_id in range(20):
+        queue.put(job_event('jobs_completed', job_id))
+
+    released.set()
+    queue.join()
+    assert handled == list(range(20))
+    assert queue.statistics['dropped'] == 0
@@ -0,0 +1,53 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import pytest
+
+pytest.importorskip('requests')
+
+from mfplib.app.background.handlers.task import TaskHandler  # noqa: E402
+from mfplib.app.background.registry import allow_modules, handler_registry, task_registry  # noqa: E402
+from mfplib.app.background.worker import WorkerHost  # noqa: E402
+from mfplib.app.comm.task import Task  # noqa: E402
+
+
+class AllowedTask(Task):
+    def execute(self, payload=None):
+        pass
+
+
+TASK_PATH = __name__ + '.AllowedTask'
+
+
+@pytest.fixture(autouse=True)
+def restore_allowed_modules():
+    yield
+    allow_modules(None)
+
+
+def test_only_mfplib_handlers_are_allowed_by_default():
+    allow_modules(None)
+    assert handler_registry.resolve('mfplib.app.background.handlers.task.TaskHandler') is TaskHandler
+    with pytest.raises(RuntimeError):
+        handler_registry.resolve('collections.OrderedDict')
+    with pytest.raises(RuntimeError):
+        task_registry.resolve(TASK_PATH)
+
+
+def test_tasks_in_allowed_modules_are_resolved():
+    allow_modules([__name__])
+    assert task_registry.resolve(TASK_PATH) is AllowedTask
+
+
+def test_task_handler_rejects_tasks_out_of_allowed_modules(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(WorkerHost, 'enqueue_task', classmethod(lambda cls, task: enqueued.append(task)))
+    request = {'task': AllowedTask(), 'dispatched_at': 0., 'locale': 'zh_CN'}
+
+    allow_modules(None)
+    with pytest.raises(RuntimeError):
+        TaskHandler('token').handle_request(request)
+    assert enqueued == []
+
+    allow_modules([__name__])
+    TaskHandler('token').handle_request(request)
+    assert enqueued == [request['task']]
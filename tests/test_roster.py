@@ -0,0 +1,62 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import pytest
+
+from seatcard import Roster, RowSelection
+
+
+CSV_TEXT = '\n'.join([
+    '姓名,公司,职务',
+    '张三,东芝,经理',
+    '李四,东芝,',
+    '王五,泰克,主任',
+    '赵六,东芝,主任',
+]) + '\n'
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'zxk.csv'
+    path.write_bytes(CSV_TEXT.encode('gbk'))
+    return str(path)
+
+
+def names(rows):
+    return [row.name for row in rows]
+
+
+def test_all_rows_are_selected_without_selection(csv_path):
+    roster = Roster.load(csv_path)
+    assert names(roster.select(RowSelection.parse())) == ['张三', '李四', '王五', '赵六']
+
+
+def test_ranges_row_ids_and_filters_are_combined(csv_path):
+    roster = Roster.load(csv_path)
+    selection = RowSelection.parse(row_ranges=['1-2', [4, 10]], row_ids=[3], filters={'company': ' 东芝 '})
+    assert names(roster.select(selection)) == ['张三', '李四', '赵六']
+
+    selection = RowSelection.parse(filters={'company': '东芝', 'post': '主任'})
+    assert names(roster.select(selection)) == ['赵六']
+
+
+def test_out_of_range_rows_are_ignored(csv_path):
+    roster = Roster.load(csv_path)
+    assert roster.select(RowSelection.parse(row_ids=[9])) == []
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'row_ranges': ['3-1']},
+    {'row_ranges': ['a-2']},
+    {'row_ids': [0]},
+    {'filters': {'email': 'x'}},
+    {'filters': ['company']},
+])
+def test_invalid_selection_is_rejected(kwargs):
+    with pytest.raises(ValueError):
+        RowSelection.parse(**kwargs)
+
+
+def test_undetected_encoding_falls_back():
+    data = CSV_TEXT.encode('utf-8')
+    assert Roster._decode(data, None) == CSV_TEXT
+    assert Roster._decode(CSV_TEXT.encode('gbk'), None) == CSV_TEXT
@@ -0,0 +1,127 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import base64
+import sys
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip('requests')
+
+from mfplib.app.comm import serializer  # noqa: E402
+from mfplib.app.comm.serializer import (  # noqa: E402
+    CompactSerializer,
+    PickleSerializer,
+    SerializationError,
+    find_serializer,
+)
+from mfplib.app.comm.task import Task, TaskPriority  # noqa: E402
+
+
+class PrintCardsTask(Task):
+    priority = TaskPriority.High
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+
+
+class Unregistered:
+    pass
+
+
+Row = namedtuple('Row', ('name', 'company'))
+
+
+def build_text(write):
+    """Builds compact format text by encoder primitives."""
+    encoder = serializer._Encoder(allow_pickle=False)
+    write(encoder)
+    return CompactSerializer.PREFIX + base64.b64encode(b'\x00' + bytes(encoder._buffer)).decode('ascii')
+
+
+@pytest.mark.parametrize('threshold', [None, 0])
+def test_round_trip(threshold):
+    task = PrintCardsTask(rows=[1, 2, 3])
+    task._set_task_attributes('token', 1.5, 'zh_CN')
+    value = {
+        'none': None, 'bool': True, 'ints': [0, -1, 127, 128, -33, 2 ** 40, -2 ** 40], 'float': 0.25,
+        'str': '坐席卡' * 20, 'bytes': b'\x00\xff', 'tuple': (1, 'a'), 'enum': TaskPriority.Low,
+        'task': task, 'task2': task,
+    }
+
+    text = CompactSerializer(compression_threshold=threshold).dumps(value)
+    result = find_serializer(text, allow_pickle=False).loads(text)
+
+    assert {key: result[key] for key in value if not key.startswith('task')} == \
+        {key: value[key] for key in value if not key.startswith('task')}
+    assert type(result['task']) is PrintCardsTask
+    assert result['task'].rows == [1, 2, 3]
+    assert result['task'].api_token == 'token'
+
+
+def test_stdlib_types_are_encoded_natively():
+    value = {
+        'naive': datetime(2020, 4, 1, 9, 30, 15, 123456),
+        'aware': datetime(2020, 4, 1, 9, 30, tzinfo=timezone(timedelta(hours=8))),
+        'date': date(2020, 4, 1),
+        'set': {1, 2, 3},
+        'frozenset': frozenset(['a']),
+        'row': Row('张三', '东芝'),
+    }
+
+    text = CompactSerializer(allow_pickle=False).dumps(value)
+    result = find_serializer(text, allow_pickle=False).loads(text)
+
+    assert result == dict(value, row=('张三', '东芝'))
+    assert type(result['set']) is set and type(result['frozenset']) is frozenset
+    assert type(result['row']) is tuple
+
+
+def test_client_rejects_unsupported_types_at_serialization():
+    from decimal import Decimal
+    from mfplib.app.comm.client import CommunicationClient
+
+    with pytest.raises(SerializationError):
+        CommunicationClient._serializer.dumps({'body': {'price': Decimal('1.5')}})
+
+
+def test_unregistered_module_is_not_imported(tmp_path, monkeypatch):
+    (tmp_path / 'untrusted_module.py').write_text('imported = True\nclass Payload:\n    pass\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def write(encoder):
+        encoder._buffer += bytes((0xc7, 0x03))
+        encoder._write_str('untrusted_module.Payload')
+        encoder._write_dict({})
+
+    with pytest.raises(SerializationError):
+        CompactSerializer().loads(build_text(write))
+    assert 'untrusted_module' not in sys.modules
+
+
+def test_pickle_is_rejected_unless_allowed():
+    with pytest.raises(SerializationError):
+        CompactSerializer(allow_pickle=False).dumps(Unregistered())
+
+    text = CompactSerializer().dumps(Unregistered())
+    with pytest.raises(SerializationError):
+        find_serializer(text, allow_pickle=False).loads(text)
+
+    legacy = PickleSerializer().dumps({'a': 1})
+    assert isinstance(find_serializer(legacy), PickleSerializer)
+    with pytest.raises(SerializationError):
+        find_serializer(legacy, allow_pickle=False)
+
+
+def test_broken_data_raises_serialization_error():
+    def write(encoder):
+        encoder._write_length(1, 0x80, 0x10, (None, 0xde, 0xdf))
+        encoder._write([1])
+        encoder._write(1)
+
+    with pytest.raises(SerializationError):
+        CompactSerializer().loads(build_text(write))
+    with pytest.raises(SerializationError):
+        CompactSerializer().loads(CompactSerializer.PREFIX + '!!')
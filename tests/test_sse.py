@@ -0,0 +1,72 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import time
+from threading import Event, Lock, Thread
+
+import pytest
+
+from mfplib.events import sse
+from mfplib.events.sse import SsePublisher
+
+
+class FakeSseClient:
+    """Records sent notifications and detects concurrent sends."""
+
+    def __init__(self, delay=0.):
+        self.sent = []
+        self.concurrent = False
+        self._delay = delay
+        self._busy = Lock()
+
+    def sendNotification(self, api_token, notification):
+        if not self._busy.acquire(blocking=False):
+            self.concurrent = True
+            return
+        try:
+            time.sleep(self._delay)
+            self.sent.append((api_token, notification['name']))
+        finally:
+            self._busy.release()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeSseClient(delay=0.02)
+    monkeypatch.setattr(sse, '_sse_client', client)
+    return client
+
+
+def test_progress_events_are_superseded_and_flushed(client):
+    publisher = SsePublisher(interval=10)
+    publisher.publish('token', 'job', 'progress', {'page': 1}, key=1)
+    publisher.publish('token', 'job', 'progress', {'page': 2}, key=1)
+    publisher.publish('token', 'job', 'completed', flush=True)
+
+    assert client.sent == [('token', 'progress'), ('token', 'completed')]
+    assert publisher.statistics == {'published': 3, 'superseded': 1, 'sent': 2}
+
+
+def test_sends_for_same_token_are_serialized(client):
+    publisher = SsePublisher(interval=0.01)
+    start = Event()
+
+    def publish(index):
+        start.wait(1)
+        for count in range(5):
+            publisher.publish('token', 'job', 'event-{}-{}'.format(index, count), flush=count % 2 == 0)
+
+    threads = [Thread(target=publish, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join(5)
+    time.sleep(0.1)
+    publisher.flush()
+    time.sleep(0.5)
+
+    assert not client.concurrent
+    assert len(client.sent) == 20
+    for index in range(4):
+        names = [name for _, name in client.sent if name.startswith('event-{}-'.format(index))]
+        assert names == ['event-{}-{}'.format(index, count) for count in range(5)]
@@ -0,0 +1,48 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import pytest
+
+pytest.importorskip('requests')
+
+from mfplib.events.webhook import WebhookSubscriber  # noqa: E402
+
+
+class FakeHandler:
+    """Event handler which has only attributes used by subscriber."""
+
+    def __init__(self, api_token='token', event_class='jobs', event_names=None, job_id=None):
+        self.api_token = api_token
+        self.event_class = event_class
+        self.event_names = event_names
+        self.job_id = job_id
+
+
+@pytest.fixture
+def subscriber(monkeypatch):
+    subscriber = WebhookSubscriber('http://localhost/webhook')
+    subscriber.calls = []
+    monkeypatch.setattr(subscriber, '_subscribe', lambda *args: subscriber.calls.append(('subscribe',) + args))
+    monkeypatch.setattr(subscriber, '_unsubscribe', lambda *args: subscriber.calls.append(('unsubscribe',) + args))
+    return subscriber
+
+
+def test_same_handler_is_counted_once(subscriber):
+    handler = FakeHandler()
+    subscriber.subscribe(handler)
+    subscriber.subscribe(handler)
+    subscriber.unsubscribe(handler)
+
+    assert subscriber.handlers == []
+    assert [call[0] for call in subscriber.calls] == ['subscribe', 'unsubscribe']
+
+
+def test_subscription_is_kept_until_last_handler_is_removed(subscriber):
+    first, second = FakeHandler(job_id=1), FakeHandler(job_id=2)
+    subscriber.subscribe(first)
+    subscriber.subscribe(second)
+
+    subscriber.unsubscribe(first)
+    assert [call[0] for call in subscriber.calls] == ['subscribe']
+
+    subscriber.unsubscribe(second)
+    assert [call[0] for call in subscriber.calls] == ['subscribe', 'unsubscribe']
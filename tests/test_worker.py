@@ -0,0 +1,122 @@
+# Copyright(c) 2020 Toshiba Tec Corporation, All Rights Reserved.
+
+import time
+from threading import Event
+
+import pytest
+
+pytest.importorskip('requests')
+
+from mfplib.app.background.journal import TaskJournal  # noqa: E402
+from mfplib.app.background.metrics import TaskStatus  # noqa: E402
+from mfplib.app.background.queue_entry import QueueEntry  # noqa: E402
+from mfplib.app.background.worker import WorkerHost  # noqa: E402
+from mfplib.app.comm.task import Task  # noqa: E402
+
+
+class KeyedTask(Task):
+    idempotency_key = 'print:abc'
+
+    def execute(self, payload=None):
+        pass
+
+
+@pytest.fixture
+def host(tmp_path):
+    host = WorkerHost(worker_count=1, min_worker_count=0)
+    host.set_journal(TaskJournal(str(tmp_path / 'journal'), sync=False))
+    host._journal.open()
+    WorkerHost._current = host
+    yield host
+    WorkerHost._current = None
+    host._journal.close()
+
+
+def test_enqueue_task_can_be_retried_after_lock_failure(host, monkeypatch):
+    def fail_lock(entry, api_token, lazy=False):
+        raise RuntimeError('lock API failed')
+
+    monkeypatch.setattr(QueueEntry, 'lock_session', fail_lock)
+    with pytest.raises(RuntimeError):
+        WorkerHost.enqueue_task(KeyedTask())
+    assert not host.journal.contains(KeyedTask.idempotency_key)
+
+    monkeypatch.setattr(QueueEntry, 'lock_session', lambda entry, api_token, lazy=False: None)
+    monkeypatch.setattr(host, '_grow', lambda: None)
+    WorkerHost.enqueue_task(KeyedTask())
+    assert host._queue.qsize() == 1
+
+    # Same task is skipped while it is waiting
+    WorkerHost.enqueue_task(KeyedTask())
+    assert host._queue.qsize() == 1
+
+
+def test_discarded_journal_entry_is_not_recovered(tmp_path):
+    path = str(tmp_path / 'journal')
+    journal = TaskJournal(path, sync=False)
+    journal.open()
+    entry_id = journal.append(KeyedTask(), key='a')
+    assert journal.append(KeyedTask(), key='a') is None
+    journal.discard(entry_id)
+    journal.close()
+
+    journal = TaskJournal(path, sync=False)
+    assert journal.open() == []
+    assert not journal.contains('a')
+    journal.close()
+
+
+class SlowTask(Task):
+    def __init__(self, started, aborted):
+        super().__init__()
+        self._started = started
+        self._aborted = aborted
+
+    def execute(self, payload=None, cancellation=None):
+        self._started.set()
+        time.sleep(0.3)
+        self.checkpoint()
+
+    def on_aborted(self):
+        self._aborted.append('slow')
+
+
+def test_task_which_misses_cancel_timeout_is_aborted_once(monkeypatch):
+    monkeypatch.setattr(QueueEntry, 'lock_session', lambda entry, api_token, lazy=False: None)
+    monkeypatch.setattr(WorkerHost, 'CANCEL_TIMEOUT', 0.05)
+
+    host = WorkerHost(worker_count=1, min_worker_count=1)
+    host.start()
+    started, aborted = Event(), []
+    WorkerHost.enqueue_task(SlowTask(started, aborted))
+    assert started.wait(1)
+
+    with host._workers_lock:
+        workers = list(host._workers)
+    host.terminate()
+    for worker in workers:
+        worker.join(1)
+    host.join(1)
+    WorkerHost._current = None
+
+    assert aborted == ['slow']
+    assert [metric.status for metric in host.metrics.recent(10)] == [TaskStatus.Aborted]
+
+
+def test_idle_worker_is_not_retired_while_task_is_waiting(monkeypatch):
+    monkeypatch.setattr(QueueEntry, 'lock_session', lambda entry, api_token, lazy=False: None)
+    host = WorkerHost(worker_count=2, min_worker_count=0)
+    WorkerHost._current = host
+    worker = object()
+    host._workers.append(worker)
+    monkeypatch.setattr(host, '_grow', lambda: None)
+
+    # Task is queued after idle worker timed out but before it retires (counted as idle by _grow)
+    WorkerHost.enqueue_task(KeyedTask())
+    assert not host._retire(worker)
+    assert host.running_worker_count == 1
+
+    host._queue.drain()
+    assert host._retire(worker)
+    assert host.running_worker_count == 0
+    WorkerHost._current = None